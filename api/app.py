@@ -9,15 +9,68 @@ FastAPI is a modern Python web framework for building APIs.
 It automatically generates interactive documentation at /docs
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from typing import AsyncIterator, List, Literal, Optional, Dict, Any
+from contextlib import asynccontextmanager
 from datetime import datetime
 import asyncio
+import hmac
+import json
+import threading
+import time
 
-from api.clients import WeatherAPI, NewsAPI, ExchangeRateAPI, DemoAPIOrchestrator
+from api import geo
+from api.ask import AskError, PlanCache
+from api.clients import WeatherAPI, ForecastAPI, NewsAPI, ExchangeRateAPI, DemoAPIOrchestrator, SummaryError
+from api.cluster import TOKEN_HEADER, shared_cluster
 from api.config import settings
+from api.consumers import API_KEY_HEADER, CLIENT_ID_HEADER, ConsumerRejected, acting_for, consumers
+from api.hotkeys import Prefetcher, Refresher, hot_keys
+from api.keys import all_pools
+from api.limits import all_limiters
+from api.loop_monitor import LoopMonitor
+from api.profiling import RequestProfiler, StackSampler
+from api.scheduler import PRIORITIES, PRIORITY_HEADER, priority, upstream_scheduler
+from api.timing import current_timings, start_request
+from api.transport import close_client, prewarm
+
+# Continuous low-rate sampler of the event loop thread (see api/profiling.py)
+sampler = StackSampler(
+    sample_hz=settings.profiling_sample_hz,
+    window_seconds=settings.profiling_window_seconds,
+    windows=settings.profiling_windows
+)
+
+# Event loop lag heartbeat and slow-callback watchdog (see api/loop_monitor.py)
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval,
+    slow_threshold=settings.slow_callback_threshold,
+    offenders_kept=settings.loop_offenders_kept
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background services when the server starts, stop them on shutdown"""
+    if settings.profiling_enabled:
+        sampler.start(threading.get_ident())
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    if settings.prefetch_enabled:
+        prefetcher.start()
+    if settings.prewarm_on_startup:
+        # Open upstream connections before the server reports ready
+        await prewarm([WeatherAPI.BASE_URL, NewsAPI.BASE_URL, ExchangeRateAPI.BASE_URL])
+    yield
+    await prefetcher.stop()
+    await loop_monitor.stop()
+    await cluster.close()
+    await close_client()
+    sampler.stop()
+
 
 # Create the FastAPI application
 app = FastAPI(
@@ -25,30 +78,239 @@ app = FastAPI(
     description="Demo API showing how external APIs work in an AI agent system",
     version="1.0.0",
     docs_url="/docs",  # Interactive API documentation
-    redoc_url="/redoc"  # Alternative documentation
+    redoc_url="/redoc",  # Alternative documentation
+    lifespan=lifespan
+)
+
+# Initialize API clients
+weather_api = WeatherAPI()
+forecast_api = ForecastAPI()
+news_api = NewsAPI()
+exchange_api = ExchangeRateAPI()
+# Shares the clients above, so their caches (and pre-warming) serve /research too
+orchestrator = DemoAPIOrchestrator(weather_api, news_api, exchange_api)
+cluster = shared_cluster()
+ask_plans = PlanCache()
+
+# Refreshes the hottest weather and exchange entries before they expire (see api/hotkeys.py).
+# News is left out: its daily quota is the tightest.
+prefetcher = Prefetcher(
+    hot_keys,
+    {
+        "weather": Refresher(
+            weather_api.expires_in, weather_api.refresh, lambda key: cluster.owns(f"weather:{key}")
+        ),
+        "exchange": Refresher(
+            exchange_api.expires_in, exchange_api.refresh, lambda key: cluster.owns(f"exchange:{key}")
+        ),
+    },
+    interval=settings.prefetch_interval,
+    budget_per_minute=settings.prefetch_budget_per_minute,
+    min_count=settings.prefetch_min_count
 )
 
-# Enable CORS (Cross-Origin Resource Sharing) for frontend access
+
+def _is_admin_token(token: Optional[str]) -> bool:
+    """Constant-time check of a caller-supplied admin token"""
+    if not settings.admin_token or not token:
+        return False
+    return hmac.compare_digest(token.encode(), settings.admin_token.encode())
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Dependency that protects /admin endpoints with the X-Admin-Token header"""
+    if not settings.admin_token:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not _is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _is_peer(request: Request) -> bool:
+    """Constant-time check that a request comes from a member of this cluster"""
+    if not cluster.enabled:
+        return False
+    return hmac.compare_digest(request.headers.get(TOKEN_HEADER, "").encode(), cluster.token.encode())
+
+
+async def require_peer(request: Request):
+    """
+    Dependency for member-to-member calls
+
+    The lookup route serves any upstream source, so it only exists while
+    clustering is on, and only for callers with the shared cluster token.
+    """
+    if not cluster.enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _is_peer(request):
+        raise HTTPException(status_code=403, detail="Invalid cluster token")
+
+
+def respond(payload: Dict[str, Any], include_timings: bool = False) -> Dict[str, Any]:
+    """
+    Finish an endpoint's response
+
+    Marks the end of handler work (so encoding time can be measured) and
+    attaches the per-phase timing breakdown when the caller asked for it.
+    """
+    timings = current_timings()
+    if timings is not None:
+        if include_timings:
+            payload["timings"] = timings.to_list()
+        timings.handler_done = time.perf_counter()
+    return payload
+
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """Add a Server-Timing header with the phases recorded for this request"""
+    timings = start_request()
+    response = await call_next(request)
+
+    finished = time.perf_counter()
+    if timings.handler_done is not None:
+        timings.record("serialize", finished - timings.handler_done, "response encoding")
+    timings.record("total", finished - timings.started)
+    response.headers["Server-Timing"] = timings.header()
+    return response
+
+
+@app.middleware("http")
+async def request_priority(request: Request, call_next):
+    """
+    Let callers lower their own upstream priority with ``X-Priority``
+
+    Batch jobs and refreshers send ``X-Priority: batch`` or ``background``
+    so they don't compete with interactive traffic (see api/scheduler.py).
+    Cluster members forward it with every lookup. Everything else runs as
+    interactive.
+    """
+    requested = request.headers.get(PRIORITY_HEADER, "").lower()
+    if requested in PRIORITIES:
+        with priority(requested):
+            return await call_next(request)
+    return await call_next(request)
+
+
+# Served without a consumer identity or rate limit (lookups from cluster peers are too)
+CONSUMER_EXEMPT_PATHS = ("/health", "/docs", "/redoc", "/openapi.json", "/admin/")
+
+
+@app.middleware("http")
+async def consumer_limits(request: Request, call_next):
+    """
+    Attribute each request to a consumer and apply its rate limit
+
+    Consumers are identified by X-API-Key, X-Client-ID or client address
+    (see api/consumers.py). Over-limit requests get a 429 with Retry-After.
+    """
+    path = request.url.path
+    if path == "/" or path.startswith(CONSUMER_EXEMPT_PATHS) or (path.startswith("/cluster/") and _is_peer(request)):
+        return await call_next(request)
+    try:
+        consumer = consumers.identify(
+            request.headers.get(API_KEY_HEADER),
+            request.headers.get(CLIENT_ID_HEADER),
+            request.client.host if request.client else None
+        )
+    except ConsumerRejected as e:
+        return JSONResponse(status_code=401, content={"success": False, "error": str(e), "status_code": 401})
+
+    retry_after = consumers.admit(consumer)
+    if retry_after is not None:
+        return JSONResponse(
+            status_code=429,
+            content={
+                "success": False,
+                "error": f"Rate limit exceeded for consumer '{consumer.name}'",
+                "status_code": 429
+            },
+            headers={"Retry-After": str(max(1, round(retry_after)))}
+        )
+    with acting_for(consumer):
+        response = await call_next(request)
+    response.headers["X-RateLimit-Remaining"] = str(int(consumer.tokens))
+    return response
+
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """
+    Return a wall-clock profile instead of the response body when the caller
+    sends the admin token in the X-Profile-Token header
+
+    The token is never read from the query string: URLs end up in access
+    logs, proxy logs and Referer headers.
+    """
+    token = request.headers.get("x-profile-token")
+    if not _is_admin_token(token):
+        return await call_next(request)
+
+    with RequestProfiler(settings.profile_request_hz) as profiler:
+        response = await call_next(request)
+        # Drain the body inside the profiler so serialization is included
+        async for _ in response.body_iterator:
+            pass
+
+    return JSONResponse({
+        "profile": profiler.report(),
+        "path": request.url.path,
+        "status_code": response.status_code
+    })
+
+
+# Enable CORS (Cross-Origin Resource Sharing) for frontend access.
+# Added after the middlewares above so it is the outermost layer: preflights
+# are answered before consumer rate limiting, and 401/429 responses from the
+# limiter still carry CORS headers (browsers would otherwise hide them).
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # In production, specify exact domains
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "Retry-After", "X-RateLimit-Remaining"],
 )
 
-# Initialize API clients
-weather_api = WeatherAPI()
-news_api = NewsAPI()
-exchange_api = ExchangeRateAPI()
-orchestrator = DemoAPIOrchestrator()
-
 
 # Pydantic models for request/response validation
 class ResearchRequest(BaseModel):
     """Request model for research endpoint"""
     city: str = Field(..., description="City name to research")
     currency: str = Field(default="USD", description="Target currency for budget")
+    include: Optional[List[Literal["weather", "news", "currency"]]] = Field(
+        default=None,
+        description="Sources to call (default: all, or those the fields need)"
+    )
+    fields: Optional[List[str]] = Field(
+        default=None,
+        description="Dotted fields to return, e.g. weather.temperature, currency_info.rate, news.articles.title"
+    )
+
+    @field_validator("fields")
+    @classmethod
+    def known_fields(cls, fields: Optional[List[str]]) -> Optional[List[str]]:
+        if fields:
+            DemoAPIOrchestrator.field_tree(fields)  # raises ValueError for unknown sections
+        return fields
+
+    def sources(self) -> Optional[List[str]]:
+        """The sources to call: ``include``, else whatever ``fields`` mention, else all (None)"""
+        if self.include is not None:
+            return list(dict.fromkeys(self.include))
+        if self.fields:
+            return DemoAPIOrchestrator.sources_for_fields(self.fields)
+        return None
+
+
+class ClusterLookup(BaseModel):
+    """A cache lookup forwarded by another cluster member"""
+    source: str
+    params: Dict[str, Any]
+
+
+class ClusterMember(BaseModel):
+    """A member URL, e.g. http://10.0.0.5:8000 or unix:///run/research/worker-1.sock"""
+    member: str
 
 
 class APIHealthResponse(BaseModel):
@@ -76,9 +338,14 @@ async def root():
         "endpoints": {
             "health": "/health",
             "weather": "/weather/{city}",
+            "weather_by_coords": "/weather/by-coords?lat={lat}&lon={lon}",
+            "forecast": "/forecast/{city}",
             "news": "/news",
             "exchange": "/exchange",
-            "research": "/research"
+            "exchange_history": "/exchange/history?base={currency}&targets={currencies}",
+            "research": "/research",
+            "research_stream": "/research/stream",
+            "ask": "/ask?q={question}"
         }
     }
 
@@ -97,14 +364,46 @@ async def health_check():
             "weather": bool(settings.openweather_api_key),
             "news": bool(settings.news_api_key),
             "exchange_rate": bool(settings.exchange_rate_api_key),
-            "openai": bool(settings.openai_api_key)
+            "openai": orchestrator.summary_api.configured
         }
     }
 
 
+@app.get("/weather/by-coords", tags=["External APIs"])
+async def get_weather_by_coords(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude in degrees"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude in degrees"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
+):
+    """
+    Get current weather for a position
+    
+    **What this demonstrates:**
+    - Quantizing coordinates into geohash cells
+    - Using the cell as a cache key, so nearby callers share one upstream call
+    - Coalescing concurrent lookups for the same cell
+    
+    **External API:** OpenWeatherMap
+    
+    **Example:** /weather/by-coords?lat=51.5072&lon=-0.1276
+    """
+    result = await weather_api.get_weather_by_coords(lat, lon)
+    
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
+    
+    return respond({
+        "success": True,
+        "data": result,
+        "cell": geo.cell(lat, lon, settings.weather_geohash_precision).to_dict(),
+        "api_used": "OpenWeatherMap"
+    }, timings)
+
+
 @app.get("/weather/{city}", tags=["External APIs"])
 async def get_weather(
-    city: str
+    city: str,
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
 ):
     """
     Get current weather for a city
@@ -122,20 +421,56 @@ async def get_weather(
     result = await weather_api.get_weather(city)
     
     if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
     
-    return {
+    return respond({
         "success": True,
         "data": result,
         "api_used": "OpenWeatherMap"
-    }
+    }, timings)
+
+
+@app.get("/forecast/{city}", tags=["External APIs"])
+async def get_forecast(
+    city: str,
+    days: int = Query(5, ge=1, le=6, description="Number of days to summarize"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
+):
+    """
+    Get a daily forecast summary for a city
+    
+    **What this demonstrates:**
+    - Time-series data from an external API
+    - Server-side aggregation (3-hourly readings → daily stats)
+    - Caching and sharing one upstream call between many requests
+    
+    **External API:** OpenWeatherMap 5 day / 3 hour forecast
+    
+    **Example:** /forecast/Lisbon?days=3
+    """
+    result = await forecast_api.get_forecast(city, days)
+    
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
+    
+    return respond({
+        "success": True,
+        "data": result,
+        "api_used": "OpenWeatherMap"
+    }, timings)
 
 
 @app.get("/news", tags=["External APIs"])
 async def search_news(
     query: str = Query(..., description="Search query"),
     language: str = Query("en", description="Language code"),
-    page_size: int = Query(5, ge=1, le=10, description="Number of results")
+    page_size: int = Query(5, ge=1, le=10, description="Number of results"),
+    mode: Optional[str] = Query(
+        None,
+        pattern="^(local|remote|auto)$",
+        description="local = index only, remote = always NewsAPI, auto = NewsAPI only if the index falls short"
+    ),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
 ):
     """
     Search news articles
@@ -149,23 +484,28 @@ async def search_news(
     **External API:** NewsAPI
     
     **Example:** /news?query=artificial%20intelligence&page_size=5
+    
+    Articles already fetched are kept in a local search index; in `auto`
+    mode (the default) NewsAPI is only called when the index can't fill
+    the page with fresh results.
     """
-    result = await news_api.search_news(query, language, page_size)
+    result = await news_api.search_news(query, language, page_size, mode)
     
     if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
     
-    return {
+    return respond({
         "success": True,
         "data": result,
-        "api_used": "NewsAPI"
-    }
+        "api_used": "Local news index" if result["served_from"] == "local" else "NewsAPI"
+    }, timings)
 
 
 @app.get("/exchange", tags=["External APIs"])
 async def get_exchange_rate(
     from_currency: str = Query("USD", description="Base currency"),
-    to_currency: str = Query("EUR", description="Target currency")
+    to_currency: str = Query("EUR", description="Target currency"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
 ):
     """
     Get exchange rate between currencies
@@ -182,17 +522,96 @@ async def get_exchange_rate(
     result = await exchange_api.get_exchange_rate(from_currency, to_currency)
     
     if "error" in result:
-        raise HTTPException(status_code=500, detail=result["error"])
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
     
-    return {
+    return respond({
         "success": True,
         "data": result,
         "api_used": "ExchangeRate-API"
-    }
+    }, timings)
+
+
+@app.get("/exchange/changes", tags=["External APIs"])
+async def get_exchange_changes(
+    base: str = Query("USD", description="Base currency"),
+    since_version: int = Query(..., description="Rate table version the client already has"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
+):
+    """
+    Get only the exchange rates that changed since a known version
+    
+    **What this demonstrates:**
+    - Delta updates: send only what changed, not the whole table
+    - HTTP 304 Not Modified for pollers that are already up to date
+    
+    Every `/exchange` response carries the table's `version`. Pass it back
+    here to receive just the currencies that moved. If the version is too
+    old to compare against, the full table is returned with `full: true`.
+    
+    **Example:** /exchange/changes?base=USD&since_version=1760832001
+    """
+    result = await exchange_api.get_rate_changes(base, since_version)
+    
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
+    
+    if result["not_modified"]:
+        return Response(status_code=304, headers={"ETag": f'"{result["base"]}-{result["version"]}"'})
+    
+    return respond({
+        "success": True,
+        "data": result,
+        "api_used": "ExchangeRate-API"
+    }, timings)
+
+
+@app.get("/exchange/history", tags=["External APIs"])
+async def get_exchange_history(
+    base: str = Query("USD", description="Base currency"),
+    targets: str = Query("EUR", description="Comma-separated target currencies"),
+    days: float = Query(365, gt=0, le=3660, description="How far back to look"),
+    window: int = Query(7, ge=1, le=365, description="Observations per moving-average point"),
+    series: bool = Query(True, description="Include the moving-average series, not just its latest value"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
+):
+    """
+    Get exchange rate trends from locally stored history
+    
+    **What this demonstrates:**
+    - Keeping every fetched rate table in a memory-mapped columnar store
+    - Vectorized moving averages, volatility and min/max with NumPy
+    - Reading only the requested window, never the whole history
+    
+    Volatility is the standard deviation of log returns between
+    observations, also annualized from the typical observation spacing.
+    
+    **Example:** /exchange/history?base=USD&targets=EUR,JPY&days=90&window=7
+    """
+    codes = [code.strip().upper() for code in targets.split(",") if code.strip()]
+    if not codes:
+        raise HTTPException(status_code=400, detail="Give at least one target currency")
+    result = await exchange_api.get_rate_history(base.upper(), codes, days, window, series)
+    
+    if "error" in result:
+        raise HTTPException(status_code=result.get("status_code", 500), detail=result["error"])
+    
+    return respond({
+        "success": True,
+        "data": result,
+        "api_used": "Local rate history"
+    }, timings)
+
+
+# Upstream behind each ``include`` name
+API_NAMES = {"weather": "OpenWeatherMap", "news": "NewsAPI", "currency": "ExchangeRate-API"}
 
 
 @app.post("/research", tags=["Orchestration"])
-async def research_destination(request: ResearchRequest):
+async def research_destination(
+    request: ResearchRequest,
+    summary: bool = Query(False, description="Add an LLM-written trip briefing"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
+):
     """
     Research a travel destination (combines multiple APIs)
     
@@ -206,18 +625,118 @@ async def research_destination(request: ResearchRequest):
     "Help me plan a trip to Tokyo"
     
     **APIs Used:** Weather + News + Exchange Rate (all in parallel)
+    
+    Lighter clients can send `include` to call only some sources (`weather`,
+    `news`, `currency`) and `fields` to get only some values back, e.g.
+    `{"city": "Tokyo", "fields": ["weather.temperature", "currency_info.rate"]}`.
+    Sources no field needs aren't called at all.
+    
+    Every response carries a `Server-Timing` header; add `?timings=true`
+    to also get the breakdown in the body.
     """
+    sources = request.sources()
     result = await orchestrator.research_travel_destination(
         request.city,
-        request.currency
+        request.currency,
+        summary=summary,
+        include=sources
     )
+    if request.fields:
+        result = orchestrator.project(result, request.fields)
     
-    return {
+    apis_used = [API_NAMES[name] for name in orchestrator.sources_called(sources, summary)]
+    if summary:
+        apis_used.append("OpenAI-compatible LLM")
+    return respond({
         "success": True,
         "data": result,
-        "apis_used": ["OpenWeatherMap", "NewsAPI", "ExchangeRate-API"],
+        "apis_used": apis_used,
         "processing_type": "parallel_async"
-    }
+    }, timings)
+
+
+def _sse(event: str, data: Any) -> str:
+    """One server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/research/stream", tags=["Orchestration"])
+async def research_stream(request: ResearchRequest):
+    """
+    Research a destination and stream an LLM trip briefing as it is written
+    
+    **What this demonstrates:**
+    - **Streaming responses**: server-sent events (`text/event-stream`)
+    - **LLM integration**: any OpenAI-compatible chat endpoint
+    - **Content-addressed caching**: identical research is never summarized twice
+    
+    Events, in order:
+    - `research`: the combined weather / news / currency data
+    - `token`: the next piece of the summary text (many of these)
+    - `error`: the summary failed (the research is still valid)
+    - `done`: `{"cached": bool}` - whether the summary came from cache
+    """
+    summary_api = orchestrator.summary_api
+    if not summary_api.configured:
+        raise HTTPException(status_code=503, detail="OpenAI API key not configured")
+    
+    research = await orchestrator.research_travel_destination(
+        request.city, request.currency, include=request.sources()
+    )
+    
+    async def events() -> AsyncIterator[str]:
+        # The summary is written from everything fetched, whatever the fields
+        yield _sse("research", orchestrator.project(research, request.fields) if request.fields else research)
+        cached = summary_api.is_cached(research)
+        try:
+            async for token in summary_api.stream_summary(research):
+                yield _sse("token", token)
+        except SummaryError as e:
+            yield _sse("error", e.error)
+        yield _sse("done", {"cached": cached})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/ask", tags=["Orchestration"])
+async def ask(
+    q: str = Query(..., min_length=1, max_length=300, description="Question, e.g. 'weather and news for Lisbon in EUR'"),
+    timings: bool = Query(False, description="Include a per-phase timing breakdown")
+):
+    """
+    Answer a free-text question with the right combination of APIs
+    
+    **What this demonstrates:**
+    - **Intent parsing**: turning natural language into API calls, with
+      simple local rules instead of an LLM
+    - **Plan caching**: questions that normalize to the same words reuse
+      the parsed plan
+    - **Parallel execution**: every call the question needs runs at once
+    
+    **Examples:**
+    - /ask?q=weather and news for Lisbon in EUR
+    - /ask?q=5 day forecast for New York
+    - /ask?q=convert GBP to JPY
+    """
+    try:
+        normalized, plan, cached = ask_plans.plan_for(q)
+    except AskError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    results = await plan.research_plan(weather_api, forecast_api, news_api, exchange_api).run({})
+    
+    return respond({
+        "success": True,
+        "question": q,
+        "understood_as": normalized,
+        "plan": plan.to_dict(),
+        "plan_cached": cached,
+        "data": results
+    }, timings)
 
 
 @app.get("/api-explanation", tags=["Info"])
@@ -277,12 +796,156 @@ async def explain_apis():
     }
 
 
+@app.get("/admin/profile/stacks", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def profile_stacks(
+    seconds: Optional[float] = Query(None, gt=0, description="Only include the last N seconds")
+):
+    """
+    Download aggregated stacks from the continuous sampler
+
+    Output is in folded format (one "frame;frame;frame count" per line),
+    ready for speedscope or flamegraph.pl.
+    """
+    if not sampler.running:
+        raise HTTPException(status_code=409, detail="Continuous profiling is not enabled")
+    return PlainTextResponse(sampler.folded(seconds))
+
+
+@app.get("/admin/keys", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def key_pools():
+    """
+    Quota state of every provider's API key pool
+
+    Keys are masked to their last four characters.
+    """
+    return {pool.provider: pool.status() for pool in all_pools()}
+
+
+@app.get("/admin/loop", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def loop_metrics():
+    """Event loop scheduling lag percentiles and slow-callback counts"""
+    return loop_monitor.metrics()
+
+
+@app.get("/admin/loop/offenders", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def loop_offenders(
+    limit: Optional[int] = Query(None, ge=1, description="Only the N most recent")
+):
+    """
+    Recent callbacks that blocked the event loop past the threshold
+
+    Each entry has how long the loop was blocked and the loop thread's
+    stack captured while it was blocked (innermost frame last).
+    """
+    return {"offenders": loop_monitor.recent_offenders(limit)}
+
+
+@app.get("/admin/limits", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def adaptive_limits(
+    history: Optional[int] = Query(50, ge=0, description="Limit changes to include per provider (0 = all)")
+):
+    """Current adaptive concurrency limit, latency baseline and limit history per provider"""
+    return {limiter.name: limiter.status(history) for limiter in all_limiters()}
+
+
+@app.get("/admin/scheduler", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def scheduler_status():
+    """Upstream slot usage, queue lengths and waits per priority class"""
+    return upstream_scheduler.status()
+
+
+@app.get("/admin/hotkeys", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def hotkeys_status(
+    top: Optional[int] = Query(20, ge=1, description="Keys to list per kind")
+):
+    """
+    Most requested cities and currencies, and how pre-warming is doing
+
+    Counts are count-min sketch estimates (never under, slightly over) and
+    are halved periodically, so they reflect recent traffic. The prefetch
+    hit rate is the share of refreshes a request used before the next one.
+    """
+    return {**hot_keys.status(top), "prefetcher": prefetcher.status()}
+
+
+@app.get("/admin/consumers", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def consumer_usage(
+    top: Optional[int] = Query(100, ge=1, description="Only the N busiest consumers")
+):
+    """Per-consumer requests, rate limit rejections, upstream calls and upstream queueing"""
+    return consumers.usage(top)
+
+
+# Lookups this member serves for its partition of the cluster cache
+CLUSTER_SOURCES = {
+    "weather": lambda p: weather_api.get_weather(p["city"], forwarded=True),
+    "weather-coords": lambda p: weather_api.get_weather_by_coords(p["lat"], p["lon"], forwarded=True),
+    "forecast": lambda p: forecast_api.get_forecast(p["city"], p.get("days"), forwarded=True),
+    "news": lambda p: news_api.search_news(
+        p["query"], p["language"], p["page_size"], p.get("mode"), forwarded=True
+    ),
+    "exchange": lambda p: exchange_api.get_exchange_rate(p["from_currency"], p["to_currency"], forwarded=True),
+    "exchange-changes": lambda p: exchange_api.get_rate_changes(p["base"], p["since_version"], forwarded=True),
+    "exchange-history": lambda p: exchange_api.get_rate_history(
+        p["base"], p["targets"], p["days"], p["window"], p["series"], forwarded=True
+    ),
+}
+
+
+@app.post("/cluster/lookup", include_in_schema=False, dependencies=[Depends(require_peer)])
+async def cluster_lookup(lookup: ClusterLookup):
+    """
+    Serve a lookup for a key this member owns
+
+    Results (including error dicts) are returned as-is with a 200, so the
+    forwarding member can handle them exactly like a local result.
+    """
+    serve = CLUSTER_SOURCES.get(lookup.source)
+    if serve is None:
+        raise HTTPException(status_code=404, detail=f"Unknown lookup source '{lookup.source}'")
+    try:
+        return await serve(lookup.params)
+    except (KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Bad lookup parameters: {e}")
+
+
+@app.get("/admin/cluster", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def cluster_status():
+    """This member's view of the cluster: members, unreachable owners, lookup counts"""
+    return cluster.status()
+
+
+@app.post("/admin/cluster/members", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def cluster_join(body: ClusterMember):
+    """
+    Add a member to this member's ring
+
+    Only the keys falling in the new member's slices of the ring move.
+    Send the same change to every member so their views agree.
+    """
+    cluster.join(body.member)
+    return cluster.status()
+
+
+@app.delete("/admin/cluster/members", tags=["Admin"], dependencies=[Depends(require_admin)])
+async def cluster_leave(member: str = Query(..., description="Member URL to remove")):
+    """Remove a member from this member's ring; its keys move to their next owners"""
+    try:
+        cluster.leave(member)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return cluster.status()
+
+
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom error response format"""
-    return {
-        "success": False,
-        "error": exc.detail,
-        "status_code": exc.status_code
-    }
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "success": False,
+            "error": exc.detail,
+            "status_code": exc.status_code
+        }
+    )
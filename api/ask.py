@@ -0,0 +1,296 @@
+"""
+Natural-Language Questions
+==========================
+
+Turns a free-text request such as "weather and news for Lisbon in EUR"
+into a plan of calls to the existing API clients, without an LLM:
+
+1. **Normalize**: lower-case, drop punctuation and filler words ("what's
+   the", "please", "for"), map synonyms to one word ("temperature" ->
+   weather, "headlines" -> news, "euros" -> EUR). A number next to "days"
+   or a forecast word becomes a day count ("5-day"), one next to a
+   currency is an amount and is dropped, and any other number is part of
+   the place or topic ("2026 world cup"). Questions that only differ in
+   phrasing end up with the same normalized text.
+2. **Parse** the normalized words with a few deterministic rules: which
+   sources were asked for, which currencies, how many forecast days, and
+   whatever is left over is the place (or news topic).
+3. **Cache** the parsed plan under the normalized text, so repeated and
+   similar questions skip parsing entirely.
+
+The plan then runs on a ``ResearchPlan`` (see api/engine.py), so all the
+requested calls happen concurrently.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from api.cache import TTLCache
+from api.engine import ResearchPlan
+
+# Per-call safety net, as in DemoAPIOrchestrator
+SOURCE_TIMEOUT = 15.0
+
+# Every source a question can ask for
+INTENTS = ("weather", "forecast", "news", "exchange")
+
+# Words that name a source, mapped to it
+INTENT_WORDS = {
+    "weather": "weather", "temperature": "weather", "temp": "weather", "climate": "weather",
+    "raining": "weather", "rain": "weather",
+    "forecast": "forecast", "week": "forecast", "tomorrow": "forecast", "days": "forecast",
+    "news": "news", "headlines": "news", "headline": "news", "stories": "news",
+    "happening": "news", "events": "news",
+    "exchange": "exchange", "currency": "exchange", "rate": "exchange", "rates": "exchange",
+    "convert": "exchange", "conversion": "exchange", "money": "exchange", "budget": "exchange",
+    "cost": "exchange",
+}
+
+# Weather words that also start place names ("Cold Spring", "Hot Springs"):
+# part of the name when another place word follows, otherwise weather
+WEATHER_OR_NAME_WORDS = {"hot", "cold"}
+
+# Words asking for the full trip research (weather + news + exchange)
+RESEARCH_WORDS = {"research", "trip", "travel", "visit", "visiting", "vacation", "holiday", "everything", "overview"}
+
+# Currency names people type instead of codes
+CURRENCY_NAMES = {
+    "dollar": "USD", "dollars": "USD", "usd": "USD", "euro": "EUR", "euros": "EUR", "eur": "EUR",
+    "pound": "GBP", "pounds": "GBP", "sterling": "GBP", "gbp": "GBP", "yen": "JPY", "jpy": "JPY",
+    "yuan": "CNY", "renminbi": "CNY", "rupee": "INR", "rupees": "INR", "franc": "CHF", "francs": "CHF",
+    "peso": "MXN", "pesos": "MXN", "baht": "THB", "reais": "BRL",
+    "krona": "SEK", "kronor": "SEK", "krone": "NOK", "lira": "TRY", "rand": "ZAR", "ringgit": "MYR",
+    "dirham": "AED", "dirhams": "AED", "zloty": "PLN", "forint": "HUF", "shekel": "ILS",
+}
+
+# ISO 4217 codes, recognised when written in capitals ("in EUR")
+CURRENCY_CODES = set("""
+AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP
+BYN BZD CAD CDF CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP
+GEL GHS GIP GMD GNF GTQ GYD HKD HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR
+KMF KRW KWD KYD KZT LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN
+MYR MZN NAD NGN NIO NOK NPR NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF SAR SBD
+SCR SDG SEK SGD SHP SLE SOS SRD SSP STN SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH UGX
+USD UYU UZS VES VND VUV WST XAF XCD XOF XPF YER ZAR ZMW ZWL
+""".split())
+
+# Words that carry no meaning for the plan
+FILLER = {
+    "a", "an", "the", "and", "or", "for", "of", "on", "at", "about", "with", "me", "my", "i",
+    "is", "are", "was", "be", "what", "whats", "what's", "how", "hows", "show", "tell", "give",
+    "get", "find", "check", "look", "up", "please", "can", "could", "you", "would", "like",
+    "want", "need", "know", "latest", "current", "currently", "today", "now", "right", "there",
+    "s", "it", "do", "does", "should", "going", "go", "next", "day", "plan", "planning",
+    "info", "information", "some", "any", "many", "much", "will", "be",
+}
+
+# Kept through normalization because they mark currency direction
+_DIRECTION_WORDS = {"to", "into", "from", "in"}
+
+# Letters in any script ("São", "Zürich", "北京"), or digits
+_WORD = re.compile(r"[^\W\d_]+|\d+")
+
+# A forecast length in normalized text ("5-day")
+_DAYS = re.compile(r"(\d+)-day")
+
+
+class AskError(ValueError):
+    """The question couldn't be turned into a plan"""
+
+
+@dataclass(frozen=True)
+class AskPlan:
+    """What a question asks for, ready to run"""
+
+    __slots__ = ("intents", "subject", "base", "target", "days")
+
+    intents: Tuple[str, ...]
+    subject: Optional[str]   # city, or news topic
+    base: str
+    target: Optional[str]
+    days: int
+
+    def research_plan(self, weather_api, forecast_api, news_api, exchange_api) -> ResearchPlan:
+        """A ResearchPlan that makes the calls this question asks for"""
+        plan = ResearchPlan()
+        if "weather" in self.intents:
+            plan.add("weather", lambda _: weather_api.get_weather(self.subject), timeout=SOURCE_TIMEOUT)
+        if "forecast" in self.intents:
+            plan.add(
+                "forecast", lambda _: forecast_api.get_forecast(self.subject, self.days), timeout=SOURCE_TIMEOUT
+            )
+        if "news" in self.intents:
+            plan.add("news", lambda _: news_api.search_news(self.subject, page_size=3), timeout=SOURCE_TIMEOUT)
+        if "exchange" in self.intents:
+            plan.add(
+                "exchange", lambda _: exchange_api.get_exchange_rate(self.base, self.target), timeout=SOURCE_TIMEOUT
+            )
+        return plan
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "intents": list(self.intents),
+            "subject": self.subject,
+            "base": self.base,
+            "target": self.target,
+            "days": self.days,
+        }
+
+
+def _is_name_word(token: str) -> bool:
+    """Could ``token`` be part of a place name or topic (no other meaning to the parser)?"""
+    if token.isdigit() or (token.isupper() and token in CURRENCY_CODES):
+        return False
+    word = token.lower()
+    return not (
+        word in FILLER or word in INTENT_WORDS or word in RESEARCH_WORDS
+        or word in CURRENCY_NAMES or word in _DIRECTION_WORDS
+    )
+
+
+def _is_currency(token: str) -> bool:
+    return (token.isupper() and token in CURRENCY_CODES) or token.lower() in CURRENCY_NAMES
+
+
+def _number(tokens: List[str], i: int) -> Optional[str]:
+    """What the number at ``tokens[i]`` means: a day count ("5-day"), an amount (None), or itself"""
+    before = tokens[i - 1] if i > 0 else ""
+    after = tokens[i + 1] if i + 1 < len(tokens) else ""
+    next_to_forecast = "forecast" in (INTENT_WORDS.get(before.lower()), INTENT_WORDS.get(after.lower()))
+    if after.lower() in ("day", "days") or next_to_forecast:
+        return f"{tokens[i]}-day"
+    if _is_currency(before) or _is_currency(after):
+        return None  # "convert 100 USD to EUR": rates don't depend on the amount
+    return tokens[i]
+
+
+def normalize(question: str) -> str:
+    """
+    Canonical form of a question: the words that matter, in order
+
+    Currency codes typed in capitals stay upper-case so "in ALL" (Albanian
+    lek) isn't confused with the word "all".
+    """
+    tokens = _WORD.findall(question)
+    words: List[str] = []
+    for i, token in enumerate(tokens):
+        if token.isupper() and token in CURRENCY_CODES:
+            words.append(token)
+            continue
+        if token.isdigit():
+            number = _number(tokens, i)
+            if number is not None:
+                words.append(number)
+            continue
+        word = token.lower()
+        if word in WEATHER_OR_NAME_WORDS:
+            starts_name = i + 1 < len(tokens) and _is_name_word(tokens[i + 1])
+            words.append(word if starts_name else "weather")
+        elif word in CURRENCY_NAMES:
+            words.append(CURRENCY_NAMES[word])
+        elif word in INTENT_WORDS:
+            words.append(INTENT_WORDS[word])
+        elif word in RESEARCH_WORDS:
+            words.append("research")
+        elif word in _DIRECTION_WORDS:
+            words.append(word)
+        elif word not in FILLER:
+            words.append(word)
+
+    # Direction words only matter right before a currency
+    kept = [
+        word for i, word in enumerate(words)
+        if word not in _DIRECTION_WORDS or (i + 1 < len(words) and words[i + 1] in CURRENCY_CODES)
+    ]
+    # Drop repeats ("weather ... weather") so they don't change the key
+    deduped: List[str] = []
+    for word in kept:
+        if word in INTENTS or word == "research":
+            if word in deduped:
+                continue
+        deduped.append(word)
+    return " ".join(deduped)
+
+
+def parse(normalized: str) -> AskPlan:
+    """Deterministic rules from normalized words to a plan"""
+    words = normalized.split()
+    intents: List[str] = []
+    currencies: List[Tuple[Optional[str], str]] = []  # (direction word, code)
+    subject_words: List[str] = []
+    days: Optional[int] = None
+
+    previous: Optional[str] = None
+    for word in words:
+        if word in INTENTS:
+            intents.append(word)
+        elif word == "research":
+            intents.extend(("weather", "news", "exchange"))
+        elif word in CURRENCY_CODES:
+            currencies.append((previous if previous in _DIRECTION_WORDS else None, word))
+        elif _DAYS.fullmatch(word):
+            days = int(_DAYS.fullmatch(word).group(1))
+        elif word not in _DIRECTION_WORDS:
+            subject_words.append(word)
+        previous = word
+
+    if days is not None and "forecast" not in intents:
+        intents.append("forecast")
+    if currencies and "exchange" not in intents:
+        intents.append("exchange")
+
+    subject = " ".join(word.capitalize() for word in subject_words) or None
+    if not intents:
+        if subject is None:
+            raise AskError("Couldn't find a place or topic in the question")
+        # Just a place: research it
+        intents = ["weather", "news", "exchange"]
+
+    base, target = "USD", None
+    sources = [code for direction, code in currencies if direction == "from"]
+    targets = [code for direction, code in currencies if direction != "from"]
+    if sources:
+        base = sources[0]
+    if len(targets) >= 2 and not sources:
+        # "USD to EUR": first is the base
+        base, target = targets[0], targets[1]
+    elif targets:
+        target = targets[0]
+    if "exchange" in intents and target is None:
+        target = "EUR" if base == "USD" else "USD"
+
+    needs_subject = [intent for intent in intents if intent != "exchange"]
+    if needs_subject and subject is None:
+        raise AskError(f"Which place should I look up {' and '.join(needs_subject)} for?")
+
+    return AskPlan(
+        intents=tuple(dict.fromkeys(intents)),
+        subject=subject,
+        base=base,
+        target=target,
+        days=min(max(days or 5, 1), 6),
+    )
+
+
+class PlanCache:
+    """Parsed plans keyed by normalized question text"""
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 86400.0):
+        self._cache = TTLCache(maxsize, ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def plan_for(self, question: str) -> Tuple[str, AskPlan, bool]:
+        """(normalized text, plan, whether it came from cache); raises AskError"""
+        key = normalize(question)
+        if not key:
+            raise AskError("The question is empty")
+        plan = self._cache.get(key)
+        if plan is not None:
+            self.hits += 1
+            return key, plan, True
+        self.misses += 1
+        plan = parse(key)
+        self._cache.set(key, plan)
+        return key, plan, False
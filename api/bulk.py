@@ -0,0 +1,210 @@
+"""
+Bulk Research
+=============
+
+Researches a whole list of destinations from the command line, driving
+``DemoAPIOrchestrator`` directly instead of going through the HTTP API.
+
+- **Input**: CSV with ``city`` and optional ``currency`` columns, JSONL
+  (``.jsonl``/``.ndjson``) with one ``{"city": ..., "currency": ...}``
+  object per line, or a ``.json`` file holding an array of such objects
+- **Output**: one JSON line per destination, written as soon as it
+  finishes (in completion order; ``row`` says which input line it was), so
+  memory use stays flat however long the list is
+- **Concurrency and rate limits**: at most ``--concurrency`` destinations
+  in flight, started no faster than ``--rate`` per second
+- **Checkpointing**: the output file is the checkpoint. Re-running with the
+  same output file skips every row already written, so an interrupted run
+  resumes where it stopped without fetching anything twice
+
+Upstream calls run at ``batch`` priority (see api/scheduler.py), so a bulk
+run sharing a process with the API never slows down interactive traffic.
+
+Usage:
+    python -m api.bulk destinations.csv results.jsonl --concurrency 20 --rate 10
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, TextIO, Tuple
+
+from api import clients
+from api.clients import DemoAPIOrchestrator
+from api.scheduler import priority
+
+Row = Tuple[int, str, str]
+
+
+class CheckpointError(ValueError):
+    """The output file has a damaged line before its end, so it can't be resumed safely"""
+
+
+def read_rows(path: Path) -> Iterator[Row]:
+    """(row number, city, currency) for each destination, read lazily (except ``.json`` arrays)"""
+    # utf-8-sig drops the byte order mark spreadsheet exports often start with
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        suffix = path.suffix.lower()
+        if suffix in (".jsonl", ".ndjson"):
+            records = (json.loads(line) for line in f if line.strip())
+        elif suffix == ".json":
+            records = json.load(f)
+            if not isinstance(records, list):
+                raise ValueError(f"{path} must hold a JSON array of destination objects")
+        else:
+            records = csv.DictReader(f)
+        for number, item in enumerate(records):
+            city = (item.get("city") or "").strip()
+            if city:
+                yield number, city, (item.get("currency") or "USD").strip().upper()
+
+
+def completed_rows(path: Path, retry_errors: bool = False) -> Set[int]:
+    """
+    Rows already in the output file
+
+    A final line cut short by an interruption (no newline yet) is removed,
+    so appending resumes on a clean line boundary. Any other unreadable
+    line raises CheckpointError and leaves the file untouched.
+    """
+    if not path.exists():
+        return set()
+    done: Set[int] = set()
+    valid_bytes = 0
+    partial = False
+    with path.open("rb") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+                row = record["row"]
+            except (ValueError, KeyError, TypeError):
+                if line.endswith(b"\n"):
+                    raise CheckpointError(f"{path} line {number} is not a result record; not resuming")
+                partial = True  # the last line: nothing follows a line without a newline
+                break
+            valid_bytes += len(line)
+            if not (retry_errors and not record.get("ok")):
+                done.add(row)
+    if partial:
+        with path.open("r+b") as f:
+            f.truncate(valid_bytes)
+    return done
+
+
+class RateLimiter:
+    """Spaces out starts to at most ``rate`` per second"""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = time.monotonic()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start_at = max(self._next, now)
+        self._next = start_at + self.interval
+        await asyncio.sleep(start_at - now)
+
+
+def _succeeded(result: Dict[str, Any]) -> bool:
+    return not any(isinstance(value, dict) and "error" in value for value in result.values())
+
+
+async def research_all(
+    rows: Iterator[Row],
+    output: TextIO,
+    skip: Set[int],
+    concurrency: int = 10,
+    rate: Optional[float] = None,
+    progress_every: int = 100
+) -> Dict[str, int]:
+    """Research every row not in ``skip``, writing one JSON line per result"""
+    orchestrator = DemoAPIOrchestrator()
+    limiter = RateLimiter(rate)
+    queue: "asyncio.Queue[Optional[Row]]" = asyncio.Queue(maxsize=concurrency * 2)
+    stats = {"done": 0, "failed": 0, "skipped": 0}
+    started = time.monotonic()
+
+    async def produce() -> None:
+        for row in rows:
+            if row[0] in skip:
+                stats["skipped"] += 1
+                continue
+            await queue.put(row)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def work() -> None:
+        while True:
+            row = await queue.get()
+            if row is None:
+                return
+            number, city, currency = row
+            await limiter.wait()
+            try:
+                result = await orchestrator.research_travel_destination(city, currency)
+                ok = _succeeded(result)
+                record = {"row": number, "city": city, "currency": currency, "ok": ok, "result": result}
+            except Exception as e:
+                ok = False
+                record = {"row": number, "city": city, "currency": currency, "ok": False, "error": str(e)}
+
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+            stats["done"] += 1
+            stats["failed"] += not ok
+            if progress_every and stats["done"] % progress_every == 0:
+                rate_done = stats["done"] / (time.monotonic() - started)
+                print(f"{stats['done']} done ({stats['failed']} with errors), {rate_done:.1f}/s", file=sys.stderr)
+
+    with priority("batch"):
+        await asyncio.gather(produce(), *(work() for _ in range(concurrency)))
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("input", type=Path, help="CSV, JSONL or JSON array of destinations")
+    parser.add_argument("output", type=Path, help="JSONL results file (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=10, help="destinations researched at once")
+    parser.add_argument("--rate", type=float, default=None, help="max destinations started per second")
+    parser.add_argument(
+        "--retry-errors", action="store_true",
+        help="on resume, redo rows that had errors (the newer line for a row supersedes the older)"
+    )
+    parser.add_argument("--fresh", action="store_true", help="ignore existing output and start over")
+    parser.add_argument("--verbose", action="store_true", help="show each upstream request")
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    clients.console.quiet = not args.verbose
+
+    if args.fresh and args.output.exists():
+        args.output.unlink()
+    try:
+        skip = completed_rows(args.output, args.retry_errors)
+    except CheckpointError as e:
+        sys.exit(f"{e} (fix the file, or pass --fresh to start over)")
+    if skip:
+        print(f"Resuming: {len(skip)} rows already in {args.output}", file=sys.stderr)
+
+    started = time.monotonic()
+    with args.output.open("a", encoding="utf-8") as output:
+        stats = asyncio.run(research_all(
+            read_rows(args.input), output, skip, args.concurrency, args.rate
+        ))
+    print(
+        f"Finished: {stats['done']} researched ({stats['failed']} with errors), "
+        f"{stats['skipped']} skipped, in {time.monotonic() - started:.1f}s",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Response Cache
+==============
+
+A small in-memory cache for upstream API results.
+
+Every external API we call has a quota, and most answers (today's weather in
+Tokyo, the EUR exchange table) don't change from one second to the next.
+Keeping recent results in memory means repeat requests are answered without
+another network round trip.
+
+The cache is bounded two ways:
+- TTL: entries expire after a fixed number of seconds
+- Size: when full, the least recently used entry is evicted
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Least-recently-used cache with a per-entry time to live
+
+    Not thread-safe; it is meant to be used from a single asyncio event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry expires, or None if it isn't cached (doesn't touch LRU order)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        remaining = entry[0] - time.monotonic()
+        return remaining if remaining > 0 else None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -27,14 +27,77 @@ KEY API CONCEPTS:
 
 import httpx
 import asyncio
-from typing import Dict, Any, Optional
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Any, List, Optional, Union
 from datetime import datetime
+from api import geo
+from api.cache import TTLCache
+from api.cluster import Cluster, shared_cluster
 from api.config import settings
+from api.dedup import dedupe_and_rank
+from api.models import Article, NewsResult, RateTable, WeatherResult
+from api.news_index import NewsIndex, shared_index
+from api.rate_history import HistoryError, RateHistory, shared_history
+from api.engine import ResearchPlan
+from api.forecast import ForecastSeries
+from api.hotkeys import hot_keys
+from api.keys import NoKeyAvailable, parse_keys, send_with_key, shared_pool
+from api.limits import limiter_for
+from api.scheduler import upstream_scheduler
+from api.timing import UpstreamTrace, phase, record
+from api.transport import get_client
 from rich.console import Console
 from rich.panel import Panel
 from rich.json import JSON
 
-console = Console()
+# Console output is synchronous and runs on the event loop, so it can be
+# turned off (REQUEST_LOGGING=false) where latency matters
+console = Console(quiet=not settings.request_logging)
+logger = logging.getLogger(__name__)
+
+# Upstream statuses caused by the request itself (unknown city, bad currency
+# code, malformed query). Retrying won't change the answer, so these errors
+# are remembered in a short-lived negative cache.
+NEGATIVE_CACHE_STATUSES = (400, 404)
+
+
+def error_result(message: str, status_code: int = 500) -> Dict[str, Any]:
+    """Error dict carrying the HTTP status our endpoint should respond with"""
+    return {"error": message, "status_code": status_code}
+
+
+def upstream_status_error(message: str, upstream_status: int) -> Dict[str, Any]:
+    """
+    Map an upstream HTTP error to the status we return to our caller
+    
+    400/404 are the caller's fault and pass straight through. An upstream
+    rate limit means we are temporarily unavailable (503). Anything else -
+    a rejected API key, a provider outage - is a bad gateway (502).
+    """
+    if upstream_status in NEGATIVE_CACHE_STATUSES:
+        status_code = upstream_status
+    elif upstream_status == 429:
+        status_code = 503
+    else:
+        status_code = 502
+    return error_result(message, status_code)
+
+
+def connection_error(message: str, error: httpx.RequestError) -> Dict[str, Any]:
+    """Timeouts are 504 Gateway Timeout, other network failures 502"""
+    return error_result(message, 504 if isinstance(error, httpx.TimeoutException) else 502)
+
+
+def remember_failure(negative_cache: TTLCache, key: Any, error: Dict[str, Any]) -> Dict[str, Any]:
+    """Store deterministic failures in the negative cache; returns the error"""
+    if error.get("status_code") in NEGATIVE_CACHE_STATUSES:
+        negative_cache.set(key, error)
+    return error
 
 
 class WeatherAPI:
@@ -47,10 +110,19 @@ class WeatherAPI:
     
     BASE_URL = "https://api.openweathermap.org/data/2.5"
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or settings.openweather_api_key
+    def __init__(self, api_key: Optional[str] = None, cluster: Optional[Cluster] = None):
+        # Shared with ForecastAPI: both count against the same key quotas
+        self.keys = shared_pool(
+            "OpenWeather", parse_keys(api_key or settings.openweather_api_key),
+            settings.openweather_key_quota, settings.openweather_key_window
+        )
+        self.limiter = limiter_for("openweather")
+        self.cache = TTLCache(settings.cache_max_entries, settings.weather_cache_ttl)
+        self.negative_cache = TTLCache(settings.negative_cache_max_entries, settings.negative_cache_ttl)
+        self.cluster = cluster or shared_cluster()
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
         
-    async def get_weather(self, city: str) -> Dict[str, Any]:
+    async def get_weather(self, city: str, forwarded: bool = False) -> Dict[str, Any]:
         """
         Fetch current weather for a city
         
@@ -60,17 +132,99 @@ class WeatherAPI:
             - appid: API key for authentication
             - units: metric/imperial
         
+        In a cluster, the lookup is forwarded to the member that owns the
+        city's cache entry (``forwarded`` marks a lookup that already was).
+        
         Returns:
             Dictionary with weather data
         """
-        if not self.api_key:
-            return {"error": "OpenWeather API key not configured"}
+        if not self.keys:
+            return error_result("OpenWeather API key not configured", 503)
+        
+        cache_key = city.strip().lower()
+        if not forwarded:
+            routed = await self.cluster.route("weather", f"weather:{cache_key}", {"city": city})
+            if routed is not None:
+                return routed
+        
+        return await self._lookup(cache_key, {"q": city})
+    
+    async def get_weather_by_coords(self, lat: float, lon: float, forwarded: bool = False) -> Dict[str, Any]:
+        """
+        Fetch current weather for a position (e.g. a phone's GPS fix)
         
+        API Endpoint: GET /weather
+        Parameters:
+            - lat, lon: coordinates in degrees
+            - appid: API key for authentication
+            - units: metric/imperial
+        
+        The position is snapped to the centre of its geohash cell (see
+        api/geo.py) and cached per cell, so everyone in the same
+        neighbourhood shares one upstream lookup.
+        """
+        if not self.keys:
+            return error_result("OpenWeather API key not configured", 503)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return error_result("Latitude must be within ±90 and longitude within ±180", 400)
+        
+        area = geo.cell(lat, lon, settings.weather_geohash_precision)
+        cache_key = f"geo:{area.geohash}"
+        if not forwarded:
+            routed = await self.cluster.route("weather-coords", f"weather:{cache_key}", {"lat": lat, "lon": lon})
+            if routed is not None:
+                return routed
+        
+        lat, lon = geo.center(area.geohash)
+        return await self._lookup(cache_key, {"lat": lat, "lon": lon})
+    
+    def expires_in(self, cache_key: str) -> Optional[float]:
+        """Seconds the cached entry has left: None if absent, inf for a known failure"""
+        if self.negative_cache.get(cache_key) is not None:
+            return float("inf")
+        return self.cache.expires_in(cache_key)
+    
+    async def refresh(self, cache_key: str) -> Dict[str, Any]:
+        """Fetch a cache entry again ahead of its expiry (used by the prefetcher)"""
+        if cache_key.startswith("geo:"):
+            lat, lon = geo.center(cache_key[len("geo:"):])
+            return await self._lookup(cache_key, {"lat": lat, "lon": lon}, refresh=True)
+        return await self._lookup(cache_key, {"q": cache_key}, refresh=True)
+    
+    async def _lookup(self, cache_key: str, params: Dict[str, Any], refresh: bool = False) -> Dict[str, Any]:
+        """Serve from the caches, or join/start the upstream call for ``cache_key``"""
+        if not refresh:
+            hot_keys.observe("weather", cache_key)
+            # Serve repeat lookups from the cache instead of the network
+            lookup_started = time.perf_counter()
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                result = cached.to_dict()
+                record("weather-cache", time.perf_counter() - lookup_started, "cache hit")
+                return result
+            failure = self.negative_cache.get(cache_key)
+            if failure is not None:
+                record("weather-cache", time.perf_counter() - lookup_started, "negative cache hit")
+                return dict(failure)
+        
+        # Join an identical request that is already in flight
+        pending = self._inflight.get(cache_key)
+        if pending is None:
+            pending = asyncio.ensure_future(self._fetch(params))
+            self._inflight[cache_key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        result = await asyncio.shield(pending)
+        if isinstance(result, dict):
+            return dict(remember_failure(self.negative_cache, cache_key, result))
+        self.cache.set(cache_key, result)
+        return result.to_dict()
+    
+    async def _fetch(self, params: Dict[str, Any]) -> Union[WeatherResult, Dict[str, Any]]:
+        """Fetch and shape current weather; returns a WeatherResult or an error dict"""
         # Build the complete URL with query parameters
         endpoint = f"{self.BASE_URL}/weather"
         params = {
-            "q": city,
-            "appid": self.api_key,
+            **params,
             "units": "metric"  # Use Celsius
         }
         
@@ -79,37 +233,161 @@ class WeatherAPI:
         console.print(f"Method: GET")
         console.print(f"Parameters: {params}")
         
-        # Make the HTTP GET request
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(endpoint, params=params, timeout=10.0)
-                
-                console.print(f"\n[bold green]✅ API Response:[/bold green]")
-                console.print(f"Status Code: {response.status_code}")
-                
-                response.raise_for_status()  # Raise exception for 4xx/5xx
-                data = response.json()
-                
-                # Extract relevant information
-                result = {
-                    "city": data.get("name"),
-                    "country": data.get("sys", {}).get("country"),
-                    "temperature": data.get("main", {}).get("temp"),
-                    "feels_like": data.get("main", {}).get("feels_like"),
-                    "humidity": data.get("main", {}).get("humidity"),
-                    "description": data.get("weather", [{}])[0].get("description"),
-                    "wind_speed": data.get("wind", {}).get("speed"),
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                return result
-                
-            except httpx.HTTPStatusError as e:
-                console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
-                return {"error": f"API returned error: {e.response.status_code}"}
-            except httpx.RequestError as e:
-                console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
-                return {"error": f"Failed to connect: {str(e)}"}
+        # Make the HTTP GET request (over the shared, pooled connection)
+        client = get_client()
+        try:
+            # Wait for the provider's adaptive limit (api/limits.py), then take an
+            # upstream slot by priority (api/scheduler.py) around each attempt;
+            # only the HTTP exchange itself is timed
+            async with self.limiter.track() as call:
+                trace = UpstreamTrace()
+                # The key goes in as "appid", taken from the pool per attempt
+                response = await send_with_key(
+                    self.keys,
+                    lambda key: upstream_scheduler.run(lambda: call.send(client.get(
+                        endpoint, params={**params, "appid": key}, timeout=10.0, extensions={"trace": trace}
+                    )))
+                )
+                call.status_code = response.status_code
+            
+            console.print(f"\n[bold green]✅ API Response:[/bold green]")
+            console.print(f"Status Code: {response.status_code}")
+            
+            response.raise_for_status()  # Raise exception for 4xx/5xx
+            data = response.json()
+            trace.finish("weather")
+            
+            # Extract relevant information
+            with phase("weather-shape", "response shaping"):
+                return WeatherResult.from_payload(data, datetime.now().isoformat())
+            
+        except httpx.HTTPStatusError as e:
+            console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
+            return upstream_status_error(
+                f"API returned error: {e.response.status_code}", e.response.status_code
+            )
+        except httpx.RequestError as e:
+            console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
+            return connection_error(f"Failed to connect: {str(e)}", e)
+        except NoKeyAvailable as e:
+            return error_result(str(e), 503)
+
+
+class ForecastAPI:
+    """
+    OpenWeatherMap 5-Day Forecast Integration
+    
+    Demonstrates: Time-series data, columnar storage, request coalescing
+    Free tier: https://openweathermap.org/forecast5
+    
+    The forecast only changes every few hours, so each city's series is
+    cached, and concurrent requests for the same city share one upstream
+    call instead of each making their own.
+    """
+    
+    BASE_URL = "https://api.openweathermap.org/data/2.5"
+    
+    def __init__(self, api_key: Optional[str] = None, cluster: Optional[Cluster] = None):
+        self.keys = shared_pool(
+            "OpenWeather", parse_keys(api_key or settings.openweather_api_key),
+            settings.openweather_key_quota, settings.openweather_key_window
+        )
+        self.limiter = limiter_for("openweather")
+        self.cache = TTLCache(settings.cache_max_entries, settings.forecast_cache_ttl)
+        self.negative_cache = TTLCache(settings.negative_cache_max_entries, settings.negative_cache_ttl)
+        self.cluster = cluster or shared_cluster()
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+    
+    async def get_forecast(self, city: str, days: Optional[int] = None, forwarded: bool = False) -> Dict[str, Any]:
+        """
+        Fetch the 5-day / 3-hour forecast for a city, aggregated per day
+        
+        API Endpoint: GET /forecast
+        Parameters:
+            - q: city name
+            - appid: API key for authentication
+            - units: metric/imperial
+        
+        Returns:
+            Dictionary with daily min/max/mean, precipitation and best-day ranking
+        """
+        if not self.keys:
+            return error_result("OpenWeather API key not configured", 503)
+        
+        cache_key = city.strip().lower()
+        if not forwarded:
+            routed = await self.cluster.route(
+                "forecast", f"forecast:{cache_key}", {"city": city, "days": days}
+            )
+            if routed is not None:
+                return routed
+        
+        lookup_started = time.perf_counter()
+        series = self.cache.get(cache_key)
+        failure = self.negative_cache.get(cache_key) if series is None else None
+        if series is not None:
+            record("forecast-cache", time.perf_counter() - lookup_started, "cache hit")
+        elif failure is not None:
+            record("forecast-cache", time.perf_counter() - lookup_started, "negative cache hit")
+            return dict(failure)
+        else:
+            # Join an identical request that is already in flight
+            pending = self._inflight.get(cache_key)
+            if pending is None:
+                pending = asyncio.ensure_future(self._fetch(city))
+                self._inflight[cache_key] = pending
+                pending.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+            series = await asyncio.shield(pending)
+            if isinstance(series, dict):
+                return dict(remember_failure(self.negative_cache, cache_key, series))
+            self.cache.set(cache_key, series)
+        
+        with phase("forecast-shape", "daily aggregation"):
+            return series.to_dict(days)
+    
+    async def _fetch(self, city: str) -> Any:
+        """Fetch and parse the forecast; returns a ForecastSeries or an error dict"""
+        endpoint = f"{self.BASE_URL}/forecast"
+        params = {
+            "q": city,
+            "units": "metric"
+        }
+        
+        console.print(f"\n[bold blue]📡 Making API Request:[/bold blue]")
+        console.print(f"URL: {endpoint}")
+        console.print(f"Method: GET")
+        console.print(f"City: {city}")
+        
+        client = get_client()
+        try:
+            async with self.limiter.track() as call:
+                trace = UpstreamTrace()
+                response = await send_with_key(
+                    self.keys,
+                    lambda key: upstream_scheduler.run(lambda: call.send(client.get(
+                        endpoint, params={**params, "appid": key}, timeout=10.0, extensions={"trace": trace}
+                    )))
+                )
+                call.status_code = response.status_code
+            console.print(f"\n[bold green]✅ Response Status: {response.status_code}[/bold green]")
+            
+            response.raise_for_status()
+            data = response.json()
+            trace.finish("forecast")
+            
+            with phase("forecast-parse", "columnar parsing"):
+                return ForecastSeries.from_payload(data, datetime.now().isoformat())
+            
+        except httpx.HTTPStatusError as e:
+            console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
+            return upstream_status_error(
+                f"API returned error: {e.response.status_code}", e.response.status_code
+            )
+        except httpx.RequestError as e:
+            console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
+            return connection_error(f"Failed to connect: {str(e)}", e)
+        except NoKeyAvailable as e:
+            return error_result(str(e), 503)
 
 
 class NewsAPI:
@@ -118,14 +396,44 @@ class NewsAPI:
     
     Demonstrates: GET requests with multiple parameters, pagination
     Free tier: https://newsapi.org/
+    
+    Syndicated copies of the same story are collapsed locally (see
+    api/dedup.py), so each search over-fetches once upstream and fills the
+    page with distinct stories.
+    
+    Every fetched article also goes into a local full-text index (see
+    api/news_index.py) that can answer overlapping searches without using
+    NewsAPI quota.
     """
     
     BASE_URL = "https://newsapi.org/v2"
+    MAX_PAGE_SIZE = 100  # NewsAPI's upper limit for pageSize
+    MODES = ("local", "remote", "auto")
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or settings.news_api_key
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        index: Optional[NewsIndex] = None,
+        cluster: Optional[Cluster] = None
+    ):
+        self.keys = shared_pool(
+            "News", parse_keys(api_key or settings.news_api_key),
+            settings.news_key_quota, settings.news_key_window
+        )
+        self.limiter = limiter_for("news")
+        self.cache = TTLCache(settings.cache_max_entries, settings.news_cache_ttl)
+        self.negative_cache = TTLCache(settings.negative_cache_max_entries, settings.negative_cache_ttl)
+        self.index = index or shared_index()
+        self.cluster = cluster or shared_cluster()
     
-    async def search_news(self, query: str, language: str = "en", page_size: int = 5) -> Dict[str, Any]:
+    async def search_news(
+        self,
+        query: str,
+        language: str = "en",
+        page_size: int = 5,
+        mode: Optional[str] = None,
+        forwarded: bool = False
+    ) -> Dict[str, Any]:
         """
         Search news articles by keyword
         
@@ -136,16 +444,65 @@ class NewsAPI:
             - language: article language
             - pageSize: number of results
             - sortBy: relevancy/popularity/publishedAt
+        
+        Modes:
+            - local: answer only from the local index
+            - remote: always ask NewsAPI
+            - auto: use the local index if it has a full page of fresh
+              results, otherwise ask NewsAPI
         """
-        if not self.api_key:
-            return {"error": "News API key not configured"}
+        mode = mode or settings.news_index_mode
+        if mode not in self.MODES:
+            return error_result(f"Unknown news mode '{mode}', expected one of {list(self.MODES)}", 400)
+        
+        if not forwarded:
+            routed = await self.cluster.route(
+                "news", f"news:{query.strip().lower()}:{language}",
+                {"query": query, "language": language, "page_size": page_size, "mode": mode}
+            )
+            if routed is not None:
+                return routed
+        
+        if mode != "remote":
+            with phase("news-local", "local index search"):
+                local = await self.index.search(
+                    query, language, page_size * settings.news_overfetch_factor,
+                    settings.news_index_freshness
+                )
+                distinct, removed = dedupe_and_rank(
+                    local, query, page_size, settings.news_dedup_threshold
+                )
+            if mode == "local" or len(distinct) >= page_size:
+                result = NewsResult(
+                    total_results=len(local),
+                    articles=tuple(distinct),
+                    query=query,
+                    duplicates_removed=removed
+                ).to_dict()
+                result["served_from"] = "local"
+                return result
+        
+        if not self.keys:
+            return error_result("News API key not configured", 503)
+        
+        lookup_started = time.perf_counter()
+        cache_key = (query, language, page_size)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            result = cached.to_dict()
+            result["served_from"] = "cache"
+            record("news-cache", time.perf_counter() - lookup_started, "cache hit")
+            return result
+        failure = self.negative_cache.get(cache_key)
+        if failure is not None:
+            record("news-cache", time.perf_counter() - lookup_started, "negative cache hit")
+            return dict(failure)
         
         endpoint = f"{self.BASE_URL}/everything"
         params = {
             "q": query,
-            "apiKey": self.api_key,
             "language": language,
-            "pageSize": page_size,
+            "pageSize": min(page_size * settings.news_overfetch_factor, self.MAX_PAGE_SIZE),
             "sortBy": "relevancy"
         }
         
@@ -154,38 +511,56 @@ class NewsAPI:
         console.print(f"Method: GET")
         console.print(f"Query: {query}")
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(endpoint, params=params, timeout=10.0)
-                console.print(f"\n[bold green]✅ Response Status: {response.status_code}[/bold green]")
-                
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extract article summaries
-                articles = []
-                for article in data.get("articles", [])[:page_size]:
-                    articles.append({
-                        "title": article.get("title"),
-                        "source": article.get("source", {}).get("name"),
-                        "author": article.get("author"),
-                        "description": article.get("description"),
-                        "url": article.get("url"),
-                        "published_at": article.get("publishedAt")
-                    })
-                
-                return {
-                    "total_results": data.get("totalResults"),
-                    "articles": articles,
-                    "query": query
-                }
-                
-            except httpx.HTTPStatusError as e:
-                console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
-                return {"error": f"API error: {e.response.status_code}"}
-            except httpx.RequestError as e:
-                console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
-                return {"error": f"Connection failed: {str(e)}"}
+        client = get_client()
+        try:
+            async with self.limiter.track() as call:
+                trace = UpstreamTrace()
+                response = await send_with_key(
+                    self.keys,
+                    lambda key: upstream_scheduler.run(lambda: call.send(client.get(
+                        endpoint, params={**params, "apiKey": key}, timeout=10.0, extensions={"trace": trace}
+                    )))
+                )
+                call.status_code = response.status_code
+            console.print(f"\n[bold green]✅ Response Status: {response.status_code}[/bold green]")
+            
+            response.raise_for_status()
+            data = response.json()
+            trace.finish("news")
+            
+            # Extract article summaries
+            with phase("news-shape", "response shaping"):
+                articles = [Article.from_payload(article) for article in data.get("articles", [])]
+            
+            with phase("news-ingest", "local index update"):
+                await self.index.ingest(articles, language)
+            
+            # Collapse syndicated copies and re-rank what's left
+            with phase("news-dedup", "near-duplicate removal"):
+                distinct, removed = dedupe_and_rank(
+                    articles, query, page_size, settings.news_dedup_threshold
+                )
+                result = NewsResult(
+                    total_results=data.get("totalResults"),
+                    articles=tuple(distinct),
+                    query=query,
+                    duplicates_removed=removed
+                )
+                self.cache.set(cache_key, result)
+                result = result.to_dict()
+                result["served_from"] = "remote"
+                return result
+            
+        except httpx.HTTPStatusError as e:
+            console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
+            return remember_failure(self.negative_cache, cache_key, upstream_status_error(
+                f"API error: {e.response.status_code}", e.response.status_code
+            ))
+        except httpx.RequestError as e:
+            console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
+            return connection_error(f"Connection failed: {str(e)}", e)
+        except NoKeyAvailable as e:
+            return error_result(str(e), 503)
 
 
 class ExchangeRateAPI:
@@ -198,65 +573,545 @@ class ExchangeRateAPI:
     
     BASE_URL = "https://v6.exchangerate-api.com/v6"
     
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or settings.exchange_rate_api_key
+    # ExchangeRate-API "error-type" values and the status we return for them
+    ERROR_TYPES = {
+        "unsupported-code": ("Unsupported currency code", 404),
+        "malformed-request": ("Malformed request", 400),
+        "invalid-key": ("Exchange Rate API key rejected", 502),
+        "inactive-account": ("Exchange Rate API account inactive", 502),
+        "quota-reached": ("Exchange Rate API quota reached", 503),
+    }
+    
+    # Error types that say something about the key rather than the request
+    KEY_ERROR_STATUSES = {"invalid-key": 401, "inactive-account": 401, "quota-reached": 429}
+    
+    # ISO 4217 codes; anything else never reaches the URL
+    CURRENCY_CODE = re.compile(r"[A-Za-z]{3}")
     
-    async def get_exchange_rate(self, from_currency: str = "USD", to_currency: str = "EUR") -> Dict[str, Any]:
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cluster: Optional[Cluster] = None,
+        rate_history: Optional[RateHistory] = None
+    ):
+        self.keys = shared_pool(
+            "Exchange Rate", parse_keys(api_key or settings.exchange_rate_api_key),
+            settings.exchange_key_quota, settings.exchange_key_window
+        )
+        self.limiter = limiter_for("exchange")
+        # One rate table per base currency answers every target currency
+        self.cache = TTLCache(settings.cache_max_entries, settings.exchange_cache_ttl)
+        self.negative_cache = TTLCache(settings.negative_cache_max_entries, settings.negative_cache_ttl)
+        # Recent versions of each base's table, for "changes since" queries
+        self.history: Dict[str, Deque[RateTable]] = {}
+        # Every published table, kept for trend queries (api/rate_history.py)
+        self.rate_history = rate_history or shared_history()
+        self.cluster = cluster or shared_cluster()
+    
+    async def get_exchange_rate(
+        self,
+        from_currency: str = "USD",
+        to_currency: str = "EUR",
+        forwarded: bool = False
+    ) -> Dict[str, Any]:
         """
         Get exchange rate between two currencies
         
         API Endpoint: GET /latest/{base_currency}
         Returns: Conversion rates for all currencies
         """
-        if not self.api_key:
-            return {"error": "Exchange Rate API key not configured"}
+        # One cache entry, partition and history per currency, whatever case the caller used
+        from_currency, to_currency = from_currency.upper(), to_currency.upper()
+        invalid = self._invalid_currency(from_currency, to_currency)
+        if invalid is not None:
+            return invalid
+        if not forwarded:
+            routed = await self.cluster.route(
+                "exchange", f"exchange:{from_currency}",
+                {"from_currency": from_currency, "to_currency": to_currency}
+            )
+            if routed is not None:
+                return routed
+        table = await self.get_rate_table(from_currency)
+        if isinstance(table, dict):
+            return table
+        return self._conversion(table, to_currency)
+    
+    async def get_rate_changes(self, base: str, since_version: int, forwarded: bool = False) -> Dict[str, Any]:
+        """
+        Get only the rates that changed since a version the caller already has
+        
+        Returns ``not_modified: True`` when nothing changed, or the full
+        table (``full: True``) if ``since_version`` is too old to diff against.
+        """
+        base = base.upper()
+        invalid = self._invalid_currency(base)
+        if invalid is not None:
+            return invalid
+        if not forwarded:
+            # Same partition as conversions, so the owner's history is used
+            routed = await self.cluster.route(
+                "exchange-changes", f"exchange:{base}", {"base": base, "since_version": since_version}
+            )
+            if routed is not None:
+                return routed
+        table = await self.get_rate_table(base)
+        if isinstance(table, dict):
+            return table
+        
+        result = {
+            "base": table.base,
+            "version": table.version,
+            "since_version": since_version,
+            "last_update": table.last_update,
+            "not_modified": since_version == table.version,
+            "full": False,
+            "changed": {},
+            "removed": []
+        }
+        if result["not_modified"]:
+            return result
+        
+        older = next(
+            (t for t in self.history.get(base, ()) if t.version == since_version), None
+        )
+        if older is None:
+            result["full"] = True
+            result["changed"] = table.to_dict()
+        else:
+            result["changed"], result["removed"] = table.changes_since(older)
+        return result
+    
+    async def get_rate_history(
+        self,
+        base: str,
+        targets: List[str],
+        days: float = 365.0,
+        window: int = 7,
+        series: bool = True,
+        forwarded: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Moving average, volatility and min/max of stored rates over a window
+        
+        No upstream call: answered from the tables fetched so far. The
+        current table is looked up first (usually a cache hit) so the
+        history is as fresh as the cache.
+        """
+        base, targets = base.upper(), [code.upper() for code in targets]
+        invalid = self._invalid_currency(base, *targets)
+        if invalid is not None:
+            return invalid
+        if not forwarded:
+            # The partition owner is the member that fetched, and stored, this base's tables
+            routed = await self.cluster.route(
+                "exchange-history", f"exchange:{base}",
+                {"base": base, "targets": targets, "days": days, "window": window, "series": series}
+            )
+            if routed is not None:
+                return routed
+        table = await self.get_rate_table(base)
+        if isinstance(table, dict) and table.get("status_code") in NEGATIVE_CACHE_STATUSES:
+            return table
+        
+        try:
+            with phase("exchange-history", "trend statistics"):
+                # Memory-mapped reads can touch the disk: keep them off the event loop
+                return await asyncio.to_thread(self.rate_history.query, base, targets, days, window, series)
+        except HistoryError as e:
+            return error_result(str(e), 404)
+    
+    def expires_in(self, base: str) -> Optional[float]:
+        """Seconds the cached table has left: None if absent, inf for a known failure"""
+        if self.negative_cache.get(base) is not None:
+            return float("inf")
+        return self.cache.expires_in(base)
+    
+    async def refresh(self, base: str) -> Dict[str, Any]:
+        """Fetch a base's table again ahead of its expiry (used by the prefetcher)"""
+        table = await self.get_rate_table(base, refresh=True)
+        if isinstance(table, dict):
+            return table
+        return {"base": table.base, "version": table.version}
+    
+    async def get_rate_table(self, from_currency: str, refresh: bool = False) -> Union[RateTable, Dict[str, Any]]:
+        """The current rate table for a base currency, or an error dict (``refresh`` skips the cache)"""
+        if not self.keys:
+            return error_result("Exchange Rate API key not configured", 503)
+        from_currency = from_currency.upper()
+        invalid = self._invalid_currency(from_currency)
+        if invalid is not None:
+            return invalid
         
-        endpoint = f"{self.BASE_URL}/{self.api_key}/latest/{from_currency}"
+        if not refresh:
+            hot_keys.observe("exchange", from_currency)
+            lookup_started = time.perf_counter()
+            table = self.cache.get(from_currency)
+            if table is not None:
+                record("exchange-cache", time.perf_counter() - lookup_started, "cache hit")
+                return table
+            failure = self.negative_cache.get(from_currency)
+            if failure is not None:
+                record("exchange-cache", time.perf_counter() - lookup_started, "negative cache hit")
+                return dict(failure)
         
         console.print(f"\n[bold blue]📡 Making API Request:[/bold blue]")
-        console.print(f"URL: {endpoint}")
-        console.print(f"Converting: {from_currency} → {to_currency}")
+        console.print(f"URL: {self.BASE_URL}/<key>/latest/{from_currency}")
+        console.print(f"Base currency: {from_currency}")
         
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(endpoint, timeout=10.0)
-                console.print(f"\n[bold green]✅ Response Status: {response.status_code}[/bold green]")
-                
-                response.raise_for_status()
-                data = response.json()
+        client = get_client()
+        try:
+            async with self.limiter.track() as call:
+                trace = UpstreamTrace()
+                response = await send_with_key(
+                    self.keys,
+                    lambda key: upstream_scheduler.run(lambda: call.send(
+                        # The key is part of the path
+                        client.get(
+                            f"{self.BASE_URL}/{key}/latest/{from_currency}",
+                            timeout=10.0, extensions={"trace": trace}
+                        )
+                    )),
+                    self._key_status
+                )
+                call.status_code = response.status_code
+            console.print(f"\n[bold green]✅ Response Status: {response.status_code}[/bold green]")
+            
+            response.raise_for_status()
+            data = response.json()
+            trace.finish("exchange")
+            
+            if data.get("result") == "success":
+                with phase("exchange-shape", "response shaping"):
+                    table = self._versioned(RateTable.from_rates(
+                        from_currency,
+                        data.get("conversion_rates", {}),
+                        data.get("time_last_update_utc")
+                    ))
+                    self.cache.set(from_currency, table)
+                # Appending flushes memory-mapped files (and sometimes rewrites them):
+                # do it in a worker thread, like the queries
+                try:
+                    await asyncio.to_thread(self.rate_history.append, table, data.get("time_last_update_unix"))
+                except OSError:
+                    # A full disk or read-only store loses history, not the fetched table
+                    logger.exception("Couldn't store the %s rate table in the rate history", from_currency)
+                return table
+            else:
+                return remember_failure(
+                    self.negative_cache, from_currency, self._api_error(data, from_currency)
+                )
                 
-                if data.get("result") == "success":
-                    rates = data.get("conversion_rates", {})
-                    return {
-                        "base": from_currency,
-                        "target": to_currency,
-                        "rate": rates.get(to_currency),
-                        "last_update": data.get("time_last_update_utc"),
-                        "all_rates": rates  # All available currency rates
-                    }
-                else:
-                    return {"error": "Failed to fetch exchange rates"}
-                    
-            except httpx.HTTPStatusError as e:
-                console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
-                return {"error": f"API error: {e.response.status_code}"}
-            except httpx.RequestError as e:
-                console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
-                return {"error": f"Connection failed: {str(e)}"}
+        except httpx.HTTPStatusError as e:
+            console.print(f"[bold red]❌ HTTP Error: {e.response.status_code}[/bold red]")
+            try:
+                error = self._api_error(e.response.json(), from_currency)
+            except ValueError:
+                error = None
+            if error is None or error["status_code"] == 500:
+                error = upstream_status_error(
+                    f"API error: {e.response.status_code}", e.response.status_code
+                )
+            return remember_failure(self.negative_cache, from_currency, error)
+        except httpx.RequestError as e:
+            console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
+            return connection_error(f"Connection failed: {str(e)}", e)
+        except NoKeyAvailable as e:
+            return error_result(str(e), 503)
+    
+    @classmethod
+    def _invalid_currency(cls, *codes: str) -> Optional[Dict[str, Any]]:
+        """A 400 error for the first code that isn't three letters, else None"""
+        for code in codes:
+            if not cls.CURRENCY_CODE.fullmatch(code):
+                return error_result(f"Invalid currency code '{code}': expected three letters, e.g. USD", 400)
+        return None
+    
+    def _versioned(self, table: RateTable) -> RateTable:
+        """
+        Give a freshly fetched table its version number
+        
+        An unchanged refresh keeps the previous version. Numbering starts
+        from the current Unix time, so versions handed out by an earlier
+        process are never mistaken for ones from this process.
+        """
+        history = self.history.get(table.base)
+        if history is None:
+            history = self.history[table.base] = deque(maxlen=settings.exchange_history_versions)
+            table.version = int(time.time())
+        else:
+            latest = history[-1]
+            if table.same_rates(latest):
+                latest.last_update = table.last_update
+                return latest
+            table.version = latest.version + 1
+        history.append(table)
+        return table
+    
+    def _key_status(self, response: httpx.Response) -> int:
+        """HTTP status, or 401 / 429 when the error body blames the key"""
+        if response.is_success:
+            return response.status_code
+        try:
+            error_type = response.json().get("error-type")
+        except ValueError:
+            return response.status_code
+        return self.KEY_ERROR_STATUSES.get(error_type, response.status_code)
+    
+    def _api_error(self, data: Dict[str, Any], from_currency: str) -> Dict[str, Any]:
+        """Turn an ExchangeRate-API error body into an error dict"""
+        message, status_code = self.ERROR_TYPES.get(
+            data.get("error-type"), ("Failed to fetch exchange rates", 500)
+        )
+        if data.get("error-type") == "unsupported-code":
+            message = f"{message} '{from_currency}'"
+        return error_result(message, status_code)
+    
+    @staticmethod
+    def _conversion(table: RateTable, to_currency: str) -> Dict[str, Any]:
+        """Shape a cached rate table into the response for one currency pair"""
+        if table.rate(to_currency) is None:
+            return error_result(f"Unsupported currency code '{to_currency}'", 404)
+        return {
+            "base": table.base,
+            "target": to_currency,
+            "rate": table.rate(to_currency),
+            "last_update": table.last_update,
+            "version": table.version,
+            "all_rates": table.to_dict()  # All available currency rates
+        }
+
+
+class SummaryError(Exception):
+    """The LLM call failed; ``error`` is the usual error dict"""
+    
+    def __init__(self, error: Dict[str, Any]):
+        super().__init__(error["error"])
+        self.error = error
+
+
+class TripSummaryAPI:
+    """
+    LLM Trip Summary (OpenAI-compatible chat completions)
+    
+    Demonstrates: POST requests with a JSON body, bearer-token auth,
+    streaming responses (server-sent events), content-addressed caching
+    Works with OpenAI or any server with the same /chat/completions API
+    (vLLM, Ollama, LM Studio, llama.cpp) via OPENAI_BASE_URL
+    
+    Summaries are cached under a hash of the facts sent to the model, so
+    identical research never pays for a second generation.
+    """
+    
+    DEFAULT_BASE_URL = "https://api.openai.com/v1"
+    SYSTEM_PROMPT = (
+        "You are a travel assistant. Using only the facts provided, write a short, "
+        "friendly trip briefing: current weather and what to pack, notable news for "
+        "travellers, and what the exchange rate means for the budget. Under 150 words."
+    )
+    
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None, model: Optional[str] = None):
+        self.api_key = api_key or settings.openai_api_key
+        self.base_url = (base_url or settings.openai_base_url).rstrip("/")
+        self.model = model or settings.openai_model
+        self.cache = TTLCache(settings.cache_max_entries, settings.summary_cache_ttl)
+    
+    @property
+    def configured(self) -> bool:
+        # Local OpenAI-compatible servers usually don't need a key
+        return bool(self.api_key) or self.base_url != self.DEFAULT_BASE_URL
+    
+    @staticmethod
+    def facts(research: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The parts of a research result the model needs
+        
+        Leaves out timestamps (so the same data always hashes the same)
+        and the full rate table (so the prompt stays small).
+        """
+        weather = research.get("weather") or {}
+        news = research.get("latest_news") or {}
+        currency = research.get("currency_info") or {}
+        return {
+            "destination": research.get("destination"),
+            "weather": weather.get("error") or {
+                key: weather.get(key)
+                for key in ("temperature", "feels_like", "humidity", "description", "wind_speed")
+            },
+            "news": news.get("error") or [
+                {"title": article.get("title"), "source": article.get("source")}
+                for article in news.get("articles", [])
+            ],
+            "currency": currency.get("error") or {
+                key: currency.get(key) for key in ("base", "target", "rate")
+            },
+        }
+    
+    def digest(self, research: Dict[str, Any]) -> str:
+        """Cache key: hash of the model and the facts it would be given"""
+        canonical = json.dumps([self.model, self.facts(research)], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode()).hexdigest()
+    
+    def is_cached(self, research: Dict[str, Any]) -> bool:
+        return self.cache.get(self.digest(research)) is not None
+    
+    async def stream_summary(self, research: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Yield the summary as the model generates it
+        
+        API Endpoint: POST /chat/completions (stream=true)
+        The response is a stream of "data: {json}" lines, each carrying the
+        next few tokens, ending with "data: [DONE]".
+        
+        Raises SummaryError if the call fails, also part-way through (text
+        already yielded stays yielded), or if the stream ends without
+        "[DONE]". Only a summary that reached "[DONE]" is cached.
+        """
+        if not self.configured:
+            raise SummaryError(error_result("OpenAI API key not configured", 503))
+        
+        digest = self.digest(research)
+        cached = self.cache.get(digest)
+        if cached is not None:
+            record("summary-cache", 0.0, "cache hit")
+            yield cached
+            return
+        
+        endpoint = f"{self.base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        body = {
+            "model": self.model,
+            "stream": True,
+            "max_tokens": settings.summary_max_tokens,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(self.facts(research))},
+            ],
+        }
+        
+        console.print(f"\n[bold blue]📡 Making API Request:[/bold blue]")
+        console.print(f"URL: {endpoint}")
+        console.print(f"Method: POST (streaming)")
+        
+        parts = []
+        done = False
+        client = get_client()
+        try:
+            with phase("summary-generate", "LLM generation"):
+                async with client.stream(
+                    "POST", endpoint, json=body, headers=headers, timeout=settings.summary_timeout
+                ) as response:
+                    console.print(f"\n[bold green]✅ Response Status: {response.status_code}[/bold green]")
+                    if response.is_error:
+                        await response.aread()
+                        raise SummaryError(upstream_status_error(
+                            f"LLM API error: {response.status_code}", response.status_code
+                        ))
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            done = True
+                            break
+                        try:
+                            choices = json.loads(data).get("choices") or [{}]
+                        except ValueError:
+                            continue
+                        token = (choices[0].get("delta") or {}).get("content")
+                        if token:
+                            parts.append(token)
+                            yield token
+        except httpx.RequestError as e:
+            console.print(f"[bold red]❌ Request Error: {str(e)}[/bold red]")
+            raise SummaryError(connection_error(f"Connection failed: {str(e)}", e))
+        
+        if not done:
+            # A cut-off stream is only part of a summary: never cache it as the whole
+            raise SummaryError(error_result("LLM stream ended before [DONE]", 502))
+        if parts:
+            self.cache.set(digest, "".join(parts))
+    
+    async def summarize(self, research: Dict[str, Any]) -> Dict[str, Any]:
+        """The whole summary at once, or an error dict"""
+        cached = self.is_cached(research)
+        try:
+            text = "".join([token async for token in self.stream_summary(research)])
+        except SummaryError as e:
+            return e.error
+        return {"text": text, "model": self.model, "cached": cached}
 
 
 class DemoAPIOrchestrator:
     """
     Orchestrates multiple API calls to demonstrate how APIs work together
     in a real-world research assistant
+    
+    The calls are described as a ResearchPlan (see api/engine.py), so new
+    sources can be added with ``orchestrator.plan.add(...)`` and will run
+    in parallel with everything they don't depend on.
     """
     
-    def __init__(self):
-        self.weather_api = WeatherAPI()
-        self.news_api = NewsAPI()
-        self.exchange_api = ExchangeRateAPI()
+    # Response field for each source; other sources use their own name
+    RESULT_KEYS = {"weather": "weather", "news": "latest_news", "exchange": "currency_info"}
+    
+    # Safety net above the 10 second HTTP timeout in each client
+    SOURCE_TIMEOUT = 15.0
     
-    async def research_travel_destination(self, city: str, budget_currency: str = "USD") -> Dict[str, Any]:
+    # Sources that only run when asked for
+    OPTIONAL_SOURCES = ("summary",)
+    
+    # Names callers use in ``include`` / ``fields``, mapped to plan sources
+    INCLUDE_NAMES = {"weather": "weather", "news": "news", "currency": "exchange"}
+    FIELD_ALIASES = {"news": "latest_news", "currency": "currency_info", "exchange": "currency_info"}
+    
+    # Top-level sections of a research result, and the ``include`` name behind each
+    SECTIONS = ("destination", "weather", "latest_news", "currency_info", "summary", "research_timestamp")
+    SECTION_SOURCES = {"weather": "weather", "latest_news": "news", "currency_info": "currency"}
+    
+    def __init__(
+        self,
+        weather_api: Optional[WeatherAPI] = None,
+        news_api: Optional[NewsAPI] = None,
+        exchange_api: Optional[ExchangeRateAPI] = None
+    ):
+        # Pass the app's clients in to share their caches (and pre-warming)
+        self.weather_api = weather_api or WeatherAPI()
+        self.news_api = news_api or NewsAPI()
+        self.exchange_api = exchange_api or ExchangeRateAPI()
+        self.summary_api = TripSummaryAPI()
+        
+        self.plan = ResearchPlan()
+        self.plan.add(
+            "weather",
+            lambda inputs: self.weather_api.get_weather(inputs["city"]),
+            timeout=self.SOURCE_TIMEOUT
+        )
+        self.plan.add(
+            "news",
+            lambda inputs: self.news_api.search_news(f"{inputs['city']} travel OR tourism", page_size=3),
+            timeout=self.SOURCE_TIMEOUT
+        )
+        self.plan.add(
+            "exchange",
+            lambda inputs: self.exchange_api.get_exchange_rate("USD", inputs["budget_currency"]),
+            timeout=self.SOURCE_TIMEOUT
+        )
+        # Waits for the other three and summarizes whatever they returned
+        self.plan.add(
+            "summary",
+            lambda inputs: self.summary_api.summarize(self._assemble(inputs["city"], inputs)),
+            depends_on=["weather", "news", "exchange"],
+            timeout=settings.summary_timeout
+        )
+    
+    async def research_travel_destination(
+        self,
+        city: str,
+        budget_currency: str = "USD",
+        summary: bool = False,
+        include: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
         """
         Combine multiple APIs to research a travel destination
         
@@ -264,31 +1119,111 @@ class DemoAPIOrchestrator:
         1. Parallel API calls (making multiple requests at once)
         2. Combining data from different sources
         3. Error handling across services
+        
+        With ``summary=True`` an LLM trip briefing is added once the other
+        sources are in. ``include`` limits the sources called (by
+        INCLUDE_NAMES); a summary still needs all three.
         """
         console.print(Panel.fit(
             f"[bold cyan]🔍 Researching Travel Destination: {city}[/bold cyan]",
             border_style="cyan"
         ))
         
-        # Make all API calls in parallel for efficiency
-        weather_task = self.weather_api.get_weather(city)
-        news_task = self.news_api.search_news(f"{city} travel OR tourism", page_size=3)
-        exchange_task = self.exchange_api.get_exchange_rate("USD", budget_currency)
+        # Run the sources; each starts as soon as its inputs are ready
+        targets = self._targets(include, summary)
+        results = await self.plan.run({"city": city, "budget_currency": budget_currency}, targets)
         
-        # Wait for all to complete
-        weather_data, news_data, exchange_data = await asyncio.gather(
-            weather_task, news_task, exchange_task
-        )
+        result = self._assemble(city, {name: results[name] for name in targets})
+        result["research_timestamp"] = datetime.now().isoformat()
+        return result
+    
+    def _targets(self, include: Optional[List[str]], summary: bool) -> List[str]:
+        """Plan sources a research call asks for (dependencies not included)"""
+        if include is None:
+            targets = [name for name in self.plan.sources if name not in self.OPTIONAL_SOURCES]
+        else:
+            targets = [self.INCLUDE_NAMES[name] for name in include]
+        if summary:
+            targets.append("summary")
+        return targets
+    
+    def sources_called(self, include: Optional[List[str]] = None, summary: bool = False) -> List[str]:
+        """
+        The ``include`` names a research call actually fetches
         
-        # Combine the results
-        result = {
-            "destination": city,
-            "weather": weather_data,
-            "latest_news": news_data,
-            "currency_info": exchange_data,
-            "research_timestamp": datetime.now().isoformat()
-        }
+        Follows dependencies, so a summary brings in all three sources even
+        when ``include`` names fewer.
+        """
+        ran = self.plan.closure(self._targets(include, summary))
+        return [name for name, source in self.INCLUDE_NAMES.items() if source in ran]
+    
+    @classmethod
+    def sources_for_fields(cls, fields: List[str]) -> List[str]:
+        """The ``include`` names needed to answer ``fields``"""
+        needed = []
+        for field in fields:
+            top = field.strip().split(".", 1)[0]
+            name = cls.SECTION_SOURCES.get(cls.FIELD_ALIASES.get(top, top))
+            if name is not None and name not in needed:
+                needed.append(name)
+        return needed
+    
+    @classmethod
+    def field_tree(cls, fields: List[str]) -> Dict[str, Any]:
+        """
+        Dotted ``fields`` as a nested dict of wanted keys (None: all of it)
         
+        ``weather.temperature`` asks for one value, ``currency_info`` for a
+        whole section, and ``latest_news.articles.title`` for one key of
+        every article. ``news`` and ``currency`` work as section names too.
+        Raises ValueError for an unknown section.
+        """
+        tree: Dict[str, Any] = {}
+        for field in fields:
+            parts = [part for part in field.strip().split(".") if part]
+            if not parts:
+                continue
+            parts[0] = cls.FIELD_ALIASES.get(parts[0], parts[0])
+            if parts[0] not in cls.SECTIONS:
+                raise ValueError(f"Unknown field '{field}', expected one of {list(cls.SECTIONS)}")
+            node = tree
+            for depth, part in enumerate(parts):
+                if part in node and node[part] is None:
+                    break  # a shorter path already takes all of it
+                if depth == len(parts) - 1:
+                    node[part] = None
+                else:
+                    node = node.setdefault(part, {})
+        return tree
+    
+    @classmethod
+    def project(cls, result: Dict[str, Any], fields: List[str]) -> Dict[str, Any]:
+        """
+        Keep only the ``fields`` (see ``field_tree``) of a research result
+        
+        A section holding an error is kept whole, so failures stay visible.
+        """
+        def select(value: Any, wanted: Optional[Dict[str, Any]]) -> Any:
+            if wanted is None:
+                return value
+            if isinstance(value, list):
+                return [select(item, wanted) for item in value]
+            if isinstance(value, dict):
+                if "error" in value:
+                    return value
+                return {key: select(value[key], sub) for key, sub in wanted.items() if key in value}
+            return value
+        
+        projected = select(result, cls.field_tree(fields))
+        projected["destination"] = result["destination"]
+        return projected
+    
+    def _assemble(self, city: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Combine source results into the response shape"""
+        result = {"destination": city}
+        for name in self.plan.sources:
+            if name in results:
+                result[self.RESULT_KEYS.get(name, name)] = results[name]
         return result
 
 
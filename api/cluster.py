@@ -0,0 +1,240 @@
+"""
+Partitioned Cache Cluster
+=========================
+
+When the API runs as several processes (workers on one machine, or several
+machines), each one would otherwise cache the same hot cities separately:
+N members hold N copies, and every member pays its own upstream call per
+city. This module gives every cache key a single **owner** so that the
+members' caches add up instead of overlapping.
+
+- **Consistent hashing**: each member is placed on a hash ring at many
+  points ("virtual nodes"); a key belongs to the first member clockwise
+  from the key's hash. When a member joins or leaves, only the keys in
+  its slices of the ring move - about 1/N of them - instead of
+  everything being reshuffled.
+- **Forwarding**: a member that doesn't own a key asks the owner for the
+  result over one HTTP hop (or a Unix socket between workers on the same
+  machine). The owner serves it from its cache, fetching upstream only on
+  a miss.
+- **Failure handling**: if the owner can't be reached, the lookup is
+  served locally and the owner is skipped for a cooldown, during which its
+  keys fall to the next member on the ring.
+
+Members are identified by the URL peers use to reach them, e.g.
+``http://10.0.0.5:8000`` or ``unix:///run/research/worker-1.sock``.
+Clustering is off unless ``CLUSTER_SELF`` and ``CLUSTER_MEMBERS`` are set.
+It also needs a shared ``CLUSTER_TOKEN``: the lookup route serves any
+upstream source, so without a token clustering stays off and every member
+serves its requests locally.
+"""
+
+import bisect
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from api.config import settings
+from api.scheduler import PRIORITY_HEADER, current_priority
+from api.timing import phase
+from api.transport import get_client
+
+# Header carrying the shared secret on member-to-member calls
+TOKEN_HEADER = "X-Cluster-Token"
+LOOKUP_PATH = "/cluster/lookup"
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(value: str) -> int:
+    """64-bit position on the ring (stable across processes, unlike hash())"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, members: Iterable[str] = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        self.members: List[str] = []
+        for member in members:
+            self.add(member)
+
+    def add(self, member: str) -> None:
+        if member in self.members:
+            return
+        self.members.append(member)
+        for replica in range(self.vnodes):
+            point = _hash(f"{member}#{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, member)
+
+    def remove(self, member: str) -> None:
+        if member not in self.members:
+            return
+        self.members.remove(member)
+        kept = [(p, m) for p, m in zip(self._points, self._owners) if m != member]
+        self._points = [p for p, _ in kept]
+        self._owners = [m for _, m in kept]
+
+    def owners(self, key: str) -> Iterable[str]:
+        """Distinct members in ring order starting from the key's owner"""
+        if not self._points:
+            return
+        start = bisect.bisect(self._points, _hash(key))
+        seen = set()
+        for offset in range(len(self._points)):
+            member = self._owners[(start + offset) % len(self._points)]
+            if member not in seen:
+                seen.add(member)
+                yield member
+                if len(seen) == len(self.members):
+                    return
+
+    def owner(self, key: str) -> Optional[str]:
+        return next(iter(self.owners(key)), None)
+
+
+class Cluster:
+    """This process's view of the cluster, and forwarding to key owners"""
+
+    def __init__(
+        self,
+        self_member: Optional[str],
+        members: Iterable[str] = (),
+        vnodes: int = 128,
+        token: Optional[str] = None,
+        timeout: float = 12.0,
+        connect_timeout: float = 1.0,
+        down_cooldown: float = 30.0
+    ):
+        self.self_member = self_member
+        self.ring = HashRing(members, vnodes)
+        if self_member:
+            self.ring.add(self_member)
+        self.token = token
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.down_cooldown = down_cooldown
+        self._down: Dict[str, float] = {}
+        self._socket_clients: Dict[str, httpx.AsyncClient] = {}
+        self.stats = {"local": 0, "forwarded": 0, "forward_failed": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.self_member and self.token) and len(self.ring.members) > 1
+
+    def join(self, member: str) -> None:
+        self.ring.add(member)
+        self._down.pop(member, None)
+
+    def leave(self, member: str) -> None:
+        if member == self.self_member:
+            raise ValueError("A member can't remove itself from its own ring")
+        self.ring.remove(member)
+        self._down.pop(member, None)
+
+    def owns(self, key: str) -> bool:
+        """Whether this member serves ``key`` (always true with clustering off)"""
+        return not self.enabled or self.owner(key) == self.self_member
+
+    def owner(self, key: str) -> Optional[str]:
+        """The first member for ``key`` that isn't cooling down after a failure"""
+        now = time.monotonic()
+        for member in self.ring.owners(key):
+            if self._down.get(member, 0.0) <= now:
+                return member
+        return self.self_member
+
+    def _request(self, member: str) -> Tuple[httpx.AsyncClient, str]:
+        """Client and URL for a lookup on ``member``"""
+        if member.startswith("unix://"):
+            path = member[len("unix://"):]
+            client = self._socket_clients.get(path)
+            if client is None or client.is_closed:
+                client = self._socket_clients[path] = httpx.AsyncClient(
+                    transport=httpx.AsyncHTTPTransport(uds=path)
+                )
+            return client, f"http://cluster{LOOKUP_PATH}"
+        return get_client(), f"{member.rstrip('/')}{LOOKUP_PATH}"
+
+    async def route(self, source: str, key: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Forward a ``source`` lookup to the owner of the partition ``key``
+
+        Returns the owner's result, or None when this member should serve
+        the lookup itself (it owns the key, clustering is off, or the owner
+        couldn't be reached).
+        """
+        if not self.enabled:
+            return None
+        member = self.owner(key)
+        if member == self.self_member:
+            self.stats["local"] += 1
+            return None
+
+        client, url = self._request(member)
+        # The owner schedules the upstream call at the caller's priority, not as interactive
+        headers = {PRIORITY_HEADER: current_priority()}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        try:
+            with phase(f"{source}-forward", f"lookup on {member}"):
+                response = await client.post(
+                    url, json={"source": source, "params": params},
+                    headers=headers, timeout=self.timeout
+                )
+                response.raise_for_status()
+                result = response.json()
+        except (httpx.HTTPError, ValueError):
+            # Serve it ourselves and give the owner's keys to the next member for a while
+            self._down[member] = time.monotonic() + self.down_cooldown
+            self.stats["forward_failed"] += 1
+            return None
+        self.stats["forwarded"] += 1
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "self": self.self_member,
+            "members": list(self.ring.members),
+            "down": {m: round(until - now, 1) for m, until in self._down.items() if until > now},
+            "lookups": dict(self.stats),
+        }
+
+    async def close(self) -> None:
+        for client in self._socket_clients.values():
+            await client.aclose()
+        self._socket_clients.clear()
+
+
+def _parse_members(value: Optional[str]) -> List[str]:
+    return [member.strip() for member in (value or "").split(",") if member.strip()]
+
+
+_shared: Optional[Cluster] = None
+
+
+def shared_cluster() -> Cluster:
+    """The process-wide cluster view, created on first use from settings"""
+    global _shared
+    if _shared is None:
+        _shared = Cluster(
+            settings.cluster_self,
+            _parse_members(settings.cluster_members),
+            vnodes=settings.cluster_vnodes,
+            token=settings.cluster_token,
+            timeout=settings.cluster_forward_timeout,
+            connect_timeout=settings.cluster_connect_timeout,
+            down_cooldown=settings.cluster_down_cooldown
+        )
+        if settings.cluster_self and settings.cluster_members and not settings.cluster_token:
+            logger.warning("CLUSTER_SELF and CLUSTER_MEMBERS are set but CLUSTER_TOKEN is not; clustering is off")
+    return _shared
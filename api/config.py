@@ -2,6 +2,7 @@
 Configuration module for the Agentic AI Demo
 Loads environment variables and provides application settings
 """
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -9,21 +10,145 @@ from typing import Optional
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
     
-    # API Keys
+    # API Keys (comma-separate several keys to rotate between them)
     openweather_api_key: Optional[str] = None
     news_api_key: Optional[str] = None
     exchange_rate_api_key: Optional[str] = None
     openai_api_key: Optional[str] = None
     
+    # Provider quota per key: calls allowed per window (seconds); unset or empty = unlimited.
+    # Counted per worker process: with N workers, set 1/N of the plan's quota.
+    # Free tiers: OpenWeatherMap 60/60s, NewsAPI 100/day, ExchangeRate-API 1500/month
+    openweather_key_quota: Optional[int] = None
+    openweather_key_window: float = 60.0
+    news_key_quota: Optional[int] = None
+    news_key_window: float = 86400.0
+    exchange_key_quota: Optional[int] = None
+    exchange_key_window: float = 2592000.0
+    
+    # LLM trip summaries: any OpenAI-compatible endpoint (local servers need no key)
+    openai_base_url: str = "https://api.openai.com/v1"
+    openai_model: str = "gpt-4o-mini"
+    summary_max_tokens: int = 300
+    summary_timeout: float = 60.0
+    summary_cache_ttl: float = 86400.0
+    
     # Server settings
     host: str = "0.0.0.0"
     port: int = 8000
     debug: bool = True
-    
+
+    # Response cache settings (seconds / entries per client)
+    weather_cache_ttl: float = 600.0
+    forecast_cache_ttl: float = 1800.0
+    news_cache_ttl: float = 900.0
+    exchange_cache_ttl: float = 3600.0
+    exchange_history_versions: int = 24  # rate table versions kept for delta queries
+    rate_history_path: Optional[str] = None  # directory for the rate history store; None = in memory
+    cache_max_entries: int = 1024
+
+    # Weather by coordinates: geohash length of the cache cell, 1-12 (5 ≈ 5 km, 6 ≈ 1 km, 7 ≈ 150 m)
+    weather_geohash_precision: int = Field(6, ge=1, le=12)
+
+    # Negative cache for deterministic upstream failures (unknown city, bad currency)
+    negative_cache_ttl: float = 120.0
+    negative_cache_max_entries: int = 4096
+
+    # News de-duplication: upstream over-fetch multiplier, MinHash similarity cutoff
+    news_overfetch_factor: int = 4
+    news_dedup_threshold: float = 0.6
+
+    # Local news index: SQLite path, retention / freshness (seconds), default mode
+    news_index_path: str = ":memory:"
+    news_index_retention: float = 604800.0
+    news_index_freshness: float = 21600.0
+    news_index_mode: str = "auto"  # local | remote | auto
+
+    # Upstream transport: shared connection pool, HTTP/2, DNS cache, startup pre-warming
+    upstream_http2: bool = True
+    upstream_max_connections: int = 100
+    upstream_max_keepalive: int = 20
+    upstream_keepalive_expiry: float = 60.0
+    dns_cache_ttl: float = 300.0
+    prewarm_on_startup: bool = True
+    prewarm_timeout: float = 5.0
+
+    # Upstream slots shared by all providers, scheduled by priority class:
+    # slots kept for interactive calls, class weights, aging limit (seconds)
+    upstream_slots: int = 32
+    upstream_reserved_interactive: int = 4
+    priority_weight_interactive: int = 8
+    priority_weight_batch: int = 3
+    priority_weight_background: int = 1
+    priority_max_wait: float = 5.0
+
+    # Adaptive per-provider concurrency (AIMD): starting/min/max limit, latency
+    # tolerance over baseline before cutting, multiplicative cut factor
+    adaptive_limit_initial: int = 10
+    adaptive_limit_min: int = 1
+    adaptive_limit_max: int = 64
+    adaptive_latency_tolerance: float = 2.0
+    adaptive_backoff: float = 0.7
+
+    # Cache partitioning across members: this member's URL, all members (comma-separated),
+    # ring virtual nodes, forwarded lookup timeouts, failed-owner cooldown, peer secret
+    cluster_self: Optional[str] = None
+    cluster_members: Optional[str] = None
+    cluster_vnodes: int = 128
+    cluster_forward_timeout: float = 12.0
+    cluster_connect_timeout: float = 1.0
+    cluster_down_cooldown: float = 30.0
+    cluster_token: Optional[str] = None
+
+    # Per-request console logging in the API clients (synchronous, so it blocks the event loop)
+    request_logging: bool = True
+
+    # Event loop monitoring: heartbeat interval, slow callback threshold (seconds), offenders kept
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.25
+    slow_callback_threshold: float = 0.1
+    loop_offenders_kept: int = 50
+
+    # Heavy hitters: count-min sketch width/depth, top keys kept per kind, counter halving
+    # interval; pre-warming: cycle (seconds), upstream calls per minute, minimum estimated
+    # requests before a key is refreshed
+    hotkeys_sketch_width: int = 2048
+    hotkeys_sketch_depth: int = 4
+    hotkeys_top_k: int = 200
+    hotkeys_decay_interval: float = 600.0
+    prefetch_enabled: bool = True
+    prefetch_interval: float = 30.0
+    prefetch_budget_per_minute: float = 20.0
+    prefetch_min_count: int = 5
+
+    # API consumers: keys as "key:name[:weight]" (comma-separated), whether a key is required,
+    # requests per second and burst per unit of weight, consumers tracked for usage
+    consumer_keys: Optional[str] = None
+    consumer_require_key: bool = False
+    consumer_rate: float = 10.0
+    consumer_burst: float = 40.0
+    consumers_tracked: int = 10000
+
+    # Admin endpoints and on-demand profiling are disabled unless a token is set
+    admin_token: Optional[str] = None
+
+    # Profiling: continuous sampler rate (Hz), ring buffer shape, per-request rate
+    profiling_enabled: bool = False
+    profiling_sample_hz: float = 10.0
+    profiling_window_seconds: float = 60.0
+    profiling_windows: int = 60
+    profile_request_hz: float = 1000.0
+
     class Config:
         env_file = ".env"
         case_sensitive = False
 
+    @field_validator("openweather_key_quota", "news_key_quota", "exchange_key_quota", mode="before")
+    @classmethod
+    def _empty_quota_is_unlimited(cls, value):
+        # OPENWEATHER_KEY_QUOTA= (empty) means no quota rather than a parse error
+        return None if isinstance(value, str) and not value.strip() else value
+
 
 # Global settings instance
 settings = Settings()
@@ -0,0 +1,216 @@
+"""
+API Consumers
+=============
+
+The API is open to anyone, so without limits one noisy caller can spend
+all of our upstream quota and concurrency. Every request is therefore
+attributed to a **consumer**:
+
+- ``X-API-Key``: a key listed in ``CONSUMER_KEYS`` identifies a named
+  consumer, optionally with a weight:
+
+      CONSUMER_KEYS=k3y-one:mobile-app:4,k3y-two:partner-site
+
+  An unknown key is rejected with 401.
+- ``X-Client-ID``: a self-declared ID, for clients without a key.
+- Otherwise the client's IP address.
+
+Set ``CONSUMER_REQUIRE_KEY=true`` to turn away anonymous callers entirely.
+
+Each consumer has a **token bucket**: ``consumer_rate`` requests per
+second times its weight, with bursts up to ``consumer_burst`` times its
+weight. Requests over the limit get a 429 with ``Retry-After``.
+
+Upstream calls are then shared fairly *between* consumers by the scheduler
+(api/scheduler.py), in proportion to their weights. A consumer that sends a
+burst queues behind its own requests, not in front of everyone else's.
+
+Usage per consumer (requests, rejections, upstream calls and queueing time)
+is served from ``/admin/consumers``. Only the ``consumers_tracked`` most
+recently seen consumers are kept. Idle ones are forgotten first, so a flood
+of one-off IP addresses can't grow memory without bound.
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from api.config import settings
+
+API_KEY_HEADER = "X-API-Key"
+CLIENT_ID_HEADER = "X-Client-ID"
+
+# Longest self-declared client ID kept (longer ones are truncated)
+MAX_CLIENT_ID = 64
+
+
+class ConsumerRejected(Exception):
+    """The request can't be attributed to an allowed consumer"""
+
+
+def parse_consumer_keys(value: Optional[str]) -> Dict[str, Tuple[str, int]]:
+    """``key:name[:weight],...`` -> {key: (name, weight)}"""
+    consumers: Dict[str, Tuple[str, int]] = {}
+    if not value:
+        return consumers
+    for entry in value.split(","):
+        parts = [part.strip() for part in entry.split(":")]
+        if not parts[0]:
+            continue
+        if len(parts) < 2 or not parts[1]:
+            raise ValueError(f"Consumer key entry '{entry.strip()}' needs a name: key:name[:weight]")
+        weight = int(parts[2]) if len(parts) > 2 and parts[2] else 1
+        if weight < 1:
+            raise ValueError(f"Consumer '{parts[1]}' needs a weight of at least 1")
+        consumers[parts[0]] = (parts[1], weight)
+    return consumers
+
+
+class Consumer:
+    """Rate limit bucket and usage counters for one consumer"""
+
+    __slots__ = (
+        "name", "weight", "authenticated", "tokens", "updated", "first_seen",
+        "requests", "rejected", "upstream_calls", "upstream_queued", "upstream_wait",
+    )
+
+    def __init__(self, name: str, weight: int, authenticated: bool, burst: float):
+        now = time.monotonic()
+        self.name = name
+        self.weight = weight
+        self.authenticated = authenticated
+        self.tokens = burst
+        self.updated = now
+        self.first_seen = time.time()
+        self.requests = 0
+        self.rejected = 0
+        self.upstream_calls = 0
+        self.upstream_queued = 0
+        self.upstream_wait = 0.0
+
+    def record_upstream(self, waited: float) -> None:
+        """Called by the scheduler for every upstream slot this consumer takes"""
+        self.upstream_calls += 1
+        if waited:
+            self.upstream_queued += 1
+            self.upstream_wait += waited
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "consumer": self.name,
+            "weight": self.weight,
+            "authenticated": self.authenticated,
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "upstream_calls": self.upstream_calls,
+            "upstream_queued": self.upstream_queued,
+            "upstream_mean_wait_ms": round(self.upstream_wait * 1000 / max(self.upstream_queued, 1), 2),
+            "tokens_left": round(self.tokens, 1),
+            "first_seen": round(self.first_seen, 3),
+        }
+
+
+_current: ContextVar[Optional[Consumer]] = ContextVar("consumer", default=None)
+
+
+def current_consumer() -> Optional[Consumer]:
+    """Consumer the running request belongs to (None for internal work)"""
+    return _current.get()
+
+
+@contextmanager
+def acting_for(consumer: Consumer) -> Iterator[None]:
+    """Attribute everything done inside the block to ``consumer``"""
+    token = _current.set(consumer)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class ConsumerRegistry:
+    """Identifies consumers, applies their rate limits and keeps their usage"""
+
+    def __init__(
+        self,
+        keys: Dict[str, Tuple[str, int]],
+        rate: float,
+        burst: float,
+        require_key: bool = False,
+        tracked: int = 10000
+    ):
+        self.keys = keys
+        self.rate = rate
+        self.burst = burst
+        self.require_key = require_key
+        self.tracked = tracked
+        self._consumers: "OrderedDict[str, Consumer]" = OrderedDict()
+        self.forgotten = 0
+
+    def identify(self, api_key: Optional[str], client_id: Optional[str], address: Optional[str]) -> Consumer:
+        """The consumer a request belongs to; raises ConsumerRejected"""
+        if api_key:
+            known = self.keys.get(api_key)
+            if known is None:
+                raise ConsumerRejected("Unknown API key")
+            name, weight = known
+            return self._get(name, weight, True)
+        if self.require_key:
+            raise ConsumerRejected(f"An API key is required ({API_KEY_HEADER} header)")
+        if client_id:
+            return self._get(f"client:{client_id[:MAX_CLIENT_ID]}", 1, False)
+        return self._get(f"ip:{address or 'unknown'}", 1, False)
+
+    def _get(self, name: str, weight: int, authenticated: bool) -> Consumer:
+        consumer = self._consumers.get(name)
+        if consumer is None:
+            consumer = self._consumers[name] = Consumer(name, weight, authenticated, self.burst * weight)
+            while len(self._consumers) > self.tracked:
+                self._consumers.popitem(last=False)
+                self.forgotten += 1
+        else:
+            self._consumers.move_to_end(name)
+        return consumer
+
+    def admit(self, consumer: Consumer) -> Optional[float]:
+        """
+        Take one request token
+
+        Returns None if the request may proceed, otherwise the seconds until
+        a token is available (for Retry-After).
+        """
+        now = time.monotonic()
+        rate = self.rate * consumer.weight
+        consumer.tokens = min(self.burst * consumer.weight, consumer.tokens + (now - consumer.updated) * rate)
+        consumer.updated = now
+        if consumer.tokens >= 1:
+            consumer.tokens -= 1
+            consumer.requests += 1
+            return None
+        consumer.rejected += 1
+        return (1 - consumer.tokens) / rate
+
+    def usage(self, top: Optional[int] = None) -> Dict[str, Any]:
+        """Per-consumer usage, busiest first"""
+        ranked: List[Consumer] = sorted(
+            self._consumers.values(), key=lambda consumer: consumer.requests, reverse=True
+        )
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "require_key": self.require_key,
+            "tracked": len(self._consumers),
+            "forgotten": self.forgotten,
+            "consumers": [consumer.to_dict() for consumer in ranked[:top]],
+        }
+
+
+consumers = ConsumerRegistry(
+    parse_consumer_keys(settings.consumer_keys),
+    rate=settings.consumer_rate,
+    burst=settings.consumer_burst,
+    require_key=settings.consumer_require_key,
+    tracked=settings.consumers_tracked
+)
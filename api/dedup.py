@@ -0,0 +1,166 @@
+"""
+News De-duplication and Re-ranking
+==================================
+
+NewsAPI often returns the same story syndicated by several outlets, which
+wastes the few slots in a page of results. This module:
+
+1. **Fingerprints** each article with MinHash over word 3-gram shingles of
+   its title and description. Two articles whose signatures agree on most
+   positions have nearly the same text.
+2. **Collapses near-duplicates**, keeping the first copy of each story.
+3. **Re-ranks** the distinct stories locally with a vectorized BM25-style
+   relevance score against the query, plus a small boost for stories many
+   outlets carried and for recent ones.
+
+The client over-fetches once upstream and fills the page from the distinct
+stories, so callers don't have to page through repeats.
+"""
+
+import re
+import zlib
+from datetime import datetime
+from typing import List, Sequence, Set, Tuple
+
+import numpy as np
+
+from api.models import Article
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+
+# Fixed seeds keep fingerprints identical across processes and restarts
+_rng = np.random.default_rng(20240601)
+_PERM_A = _rng.integers(1, int(_MERSENNE_PRIME), NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, int(_MERSENNE_PRIME), NUM_PERMUTATIONS, dtype=np.uint64)
+
+_WORD = re.compile(r"[^\W_]+")  # letters and digits in any script
+# NewsAPI query syntax that shouldn't count as search terms
+_QUERY_OPERATORS = {"and", "or", "not"}
+
+# Relevance weights
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_WEIGHT = 2.0
+SYNDICATION_WEIGHT = 0.5
+RECENCY_WEIGHT = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+def _article_text(article: Article) -> str:
+    return f"{article.title or ''} {article.description or ''}"
+
+
+def shingles(tokens: Sequence[str]) -> Set[int]:
+    """32-bit hashes of every run of SHINGLE_SIZE consecutive words"""
+    if len(tokens) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(tokens).encode())}
+    return {
+        zlib.crc32(" ".join(tokens[i:i + SHINGLE_SIZE]).encode())
+        for i in range(len(tokens) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash_signatures(token_lists: Sequence[Sequence[str]]) -> np.ndarray:
+    """One MinHash signature row (NUM_PERMUTATIONS values) per document"""
+    signatures = np.empty((len(token_lists), NUM_PERMUTATIONS), dtype=np.uint64)
+    for row, tokens in enumerate(token_lists):
+        hashes = np.fromiter(shingles(tokens), dtype=np.uint64)
+        # Universal hashing (a*x + b) mod p for all permutations at once
+        permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+        signatures[row] = permuted.min(axis=1)
+    return signatures
+
+
+def _cluster(signatures: np.ndarray, threshold: float) -> np.ndarray:
+    """
+    Assign each document to the first earlier document it nearly duplicates
+
+    Returns an array where ``labels[i]`` is the index of the representative
+    of document i's cluster (``labels[i] == i`` for representatives).
+    """
+    # Estimated Jaccard similarity for every pair in one broadcast
+    similarity = (signatures[:, None, :] == signatures[None, :, :]).mean(axis=2)
+    labels = np.arange(len(signatures))
+    for i in range(1, len(signatures)):
+        earlier = np.flatnonzero(similarity[i, :i] >= threshold)
+        if earlier.size:
+            labels[i] = labels[earlier[0]]
+    return labels
+
+
+def _relevance(query_terms: List[str], titles: List[List[str]], bodies: List[List[str]]) -> np.ndarray:
+    """BM25 over title (weighted) + description, vectorized across articles"""
+    if not query_terms:
+        return np.zeros(len(titles))
+
+    term_index = {term: column for column, term in enumerate(query_terms)}
+    freqs = np.zeros((len(titles), len(query_terms)))
+    lengths = np.zeros(len(titles))
+    for row, (title, body) in enumerate(zip(titles, bodies)):
+        lengths[row] = TITLE_WEIGHT * len(title) + len(body)
+        for token in title:
+            column = term_index.get(token)
+            if column is not None:
+                freqs[row, column] += TITLE_WEIGHT
+        for token in body:
+            column = term_index.get(token)
+            if column is not None:
+                freqs[row, column] += 1.0
+
+    documents = len(titles)
+    containing = np.count_nonzero(freqs, axis=0)
+    idf = np.log1p((documents - containing + 0.5) / (containing + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / max(lengths.mean(), 1.0))
+    return ((freqs * (BM25_K1 + 1)) / (freqs + norm[:, None]) * idf).sum(axis=1)
+
+
+def _recency(articles: Sequence[Article]) -> np.ndarray:
+    """0..1 where 1 is the newest article in the set"""
+    stamps = np.zeros(len(articles))
+    for row, article in enumerate(articles):
+        try:
+            stamps[row] = datetime.fromisoformat((article.published_at or "").replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            stamps[row] = np.nan
+    if np.all(np.isnan(stamps)):
+        return np.zeros(len(articles))
+    stamps = np.nan_to_num(stamps, nan=np.nanmin(stamps))
+    spread = stamps.max() - stamps.min()
+    return (stamps - stamps.min()) / spread if spread else np.ones(len(articles))
+
+
+def dedupe_and_rank(
+    articles: Sequence[Article],
+    query: str,
+    limit: int,
+    threshold: float = 0.6
+) -> Tuple[List[Article], int]:
+    """
+    Collapse near-duplicate articles and return the best ``limit`` stories
+
+    Returns (articles, number of duplicates removed).
+    """
+    if not articles:
+        return [], 0
+
+    titles = [tokenize(article.title or "") for article in articles]
+    bodies = [tokenize(article.description or "") for article in articles]
+    labels = _cluster(minhash_signatures([t + b for t, b in zip(titles, bodies)]), threshold)
+
+    representatives = np.flatnonzero(labels == np.arange(len(articles)))
+    cluster_sizes = np.bincount(labels, minlength=len(articles))[representatives]
+
+    query_terms = list(dict.fromkeys(t for t in tokenize(query) if t not in _QUERY_OPERATORS))
+    kept = [articles[i] for i in representatives]
+    score = (
+        _relevance(query_terms, [titles[i] for i in representatives], [bodies[i] for i in representatives])
+        + SYNDICATION_WEIGHT * np.log1p(cluster_sizes - 1)
+        + RECENCY_WEIGHT * _recency(kept)
+    )
+    order = np.argsort(-score, kind="stable")[:limit]
+    return [kept[i] for i in order], len(articles) - len(kept)
@@ -0,0 +1,167 @@
+"""
+Research Plan Engine
+====================
+
+Runs a set of data sources as a dependency graph (DAG).
+
+Each source is registered with the names of the sources whose results it
+needs. When a plan runs, every source starts as soon as its own inputs are
+ready, so independent sources (weather, news, exchange rates) all run at the
+same time, while a source like an LLM summary waits only for the data it
+actually uses. Adding a new independent source therefore adds no latency.
+
+Every source also gets its own timeout and failure policy:
+- ``record``: store ``{"error": ...}`` as its result; dependents still run
+- ``skip``:   store the error and skip every source that depends on it
+- ``fail``:   abort the whole plan with ``PlanError``
+
+A source counts as failed if it raises, times out, or returns an error dict
+(the convention all API clients in this project use).
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from api.timing import record
+
+ON_ERROR_POLICIES = ("record", "skip", "fail")
+
+Fetch = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class PlanError(Exception):
+    """Raised when a plan is invalid or a ``fail``-policy source fails"""
+
+
+@dataclass
+class Source:
+    """One node of a research plan"""
+
+    name: str
+    fetch: Fetch
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+    on_error: str = "record"
+
+
+def _is_error(value: Any) -> bool:
+    return isinstance(value, dict) and "error" in value
+
+
+class ResearchPlan:
+    """
+    A registry of sources and the engine that runs them
+
+    Example:
+        plan = ResearchPlan()
+        plan.add("weather", lambda inputs: weather_api.get_weather(inputs["city"]))
+        plan.add("summary", summarize, depends_on=["weather"], timeout=20)
+        results = await plan.run({"city": "Lisbon"})
+
+    ``fetch`` receives one dict holding the plan parameters plus the results
+    of the sources it depends on, keyed by source name.
+    """
+
+    def __init__(self):
+        self.sources: Dict[str, Source] = {}
+
+    def add(
+        self,
+        name: str,
+        fetch: Fetch,
+        depends_on: Iterable[str] = (),
+        timeout: Optional[float] = None,
+        on_error: str = "record"
+    ) -> Source:
+        """Register a source; its dependencies must already be registered"""
+        if name in self.sources:
+            raise PlanError(f"Source '{name}' is already registered")
+        if on_error not in ON_ERROR_POLICIES:
+            raise PlanError(f"Unknown on_error policy '{on_error}'")
+        depends_on = tuple(depends_on)
+        missing = [dep for dep in depends_on if dep not in self.sources]
+        if missing:
+            # Requiring dependencies up front also rules out cycles
+            raise PlanError(f"Source '{name}' depends on unknown sources: {missing}")
+
+        source = Source(name, fetch, depends_on, timeout, on_error)
+        self.sources[name] = source
+        return source
+
+    def closure(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        """Names needed to produce ``targets`` (all sources if None), in dependency order"""
+        if targets is None:
+            return list(self.sources)
+
+        needed: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            if name not in self.sources:
+                raise PlanError(f"Unknown source '{name}'")
+            needed.add(name)
+            stack.extend(self.sources[name].depends_on)
+        # Registration order is already a valid topological order
+        return [name for name in self.sources if name in needed]
+
+    async def run(
+        self,
+        params: Dict[str, Any],
+        targets: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the sources needed for ``targets`` and return ``{name: result}``
+
+        Raises PlanError if a ``fail``-policy source fails; the remaining
+        sources are cancelled.
+        """
+        tasks: Dict[str, "asyncio.Task[Any]"] = {}
+        for name in self.closure(targets):
+            source = self.sources[name]
+            deps = [tasks[dep] for dep in source.depends_on]
+            tasks[name] = asyncio.ensure_future(self._run_source(source, params, deps))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except PlanError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        return dict(zip(tasks, results))
+
+    async def _run_source(
+        self,
+        source: Source,
+        params: Dict[str, Any],
+        deps: List["asyncio.Task[Any]"]
+    ) -> Any:
+        scheduled = time.perf_counter()
+        dep_results = await asyncio.gather(*deps) if deps else []
+        record(
+            f"{source.name}-queue",
+            time.perf_counter() - scheduled,
+            "waiting for inputs" if deps else "event loop queueing"
+        )
+
+        inputs = dict(params)
+        for dep_name, dep_result in zip(source.depends_on, dep_results):
+            if _is_error(dep_result) and (
+                self.sources[dep_name].on_error == "skip" or dep_result.get("skipped")
+            ):
+                return {"error": f"Skipped: dependency '{dep_name}' failed", "skipped": True}
+            inputs[dep_name] = dep_result
+
+        try:
+            result = await asyncio.wait_for(source.fetch(inputs), source.timeout)
+        except asyncio.TimeoutError:
+            result = {"error": f"{source.name} timed out after {source.timeout}s"}
+        except Exception as e:
+            result = {"error": f"{source.name} failed: {str(e)}"}
+
+        if _is_error(result) and source.on_error == "fail":
+            raise PlanError(result["error"])
+        return result
@@ -0,0 +1,170 @@
+"""
+Forecast Series and Daily Aggregates
+====================================
+
+OpenWeatherMap's 5-day forecast arrives as 40 three-hourly JSON objects.
+We store it column by column in compact NumPy arrays (one array per
+measurement instead of 40 nested dicts) and compute the per-day statistics
+with vectorized operations:
+
+- min / max / mean temperature
+- total precipitation (rain + snow, mm)
+- highest chance of precipitation
+- a "best day" score and ranking for outdoor plans
+
+Because the rows are in time order, each day is a contiguous slice, so
+``np.minimum.reduceat`` and friends aggregate every day in one call.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+
+# "Best day" scoring: distance from a comfortable temperature, rain and wind
+# all count against a day. Lower penalty = better day.
+COMFORT_TEMP_C = 22.0
+PENALTY_PER_DEGREE = 1.0
+PENALTY_PER_MM = 2.0
+PENALTY_PER_POP = 10.0   # per unit probability of precipitation (0-1)
+PENALTY_PER_MS_WIND = 0.5
+
+
+class ForecastSeries:
+    """Three-hourly forecast for one city, stored as numeric columns"""
+
+    __slots__ = (
+        "city", "country", "utc_offset", "fetched_at",
+        "time", "temp", "temp_min", "temp_max", "humidity", "wind", "pop", "precip",
+    )
+
+    def __init__(
+        self,
+        city: Optional[str],
+        country: Optional[str],
+        utc_offset: int,
+        fetched_at: str,
+        columns: Dict[str, np.ndarray]
+    ):
+        self.city = city
+        self.country = country
+        self.utc_offset = utc_offset
+        self.fetched_at = fetched_at
+        self.time = columns["time"]
+        self.temp = columns["temp"]
+        self.temp_min = columns["temp_min"]
+        self.temp_max = columns["temp_max"]
+        self.humidity = columns["humidity"]
+        self.wind = columns["wind"]
+        self.pop = columns["pop"]
+        self.precip = columns["precip"]
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any], fetched_at: str) -> "ForecastSeries":
+        """Build columns from an OpenWeatherMap /forecast payload"""
+        entries = data.get("list", [])
+        count = len(entries)
+        columns = {
+            "time": np.empty(count, dtype=np.int64),
+            "temp": np.empty(count, dtype=np.float32),
+            "temp_min": np.empty(count, dtype=np.float32),
+            "temp_max": np.empty(count, dtype=np.float32),
+            "humidity": np.empty(count, dtype=np.float32),
+            "wind": np.empty(count, dtype=np.float32),
+            "pop": np.empty(count, dtype=np.float32),
+            "precip": np.empty(count, dtype=np.float32),
+        }
+        for row, entry in enumerate(entries):
+            main = entry.get("main", {})
+            columns["time"][row] = entry.get("dt", 0)
+            columns["temp"][row] = main.get("temp", np.nan)
+            columns["temp_min"][row] = main.get("temp_min", main.get("temp", np.nan))
+            columns["temp_max"][row] = main.get("temp_max", main.get("temp", np.nan))
+            columns["humidity"][row] = main.get("humidity", np.nan)
+            columns["wind"][row] = entry.get("wind", {}).get("speed", 0.0)
+            columns["pop"][row] = entry.get("pop", 0.0)
+            columns["precip"][row] = (
+                entry.get("rain", {}).get("3h", 0.0) + entry.get("snow", {}).get("3h", 0.0)
+            )
+
+        # Rows must be in time order for the day slices to be contiguous
+        order = np.argsort(columns["time"], kind="stable")
+        if count and not np.array_equal(order, np.arange(count)):
+            columns = {name: column[order] for name, column in columns.items()}
+
+        city = data.get("city", {})
+        return cls(
+            city=city.get("name"),
+            country=city.get("country"),
+            utc_offset=int(city.get("timezone", 0)),
+            fetched_at=fetched_at,
+            columns=columns,
+        )
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def daily(self, days: Optional[int] = None) -> Dict[str, Any]:
+        """Per-day aggregates (in the city's local time) and best-day ranking"""
+        if len(self) == 0:
+            return {"days": [], "best_days": []}
+
+        day_number = (self.time + self.utc_offset) // SECONDS_PER_DAY
+        # Index of the first row of each day
+        starts = np.flatnonzero(np.r_[True, day_number[1:] != day_number[:-1]])
+        end = len(self)
+        if days is not None and days < len(starts):
+            end = starts[days]
+            starts = starts[:days]
+
+        counts = np.diff(np.r_[starts, end])
+        temp_min = np.minimum.reduceat(self.temp_min[:end], starts)
+        temp_max = np.maximum.reduceat(self.temp_max[:end], starts)
+        temp_mean = np.add.reduceat(self.temp[:end], starts) / counts
+        humidity_mean = np.add.reduceat(self.humidity[:end], starts) / counts
+        precipitation = np.add.reduceat(self.precip[:end], starts)
+        max_pop = np.maximum.reduceat(self.pop[:end], starts)
+        max_wind = np.maximum.reduceat(self.wind[:end], starts)
+
+        penalty = (
+            PENALTY_PER_DEGREE * np.abs(temp_mean - COMFORT_TEMP_C)
+            + PENALTY_PER_MM * precipitation
+            + PENALTY_PER_POP * max_pop
+            + PENALTY_PER_MS_WIND * max_wind
+        )
+        order = np.argsort(penalty, kind="stable")
+        rank = np.empty_like(order)
+        rank[order] = np.arange(1, len(order) + 1)
+
+        dates = [
+            datetime.fromtimestamp(int(day) * SECONDS_PER_DAY, tz=timezone.utc).date().isoformat()
+            for day in day_number[starts]
+        ]
+        summaries: List[Dict[str, Any]] = []
+        for i, date in enumerate(dates):
+            summaries.append({
+                "date": date,
+                "samples": int(counts[i]),
+                "temp_min": round(float(temp_min[i]), 1),
+                "temp_max": round(float(temp_max[i]), 1),
+                "temp_mean": round(float(temp_mean[i]), 1),
+                "humidity_mean": round(float(humidity_mean[i]), 1),
+                "precipitation_mm": round(float(precipitation[i]), 2),
+                "max_precipitation_chance": round(float(max_pop[i]), 2),
+                "max_wind_speed": round(float(max_wind[i]), 1),
+                "score": round(float(-penalty[i]), 2),
+                "rank": int(rank[i]),
+            })
+
+        return {"days": summaries, "best_days": [dates[i] for i in order]}
+
+    def to_dict(self, days: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "city": self.city,
+            "country": self.country,
+            "utc_offset": self.utc_offset,
+            "fetched_at": self.fetched_at,
+            **self.daily(days),
+        }
@@ -0,0 +1,120 @@
+"""
+Geohash Cells
+=============
+
+A geohash encodes a latitude/longitude as a short base-32 string, by
+repeatedly halving the longitude and latitude ranges and writing down which
+half the point fell in. Every extra character divides the cell 32 ways, so
+the length of the hash - its *precision* - sets the cell size:
+
+    precision   cell size (at the equator)
+    4           39 km x 20 km
+    5           4.9 km x 4.9 km
+    6           1.2 km x 0.61 km
+    7           153 m x 153 m
+
+Points in the same cell share a hash, which makes the hash a natural cache
+key for anything that doesn't change within a cell. For weather, nearby
+users then share one upstream lookup instead of each making their own. The
+lookup itself uses the cell's centre, so everyone in the cell gets the same
+answer whether or not it came from the cache.
+"""
+
+import math
+from typing import Dict, NamedTuple, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(_BASE32)}
+
+# Meters per degree of latitude (and of longitude at the equator)
+METERS_PER_DEGREE = 111320.0
+
+MAX_PRECISION = 12
+
+
+class Cell(NamedTuple):
+    """A geohash cell: its hash, centre and half-size in degrees"""
+
+    geohash: str
+    lat: float
+    lon: float
+    lat_error: float
+    lon_error: float
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "geohash": self.geohash,
+            "precision": len(self.geohash),
+            "center": {"lat": round(self.lat, 6), "lon": round(self.lon, 6)},
+            "size_m": {
+                "north_south": round(2 * self.lat_error * METERS_PER_DEGREE),
+                "east_west": round(2 * self.lon_error * METERS_PER_DEGREE * math.cos(math.radians(self.lat))),
+            },
+        }
+
+
+def encode(lat: float, lon: float, precision: int) -> str:
+    """Geohash of a point with ``precision`` characters"""
+    if not 1 <= precision <= MAX_PRECISION:
+        raise ValueError(f"Geohash precision must be between 1 and {MAX_PRECISION}")
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # bits alternate, starting with longitude
+    while len(chars) < precision:
+        target, span = (lon, lon_range) if even else (lat, lat_range)
+        middle = (span[0] + span[1]) / 2
+        if target >= middle:
+            value = (value << 1) | 1
+            span[0] = middle
+        else:
+            value <<= 1
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def bounds(geohash: str) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+    """((lat_min, lat_max), (lon_min, lon_max)) of a geohash cell"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        index = _DECODE.get(char)
+        if index is None:
+            raise ValueError(f"Invalid geohash character '{char}'")
+        for shift in range(4, -1, -1):
+            span = lon_range if even else lat_range
+            middle = (span[0] + span[1]) / 2
+            if (index >> shift) & 1:
+                span[0] = middle
+            else:
+                span[1] = middle
+            even = not even
+    return (lat_range[0], lat_range[1]), (lon_range[0], lon_range[1])
+
+
+def center(geohash: str) -> Tuple[float, float]:
+    """(lat, lon) of a cell's centre, rounded as used for upstream lookups"""
+    (lat_min, lat_max), (lon_min, lon_max) = bounds(geohash)
+    return round((lat_min + lat_max) / 2, 6), round((lon_min + lon_max) / 2, 6)
+
+
+def cell(lat: float, lon: float, precision: int) -> Cell:
+    """The cell a point falls in"""
+    geohash = encode(lat, lon, precision)
+    (lat_min, lat_max), (lon_min, lon_max) = bounds(geohash)
+    return Cell(
+        geohash,
+        (lat_min + lat_max) / 2,
+        (lon_min + lon_max) / 2,
+        (lat_max - lat_min) / 2,
+        (lon_max - lon_min) / 2,
+    )
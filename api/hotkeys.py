@@ -0,0 +1,305 @@
+"""
+Heavy Hitters and Pre-warming
+=============================
+
+Traffic is heavily skewed: a few hundred cities make up most requests.
+When one of their cache entries expires, the next caller pays for the
+upstream round trip. This module finds the hot keys cheaply and refreshes
+them *before* they expire.
+
+**Tracking** - every cache lookup is counted in a **count-min sketch**: a
+small ``depth x width`` matrix of counters. A key increments one counter
+per row (the column is chosen by a per-row hash). Its count is estimated as
+the minimum of those counters. Collisions can only inflate a count, never
+hide one, and memory stays fixed (``width * depth * 4`` bytes) however many
+distinct keys arrive. Conservative updates (only the counters at the
+minimum are raised) keep the over-estimate small. Next to the sketch, a
+**top-K** table per kind holds the keys with the highest estimates. Every
+``decay_interval`` all counts are halved, so the ranking follows what is
+hot now, not what was hot last week.
+
+**Pre-warming** - every ``interval`` seconds the :class:`Prefetcher` walks
+the top keys, hottest first. Entries that are missing or will expire
+within the lead time are refreshed, up to a budget of upstream calls per
+minute. The budget accrues per cycle and unspent fractions of a call carry
+over, so 20 calls a minute at a 2 second interval refreshes one key every
+few cycles instead of none. Refreshes run at ``background`` priority
+(api/scheduler.py), so they never delay a caller, and in a cluster only the
+member that owns a key refreshes it.
+
+A prefetch is a **hit** if a request used the entry before it was
+refreshed again. The hit rate, current top keys and budget use are served
+from ``/admin/hotkeys``, for tuning the budget and thresholds.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from api.config import settings
+from api.scheduler import priority
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    """Approximate counts for an unbounded key space in fixed memory"""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        # One hash call gives an independent 64-bit value per row
+        digest = hashlib.blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint64) % np.uint64(self.width)
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Count ``key`` and return its new estimate (conservative update)"""
+        columns = self._columns(key)
+        current = self.table[self._rows, columns]
+        estimate = int(current.min()) + count
+        self.table[self._rows, columns] = np.maximum(current, estimate)
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return int(self.table[self._rows, self._columns(key)].min())
+
+    def decay(self) -> None:
+        """Halve every counter"""
+        self.table >>= 1
+
+
+class TopK:
+    """The ``k`` keys with the highest counts seen so far"""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        # Min-heap of (count, key); entries whose count is out of date are skipped
+        self._heap: List[Tuple[int, str]] = []
+
+    def _push(self, key: str, count: int) -> None:
+        self.counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        if len(self._heap) > 4 * self.k + 64:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._heap = [(count, key) for key, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def _minimum(self) -> Tuple[int, str]:
+        while self.counts.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0]
+
+    def offer(self, key: str, count: int) -> None:
+        if key in self.counts or len(self.counts) < self.k:
+            self._push(key, count)
+            return
+        lowest, lowest_key = self._minimum()
+        if count > lowest:
+            del self.counts[lowest_key]
+            heapq.heappop(self._heap)
+            self._push(key, count)
+
+    def decay(self) -> None:
+        self.counts = {key: count >> 1 for key, count in self.counts.items()}
+        self._rebuild()
+
+    def top(self, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class HotKeys:
+    """Request counts per (kind, key): a shared sketch plus a top-K table per kind"""
+
+    def __init__(self, width: int = 2048, depth: int = 4, k: int = 200, decay_interval: float = 600.0):
+        self.sketch = CountMinSketch(width, depth)
+        self.k = k
+        self.decay_interval = decay_interval
+        self._top: Dict[str, TopK] = {}
+        self._next_decay = time.monotonic() + decay_interval
+        self.observed = 0
+        # Prefetched entries no request has used yet
+        self._unused_prefetches: Dict[Tuple[str, str], float] = {}
+        self.prefetch_stats = {"prefetched": 0, "used": 0}
+
+    def observe(self, kind: str, key: str) -> None:
+        """Count one lookup of ``key``"""
+        now = time.monotonic()
+        if now >= self._next_decay:
+            self._next_decay = now + self.decay_interval
+            self.sketch.decay()
+            for top in self._top.values():
+                top.decay()
+        self.observed += 1
+        top = self._top.get(kind)
+        if top is None:
+            top = self._top[kind] = TopK(self.k)
+        top.offer(key, self.sketch.add(f"{kind}:{key}"))
+        if self._unused_prefetches.pop((kind, key), None) is not None:
+            self.prefetch_stats["used"] += 1
+
+    def top(self, kind: str, n: Optional[int] = None) -> List[Tuple[str, int]]:
+        top = self._top.get(kind)
+        return top.top(n) if top is not None else []
+
+    def prefetched(self, kind: str, key: str) -> None:
+        """Record a refresh done ahead of demand"""
+        now = time.monotonic()
+        self.prefetch_stats["prefetched"] += 1
+        self._unused_prefetches[(kind, key)] = now
+        if len(self._unused_prefetches) > 4 * self.k:
+            # Keys that dropped out of the top never get used; forget old ones
+            self._unused_prefetches = {
+                entry: at for entry, at in self._unused_prefetches.items() if now - at < self.decay_interval
+            }
+
+    def status(self, n: Optional[int] = None) -> Dict[str, Any]:
+        prefetched = self.prefetch_stats["prefetched"]
+        return {
+            "sketch": {
+                "width": self.sketch.width,
+                "depth": self.sketch.depth,
+                "bytes": self.sketch.table.nbytes,
+                "observed": self.observed,
+                "decay_interval_seconds": self.decay_interval,
+            },
+            "prefetch": {
+                **self.prefetch_stats,
+                "hit_rate": round(self.prefetch_stats["used"] / prefetched, 3) if prefetched else None,
+            },
+            "top": {
+                kind: [{"key": key, "estimated_requests": count} for key, count in self.top(kind, n)]
+                for kind in self._top
+            },
+        }
+
+
+class Refresher(NamedTuple):
+    """How the prefetcher checks and refreshes one kind of cache entry"""
+
+    expires_in: Callable[[str], Optional[float]]  # seconds left; None if not cached; inf to skip
+    refresh: Callable[[str], Awaitable[Dict[str, Any]]]  # error dict on failure
+    owned: Callable[[str], bool]  # whether this member should refresh the key
+
+
+class Prefetcher:
+    """Refreshes the hottest keys before they expire, within an upstream budget"""
+
+    def __init__(
+        self,
+        hot_keys: HotKeys,
+        refreshers: Dict[str, Refresher],
+        interval: float = 30.0,
+        budget_per_minute: float = 20.0,
+        min_count: int = 5,
+        lead: Optional[float] = None
+    ):
+        self.hot_keys = hot_keys
+        self.refreshers = refreshers
+        self.interval = interval
+        self.budget_per_minute = budget_per_minute
+        self.min_count = min_count
+        # Refresh anything that would expire before the cycle after next
+        self.lead = lead if lead is not None else 2 * interval
+        self.stats = {"cycles": 0, "refreshed": 0, "errors": 0, "over_budget": 0}
+        # Refreshes this cycle may spend; only the fraction of a call left unspent carries over
+        self._allowance = 0.0
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @property
+    def budget_per_cycle(self) -> float:
+        return max(self.budget_per_minute, 0.0) * self.interval / 60
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            if self.budget_per_cycle <= 0:
+                logger.warning("Prefetch budget is 0 calls per minute: hot keys will not be pre-warmed")
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def candidates(self) -> List[Tuple[str, str]]:
+        """(kind, key) pairs due for a refresh, hottest first, within this cycle's budget"""
+        ranked: List[Tuple[int, str, str]] = []
+        for kind, refresher in self.refreshers.items():
+            for key, count in self.hot_keys.top(kind):
+                if count < self.min_count:
+                    break
+                remaining = refresher.expires_in(key)
+                if (remaining is None or remaining <= self.lead) and refresher.owned(key):
+                    ranked.append((count, kind, key))
+        ranked.sort(reverse=True)
+
+        # Rounded so that three cycles of 2/3 add up to a whole call
+        self._allowance = round(self._allowance % 1 + self.budget_per_cycle, 9)
+        budget = min(int(self._allowance), len(ranked))
+        self._allowance -= budget
+        self.stats["over_budget"] += len(ranked) - budget
+        return [(kind, key) for _, kind, key in ranked[:budget]]
+
+    async def run_once(self) -> int:
+        """One pre-warming cycle; returns the number of entries refreshed"""
+        self.stats["cycles"] += 1
+        due = self.candidates()
+        if not due:
+            return 0
+        with priority("background"):
+            results = await asyncio.gather(
+                *(self.refreshers[kind].refresh(key) for kind, key in due), return_exceptions=True
+            )
+        refreshed = 0
+        for (kind, key), result in zip(due, results):
+            if isinstance(result, BaseException) or (isinstance(result, dict) and "error" in result):
+                self.stats["errors"] += 1
+                continue
+            refreshed += 1
+            self.hot_keys.prefetched(kind, key)
+        self.stats["refreshed"] += refreshed
+        return refreshed
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_seconds": self.interval,
+            "budget_per_minute": self.budget_per_minute,
+            "budget_per_cycle": round(self.budget_per_cycle, 3),
+            "min_count": self.min_count,
+            "lead_seconds": self.lead,
+            **self.stats,
+        }
+
+
+# Lookups counted by the API clients
+hot_keys = HotKeys(
+    width=settings.hotkeys_sketch_width,
+    depth=settings.hotkeys_sketch_depth,
+    k=settings.hotkeys_top_k,
+    decay_interval=settings.hotkeys_decay_interval
+)
@@ -0,0 +1,229 @@
+"""
+API Key Pools
+=============
+
+Lets each provider use several API keys instead of one, so total throughput
+grows with the number of keys we license.
+
+Configure a pool by putting comma-separated keys in the usual setting:
+
+    NEWS_API_KEY=key_one,key_two,key_three
+
+Each request takes the key with the most quota left. The pool tracks, per
+key (and per worker process - pools are not shared between workers):
+- how many calls it has made in the provider's quota window (and the
+  remaining count the provider reports in rate limit headers, when it does)
+- 429 Too Many Requests: the key is set aside until ``Retry-After`` or the
+  end of its quota window
+- 401/403: the key was rejected and is set aside for an hour
+
+Keys that are set aside come back automatically when their time is up.
+Pools are shared per provider, so every client using the same keys sees
+the same quota state.
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import httpx
+
+# How long a key the provider rejected (401/403) is kept out of rotation
+REJECTED_COOLDOWN = 3600.0
+
+# Response headers providers use to report quota
+_REMAINING_HEADERS = ("x-ratelimit-remaining", "x-ratelimit-requests-remaining", "ratelimit-remaining")
+
+
+class NoKeyAvailable(Exception):
+    """Every key in a pool is exhausted or rejected"""
+
+
+def parse_keys(value: Optional[str]) -> List[str]:
+    """Split a comma-separated key setting into a list of keys"""
+    if not value:
+        return []
+    return list(dict.fromkeys(key.strip() for key in value.split(",") if key.strip()))
+
+
+def mask(key: str) -> str:
+    """Safe-to-display form of a key"""
+    return f"…{key[-4:]}" if len(key) > 4 else "…"
+
+
+class KeyState:
+    """Quota bookkeeping for one key"""
+
+    __slots__ = ("key", "window_started", "used", "reported_remaining", "set_aside_until", "reason", "last_used")
+
+    def __init__(self, key: str):
+        self.key = key
+        self.window_started = 0.0
+        self.used = 0
+        self.reported_remaining: Optional[int] = None
+        self.set_aside_until = 0.0
+        self.reason: Optional[str] = None
+        self.last_used = 0.0
+
+
+class KeyPool:
+    """
+    Rotates requests across a provider's keys
+
+    ``quota`` calls are allowed per key per ``window`` seconds (None means
+    unknown: only provider feedback can exhaust the key).
+    """
+
+    def __init__(self, provider: str, keys: Sequence[str], quota: Optional[int] = None, window: float = 60.0):
+        self.provider = provider
+        self.quota = quota
+        self.window = window
+        self._states = [KeyState(key) for key in keys]
+        self._by_key = {state.key: state for state in self._states}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _refresh(self, state: KeyState, now: float) -> None:
+        if now - state.window_started >= self.window:
+            state.window_started = now
+            state.used = 0
+            state.reported_remaining = None
+        if state.set_aside_until and now >= state.set_aside_until:
+            state.set_aside_until = 0.0
+            state.reason = None
+
+    def _remaining(self, state: KeyState) -> float:
+        local = float("inf") if self.quota is None else self.quota - state.used
+        if state.reported_remaining is not None:
+            return min(local, state.reported_remaining)
+        return local
+
+    def acquire(self, exclude: Collection[str] = ()) -> Optional[str]:
+        """The usable key with the most quota left, or None if all are set aside"""
+        now = time.monotonic()
+        best: Optional[KeyState] = None
+        best_rank: Tuple[float, float] = (0.0, 0.0)
+        for state in self._states:
+            self._refresh(state, now)
+            if state.set_aside_until or state.key in exclude:
+                continue
+            remaining = self._remaining(state)
+            if remaining <= 0:
+                # Exhausted for this window; back when the window resets
+                state.set_aside_until = state.window_started + self.window
+                state.reason = "quota exhausted"
+                continue
+            # Most quota left first, then least recently used
+            rank = (remaining, -state.last_used)
+            if best is None or rank > best_rank:
+                best, best_rank = state, rank
+
+        if best is None:
+            return None
+        best.used += 1
+        best.last_used = now
+        return best.key
+
+    def report(self, key: str, status_code: int, headers: Mapping[str, str]) -> None:
+        """Record the provider's response to a call made with ``key``"""
+        state = self._by_key.get(key)
+        if state is None:
+            return
+        now = time.monotonic()
+
+        for name in _REMAINING_HEADERS:
+            value = headers.get(name)
+            if value is not None and value.isdigit():
+                state.reported_remaining = int(value)
+                break
+
+        if status_code in (401, 403):
+            state.set_aside_until = now + REJECTED_COOLDOWN
+            state.reason = f"rejected ({status_code})"
+        elif status_code == 429:
+            retry_after = headers.get("retry-after", "")
+            if retry_after.isdigit():
+                state.set_aside_until = now + int(retry_after)
+            else:
+                state.set_aside_until = max(state.window_started + self.window, now + 1.0)
+            state.reason = "rate limited (429)"
+
+    def available_in(self) -> float:
+        """Seconds until some key is usable again (0 if one is usable now)"""
+        now = time.monotonic()
+        waits = []
+        for state in self._states:
+            self._refresh(state, now)
+            waits.append(max(state.set_aside_until - now, 0.0))
+        return min(waits, default=0.0)
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Per-key quota state for the admin endpoint (keys are masked)"""
+        now = time.monotonic()
+        report = []
+        for state in self._states:
+            self._refresh(state, now)
+            remaining = self._remaining(state)
+            report.append({
+                "key": mask(state.key),
+                "used_in_window": state.used,
+                "remaining": None if remaining == float("inf") else remaining,
+                "available": not state.set_aside_until,
+                "set_aside_for_seconds": round(max(state.set_aside_until - now, 0.0), 1),
+                "reason": state.reason,
+            })
+        return report
+
+
+# Statuses that mean "this key can't be used right now"
+KEY_FAILURE_STATUSES = (401, 403, 429)
+
+
+async def send_with_key(
+    pool: KeyPool,
+    send: Callable[[str], Awaitable[httpx.Response]],
+    key_status: Callable[[httpx.Response], int] = lambda response: response.status_code
+) -> httpx.Response:
+    """
+    Send a request with the best key in the pool
+
+    If the provider rejects or rate limits the key, the request is repeated
+    with the next usable key that hasn't been tried yet; the last response
+    is returned once no keys are left. ``key_status`` lets providers that
+    report key problems in the body map them to 401 / 429. Raises
+    NoKeyAvailable if no key is usable.
+    """
+    key = pool.acquire()
+    if key is None:
+        raise NoKeyAvailable(
+            f"All {pool.provider} API keys are exhausted or rejected; "
+            f"retry in {pool.available_in():.0f}s"
+        )
+    tried = set()
+    while True:
+        tried.add(key)
+        response = await send(key)
+        status_code = key_status(response)
+        pool.report(key, status_code, response.headers)
+        if status_code not in KEY_FAILURE_STATUSES:
+            return response
+        # Each key once: a "Retry-After: 0" must not loop on the same key
+        key = pool.acquire(exclude=tried)
+        if key is None:
+            return response
+
+
+_pools: Dict[Tuple[str, Tuple[str, ...]], KeyPool] = {}
+
+
+def shared_pool(provider: str, keys: Sequence[str], quota: Optional[int], window: float) -> KeyPool:
+    """The process-wide pool for this provider and set of keys"""
+    pool_key = (provider, tuple(keys))
+    pool = _pools.get(pool_key)
+    if pool is None:
+        pool = _pools[pool_key] = KeyPool(provider, keys, quota, window)
+    return pool
+
+
+def all_pools() -> List[KeyPool]:
+    return list(_pools.values())
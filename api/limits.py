@@ -0,0 +1,224 @@
+"""
+Adaptive Upstream Concurrency Limits
+====================================
+
+How many calls should we have in flight to one provider at once? Too few
+wastes throughput on a good day; too many piles requests onto a provider
+that is already struggling, making every one of them slower (and often
+triggering its rate limiter). The right number changes over time, so
+instead of a fixed cap each provider gets a limit that adapts:
+
+- **Baseline**: the provider's latency when it isn't loaded, tracked as a
+  floor that drops immediately to faster samples and creeps up slowly
+  (so a provider that becomes permanently slower gets a new baseline).
+- **Additive increase**: while the smoothed latency stays within
+  ``tolerance`` x baseline and we are actually using the limit, it grows by
+  about one call per round trip.
+- **Multiplicative decrease**: when latency climbs past that, or calls time
+  out / fail with 5xx / 429, the limit is cut by ``backoff`` - at most once
+  per round trip, so one burst of failures isn't punished repeatedly.
+
+This is the AIMD scheme TCP congestion control uses. Callers over the
+limit wait in line. Latency samples cover only the HTTP exchange (see
+``CallOutcome.send``): time spent waiting for a scheduler slot, for this
+limiter or between key rotation attempts is our own queueing, and must not
+look like a slow provider. Each limiter keeps a history of its limit, served with
+the current state from ``/admin/limits``.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from api.config import settings
+from api.timing import record
+
+# Responses that mean "back off", as opposed to a caller error like 404
+OVERLOAD_STATUSES = (429, 500, 502, 503, 504)
+
+SMOOTHING = 0.2        # EWMA weight of each new latency sample
+BASELINE_CREEP = 0.01  # how fast the baseline follows slower samples
+
+
+class CallOutcome:
+    """Filled in by the caller so the limiter can classify and time the call"""
+
+    __slots__ = ("status_code", "latency")
+
+    def __init__(self):
+        self.status_code: Optional[int] = None
+        self.latency: Optional[float] = None
+
+    async def send(self, exchange: Awaitable[httpx.Response]) -> httpx.Response:
+        """Await one HTTP exchange and keep its duration as the latency sample (the last one wins)"""
+        started = time.perf_counter()
+        try:
+            return await exchange
+        finally:
+            self.latency = time.perf_counter() - started
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for one upstream provider"""
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = 10,
+        minimum: int = 1,
+        maximum: int = 100,
+        tolerance: float = 2.0,
+        backoff: float = 0.7,
+        history: int = 300
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.smoothed: Optional[float] = None
+        self._last_decrease = 0.0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self.history: Deque[Tuple[float, int, str]] = deque(maxlen=history)
+        self.stats = {"calls": 0, "overloads": 0, "decreases": 0, "queued": 0}
+
+    @property
+    def current(self) -> int:
+        return max(self.minimum, int(self.limit))
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.current:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.current and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.stats["queued"] += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _set_limit(self, limit: float, reason: str) -> None:
+        before = self.current
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        if self.current != before:
+            self.history.append((time.time(), self.current, reason))
+        self._wake()
+
+    def on_sample(self, latency: float, overloaded: bool, in_flight: int) -> None:
+        """Update the limit from one finished call"""
+        self.stats["calls"] += 1
+        now = time.monotonic()
+        self.smoothed = latency if self.smoothed is None else self.smoothed + SMOOTHING * (latency - self.smoothed)
+        if not overloaded:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += BASELINE_CREEP * (latency - self.baseline)
+
+        slow = self.smoothed > self.tolerance * self.baseline if self.baseline else False
+        if overloaded or slow:
+            self.stats["overloads"] += overloaded
+            # At most one cut per round trip
+            if now - self._last_decrease >= self.smoothed:
+                self._last_decrease = now
+                self.stats["decreases"] += 1
+                self._set_limit(self.limit * self.backoff, "errors" if overloaded else "latency")
+        elif in_flight >= self.current - 1:
+            # Only grow a limit we're actually hitting: ~+1 per round trip
+            self._set_limit(self.limit + 1.0 / self.limit, "increase")
+
+    @staticmethod
+    def _latency(outcome: CallOutcome, acquired: float) -> float:
+        """The timed exchange, or the whole block for callers that don't use ``send``"""
+        return outcome.latency if outcome.latency is not None else time.perf_counter() - acquired
+
+    @asynccontextmanager
+    async def track(self) -> AsyncIterator[CallOutcome]:
+        """
+        Hold one of the provider's slots for the call in the block
+
+        Send through ``outcome.send`` so only the exchange is timed, and set
+        ``outcome.status_code`` to the response status; connection errors
+        and timeouts raised inside the block count as overload.
+        """
+        started = time.perf_counter()
+        await self.acquire()
+        acquired = time.perf_counter()
+        if acquired - started > 0.0005:
+            record(f"{self.name}-limit", acquired - started, "adaptive concurrency queue")
+        in_flight = self.in_flight
+        outcome = CallOutcome()
+        try:
+            yield outcome
+        except httpx.RequestError:
+            self.on_sample(self._latency(outcome, acquired), True, in_flight)
+            raise
+        else:
+            if outcome.status_code is not None:
+                self.on_sample(
+                    self._latency(outcome, acquired), outcome.status_code in OVERLOAD_STATUSES, in_flight
+                )
+        finally:
+            self.release()
+
+    def status(self, history: Optional[int] = None) -> Dict[str, Any]:
+        entries = list(self.history)[-history:] if history else list(self.history)
+        return {
+            "limit": self.current,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "baseline_ms": round(self.baseline * 1000, 1) if self.baseline else None,
+            "smoothed_latency_ms": round(self.smoothed * 1000, 1) if self.smoothed else None,
+            **self.stats,
+            "history": [
+                {"at": round(at, 3), "limit": limit, "reason": reason} for at, limit, reason in entries
+            ],
+        }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def limiter_for(provider: str) -> AdaptiveLimiter:
+    """The process-wide limiter for a provider, created from settings"""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        limiter = _limiters[provider] = AdaptiveLimiter(
+            provider,
+            initial=settings.adaptive_limit_initial,
+            minimum=settings.adaptive_limit_min,
+            maximum=settings.adaptive_limit_max,
+            tolerance=settings.adaptive_latency_tolerance,
+            backoff=settings.adaptive_backoff
+        )
+    return limiter
+
+
+def all_limiters() -> List[AdaptiveLimiter]:
+    return list(_limiters.values())
@@ -0,0 +1,153 @@
+"""
+Event Loop Lag Monitor
+======================
+
+Everything in this server shares one event loop thread. Any code that runs
+without awaiting - synchronous console output, parsing a large JSON body,
+a tight CPU loop - stalls every other request for as long as it runs. This
+module measures those stalls and catches the code responsible:
+
+1. **Heartbeat** - a task that sleeps for a fixed interval and measures how
+   late it wakes up. The delay is the *scheduling lag* every other
+   callback on the loop saw at that moment.
+2. **Watchdog** - a background thread that notices when the heartbeat is
+   overdue by more than a threshold, i.e. a single callback is hogging
+   the loop, and captures the loop thread's call stack *while it is still
+   blocked*, so the offending code is on the stack.
+
+Lag percentiles and counters are served from ``/admin/loop``; the recent
+offenders with their stacks from ``/admin/loop/offenders``. Both parts
+wake only a few times a second and do almost nothing unless the loop is
+stuck, so the monitor is cheap enough to leave on in production.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+import numpy as np
+
+# Frames kept per offender stack (innermost last)
+STACK_DEPTH = 15
+
+
+class LoopMonitor:
+    """Heartbeat lag sampler plus a slow-callback watchdog for one event loop"""
+
+    def __init__(
+        self,
+        interval: float = 0.25,
+        slow_threshold: float = 0.1,
+        offenders_kept: int = 50,
+        samples_kept: int = 2400
+    ):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self._lags: Deque[float] = deque(maxlen=samples_kept)
+        self.offenders: Deque[Dict[str, Any]] = deque(maxlen=offenders_kept)
+        self.stats = {"heartbeats": 0, "slow_callbacks": 0, "max_lag_ms": 0.0}
+        self._last_beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside it)"""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            due = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - due, 0.0)
+            self._last_beat = now
+            self._lags.append(lag)
+            self.stats["heartbeats"] += 1
+            self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag * 1000)
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop's stack while it's blocked"""
+        current: Optional[Dict[str, Any]] = None
+        blocked_since_beat = None
+        while not self._stop.wait(self.slow_threshold / 2):
+            beat = self._last_beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.slow_threshold:
+                current = None
+                continue
+            if current is not None and blocked_since_beat == beat:
+                # Same stall, still going
+                current["blocked_ms"] = round(overdue * 1000, 1)
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            current = {
+                "detected_at": datetime.now().isoformat(),
+                "blocked_ms": round(overdue * 1000, 1),
+                "stack": [
+                    f"{entry.filename}:{entry.lineno} in {entry.name}"
+                    for entry in traceback.extract_stack(frame)[-STACK_DEPTH:]
+                ],
+            }
+            del frame
+            blocked_since_beat = beat
+            self.offenders.append(current)
+            self.stats["slow_callbacks"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Lag distribution over the recent heartbeats, plus counters"""
+        lags = np.fromiter(self._lags, dtype=float) * 1000
+        percentiles = np.percentile(lags, [50, 90, 99]) if lags.size else [0.0, 0.0, 0.0]
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "window_seconds": round(lags.size * self.interval, 1),
+            "lag_ms": {
+                "p50": round(float(percentiles[0]), 2),
+                "p90": round(float(percentiles[1]), 2),
+                "p99": round(float(percentiles[2]), 2),
+                "max": round(float(lags.max()), 2) if lags.size else 0.0,
+            },
+            "heartbeats": self.stats["heartbeats"],
+            "slow_callbacks": self.stats["slow_callbacks"],
+            "max_lag_ms_since_start": round(self.stats["max_lag_ms"], 2),
+        }
+
+    def recent_offenders(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Most recent slow callbacks first"""
+        offenders = list(reversed(self.offenders))
+        return offenders[:limit] if limit else offenders
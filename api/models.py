@@ -0,0 +1,212 @@
+"""
+Typed Result Models
+===================
+
+Compact result types for the data our API clients fetch and cache.
+
+The clients used to build nested dictionaries of strings for every result.
+That is fine for a single response, but cached entries live for minutes and
+every dict carries its own hash table. These classes use ``__slots__`` so an
+instance stores only its field values, and exchange rate tables keep their
+rates in a packed ``array('d')`` with the currency codes shared between
+tables.
+
+Each model has a ``to_dict()`` method that produces the exact JSON shape the
+endpoints have always returned.
+"""
+
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class WeatherResult:
+    """Current weather conditions for one city"""
+
+    __slots__ = (
+        "city", "country", "temperature", "feels_like",
+        "humidity", "description", "wind_speed", "timestamp",
+    )
+
+    city: Optional[str]
+    country: Optional[str]
+    temperature: Optional[float]
+    feels_like: Optional[float]
+    humidity: Optional[int]
+    description: Optional[str]
+    wind_speed: Optional[float]
+    timestamp: str
+
+    @classmethod
+    def from_payload(cls, data: Dict[str, Any], timestamp: str) -> "WeatherResult":
+        """Extract the fields we expose from an OpenWeatherMap payload"""
+        main = data.get("main", {})
+        return cls(
+            city=data.get("name"),
+            country=data.get("sys", {}).get("country"),
+            temperature=main.get("temp"),
+            feels_like=main.get("feels_like"),
+            humidity=main.get("humidity"),
+            description=(data.get("weather") or [{}])[0].get("description"),
+            wind_speed=data.get("wind", {}).get("speed"),
+            timestamp=timestamp,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "city": self.city,
+            "country": self.country,
+            "temperature": self.temperature,
+            "feels_like": self.feels_like,
+            "humidity": self.humidity,
+            "description": self.description,
+            "wind_speed": self.wind_speed,
+            "timestamp": self.timestamp,
+        }
+
+
+@dataclass
+class Article:
+    """One news article summary"""
+
+    __slots__ = ("title", "source", "author", "description", "url", "published_at")
+
+    title: Optional[str]
+    source: Optional[str]
+    author: Optional[str]
+    description: Optional[str]
+    url: Optional[str]
+    published_at: Optional[str]
+
+    @classmethod
+    def from_payload(cls, article: Dict[str, Any]) -> "Article":
+        """Extract the fields we expose from a NewsAPI article"""
+        return cls(
+            title=article.get("title"),
+            source=(article.get("source") or {}).get("name"),
+            author=article.get("author"),
+            description=article.get("description"),
+            url=article.get("url"),
+            published_at=article.get("publishedAt"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "title": self.title,
+            "source": self.source,
+            "author": self.author,
+            "description": self.description,
+            "url": self.url,
+            "published_at": self.published_at,
+        }
+
+
+@dataclass
+class NewsResult:
+    """A page of news search results"""
+
+    __slots__ = ("total_results", "articles", "query", "duplicates_removed")
+
+    total_results: Optional[int]
+    articles: Tuple[Article, ...]
+    query: str
+    duplicates_removed: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_results": self.total_results,
+            "articles": [article.to_dict() for article in self.articles],
+            "query": self.query,
+            "duplicates_removed": self.duplicates_removed,
+        }
+
+
+# Currency code tuples and their lookup indexes are shared by every table
+# that lists the same currencies, so ~160 codes are stored once per process
+# rather than once per cached table.
+_SHARED_CODES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+_CODE_INDEXES: Dict[Tuple[str, ...], Dict[str, int]] = {}
+
+
+def intern_codes(codes: Iterable[str]) -> Tuple[str, ...]:
+    """Return the shared tuple for this sequence of currency codes"""
+    key = tuple(codes)
+    shared = _SHARED_CODES.get(key)
+    if shared is None:
+        shared = _SHARED_CODES[key] = key
+        _CODE_INDEXES[key] = {code: position for position, code in enumerate(key)}
+    return shared
+
+
+def code_index(codes: Tuple[str, ...]) -> Dict[str, int]:
+    """Map each currency code in a shared tuple to its array position"""
+    return _CODE_INDEXES[codes]
+
+
+@dataclass
+class RateTable:
+    """
+    All conversion rates for one base currency
+
+    Rates are stored in a packed float array in the same order as ``codes``.
+    ``version`` increases each time the rates for this base actually change.
+    """
+
+    __slots__ = ("base", "codes", "rates", "last_update", "version")
+
+    base: str
+    codes: Tuple[str, ...]
+    rates: array
+    last_update: Optional[str]
+    version: int
+
+    @classmethod
+    def from_rates(
+        cls,
+        base: str,
+        rates: Dict[str, float],
+        last_update: Optional[str],
+        version: int = 1
+    ) -> "RateTable":
+        codes = intern_codes(rates.keys())
+        return cls(
+            base=base,
+            codes=codes,
+            rates=array("d", rates.values()),
+            last_update=last_update,
+            version=version,
+        )
+
+    def same_rates(self, other: "RateTable") -> bool:
+        return self.codes is other.codes and self.rates == other.rates
+
+    def changes_since(self, older: "RateTable") -> Tuple[Dict[str, float], List[str]]:
+        """Currencies whose rate differs from ``older`` (or are new), and removed codes"""
+        if self.codes is older.codes:
+            # Same currency layout: compare the packed arrays without copying
+            new = np.frombuffer(self.rates, dtype=np.float64)
+            old = np.frombuffer(older.rates, dtype=np.float64)
+            changed = np.flatnonzero(new != old)
+            return {self.codes[i]: self.rates[i] for i in changed}, []
+
+        previous = older.to_dict()
+        changed = {
+            code: rate for code, rate in zip(self.codes, self.rates)
+            if previous.get(code) != rate
+        }
+        removed = [code for code in older.codes if code not in code_index(self.codes)]
+        return changed, removed
+
+    def rate(self, currency: str) -> Optional[float]:
+        """Look up a single conversion rate, or None if the currency is unknown"""
+        position = code_index(self.codes).get(currency)
+        if position is None:
+            return None
+        return self.rates[position]
+
+    def to_dict(self) -> Dict[str, float]:
+        """Rebuild the ``{currency: rate}`` map returned as ``all_rates``"""
+        return dict(zip(self.codes, self.rates))
@@ -0,0 +1,171 @@
+"""
+Local News Index
+================
+
+Every article fetched from NewsAPI is stored in a local SQLite full-text
+index (FTS5). Many searches overlap - "Tokyo travel", "Tokyo tourism",
+"Tokyo" - so once one of them has been fetched, the others can often be
+answered locally without spending NewsAPI quota.
+
+Articles are kept for a retention window and then purged. Searches only
+consider articles fetched within a freshness window, so local answers never
+go stale.
+
+SQLite calls are short but blocking, so they run in a worker thread to keep
+the event loop free.
+"""
+
+import asyncio
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from api.config import settings
+from api.models import Article
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE,
+    title TEXT,
+    source TEXT,
+    author TEXT,
+    description TEXT,
+    published_at TEXT,
+    language TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_fetched_at ON articles (fetched_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, content='articles', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO articles_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+"""
+
+_TOKEN = re.compile(r"\w+")
+_OPERATORS = {"AND", "OR", "NOT"}
+
+
+def fts_query(query: str) -> Optional[str]:
+    """
+    Translate a NewsAPI-style query into an FTS5 match expression
+
+    Words are quoted so punctuation can't break the syntax; upper-case
+    AND / OR / NOT are kept as operators. FTS5 binds OR looser than AND,
+    so each run of OR'd words is grouped: ``Paris travel OR tourism``
+    becomes ``"Paris" AND ("travel" OR "tourism")``, not
+    ``("Paris" AND "travel") OR "tourism"``. Groups are joined with an
+    explicit AND, which FTS5 requires next to parentheses. Returns None if
+    nothing is left.
+    """
+    # (operator joining it to the previous group, words OR'd together)
+    groups: List[Tuple[str, List[str]]] = []
+    operator = ""
+    for token in _TOKEN.findall(query):
+        if token in _OPERATORS:
+            if groups:
+                operator = token
+        elif operator == "OR":
+            groups[-1][1].append(f'"{token}"')
+            operator = ""
+        else:
+            groups.append((" NOT " if operator == "NOT" else " AND ", [f'"{token}"']))
+            operator = ""
+    parts: List[str] = []
+    for joiner, words in groups:
+        if parts:
+            parts.append(joiner)
+        parts.append(words[0] if len(words) == 1 else f"({' OR '.join(words)})")
+    return "".join(parts) or None
+
+
+class NewsIndex:
+    """SQLite FTS5 index of recently fetched articles"""
+
+    def __init__(self, path: str = ":memory:", retention_seconds: float = 7 * 86400):
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+
+    def _ingest(self, articles: Sequence[Article], language: str) -> None:
+        now = time.time()
+        rows = [
+            (a.url, a.title, a.source, a.author, a.description, a.published_at, language, now)
+            for a in articles
+            if a.url
+        ]
+        with self._lock, self._db:
+            self._db.executemany(
+                """
+                INSERT INTO articles (url, title, source, author, description, published_at, language, fetched_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    title = excluded.title, description = excluded.description,
+                    fetched_at = excluded.fetched_at
+                """,
+                rows
+            )
+            self._db.execute(
+                "DELETE FROM articles WHERE fetched_at < ?", (now - self.retention_seconds,)
+            )
+
+    def _search(self, query: str, language: str, limit: int, max_age: float) -> List[Article]:
+        match = fts_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    """
+                    SELECT a.title, a.source, a.author, a.description, a.url, a.published_at
+                    FROM articles_fts
+                    JOIN articles a ON a.id = articles_fts.rowid
+                    WHERE articles_fts MATCH ? AND a.language = ? AND a.fetched_at >= ?
+                    ORDER BY bm25(articles_fts)
+                    LIMIT ?
+                    """,
+                    (match, language, time.time() - max_age, limit)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                # Malformed match expression: treat as "nothing local"
+                return []
+        return [Article(*row) for row in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    async def ingest(self, articles: Sequence[Article], language: str) -> None:
+        """Add or refresh articles, then purge anything past retention"""
+        await asyncio.to_thread(self._ingest, articles, language)
+
+    async def search(self, query: str, language: str, limit: int, max_age: float) -> List[Article]:
+        """Best-matching articles fetched within the last ``max_age`` seconds"""
+        return await asyncio.to_thread(self._search, query, language, limit, max_age)
+
+
+_shared: Optional[NewsIndex] = None
+
+
+def shared_index() -> NewsIndex:
+    """The process-wide index, created on first use from settings"""
+    global _shared
+    if _shared is None:
+        _shared = NewsIndex(settings.news_index_path, settings.news_index_retention)
+    return _shared
@@ -0,0 +1,275 @@
+"""
+Exchange Rate History
+=====================
+
+Every rate table ExchangeRate-API publishes is appended to a compact
+columnar store, so trends can be computed locally instead of being thrown
+away after each refresh.
+
+Layout, per base currency:
+
+- ``<BASE>.rates``  float64 matrix, one row per currency and one column per
+  observation (currency x time). A single currency's history over any
+  window is one contiguous slice of the file.
+- ``<BASE>.times``  float64 vector of observation times (Unix seconds).
+- ``<BASE>.json``   the currency of each row and the number of observations.
+
+The files are memory-mapped with NumPy. A query slices out just the window
+it needs, and only those pages are read from disk; the rest of the history
+never enters memory. Capacity grows by doubling, so appends are cheap.
+Currencies that appear later get a new row, with NaN for the observations
+before they appeared.
+
+One observation is stored per upstream publication (its
+``time_last_update_unix``). Refreshes of a table we already have add
+nothing. With no ``rate_history_path`` set, the same store lives in memory
+and is lost on restart.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from api.config import settings
+from api.models import RateTable
+
+# Observations allocated when a base's store is created
+INITIAL_CAPACITY = 256
+
+# Most points returned in a moving-average series (longer ones are thinned)
+MAX_SERIES_POINTS = 500
+
+SECONDS_PER_YEAR = 365.25 * 86400
+
+
+class HistoryError(ValueError):
+    """A history query that can't be answered (unknown base or currency, too little data)"""
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class RateSeries:
+    """Append-only currency x time matrix for one base currency"""
+
+    def __init__(self, base: str, directory: Optional[Path] = None):
+        self.base = base
+        self.directory = directory
+        self.codes: List[str] = []
+        self._row: Dict[str, int] = {}
+        self.count = 0
+        self.capacity = 0
+        self.rates = np.empty((0, 0))
+        self.times = np.empty(0)
+        if directory is not None and self._path("json").exists():
+            self._load()
+
+    def _path(self, suffix: str) -> Path:
+        return self.directory / f"{self.base}.{suffix}"
+
+    def _load(self) -> None:
+        meta = json.loads(self._path("json").read_text())
+        self.codes = meta["codes"]
+        self._row = {code: row for row, code in enumerate(self.codes)}
+        self.count = meta["count"]
+        self.capacity = meta["capacity"]
+        self.rates = np.memmap(self._path("rates"), np.float64, "r+", shape=(len(self.codes), self.capacity))
+        self.times = np.memmap(self._path("times"), np.float64, "r+", shape=(self.capacity,))
+
+    def _save_meta(self) -> None:
+        if self.directory is None:
+            return
+        temporary = self._path("json.tmp")
+        temporary.write_text(json.dumps({"codes": self.codes, "count": self.count, "capacity": self.capacity}))
+        os.replace(temporary, self._path("json"))
+
+    def _allocate(self, name: str, shape) -> np.ndarray:
+        """A NaN-filled array, backed by a fresh file when the store is on disk"""
+        if self.directory is None:
+            return np.full(shape, np.nan)
+        array = np.memmap(self._path(f"{name}.tmp"), np.float64, "w+", shape=shape)
+        array[...] = np.nan
+        return array
+
+    def _reshape(self, currencies: int, capacity: int) -> None:
+        """Grow to ``currencies`` rows and ``capacity`` observations, keeping the data"""
+        rates = self._allocate("rates", (currencies, capacity))
+        times = self._allocate("times", (capacity,))
+        rates[:self.rates.shape[0], :self.count] = self.rates[:, :self.count]
+        times[:self.count] = self.times[:self.count]
+        if self.directory is not None:
+            rates.flush()
+            times.flush()
+            os.replace(self._path("rates.tmp"), self._path("rates"))
+            os.replace(self._path("times.tmp"), self._path("times"))
+        self.rates, self.times, self.capacity = rates, times, capacity
+
+    def append(self, table: RateTable, observed_at: float) -> bool:
+        """Add a table as one observation; False if it isn't newer than the last one"""
+        if self.count and observed_at <= self.times[self.count - 1]:
+            return False
+
+        new_codes = [code for code in table.codes if code not in self._row]
+        for code in new_codes:
+            self._row[code] = len(self.codes)
+            self.codes.append(code)
+        if new_codes or self.count == self.capacity:
+            capacity = self.capacity * 2 if self.count == self.capacity else self.capacity
+            self._reshape(len(self.codes), max(capacity, INITIAL_CAPACITY))
+
+        rows = np.fromiter((self._row[code] for code in table.codes), dtype=np.intp, count=len(table.codes))
+        column = np.full(len(self.codes), np.nan)
+        column[rows] = np.frombuffer(table.rates, dtype=np.float64)
+        self.rates[:, self.count] = column
+        self.times[self.count] = observed_at
+        self.count += 1
+        if self.directory is not None:
+            self.rates.flush()
+            self.times.flush()
+        self._save_meta()
+        return True
+
+    def window(self, targets: Sequence[str], since: float):
+        """(times, rates) of ``targets`` observed at or after ``since``; rates are targets x time"""
+        missing = [code for code in targets if code not in self._row]
+        if missing:
+            raise HistoryError(f"No history for {', '.join(missing)} against {self.base}")
+        times = self.times[:self.count]
+        start = int(np.searchsorted(times, since, side="left"))
+        # Basic slices per currency: only the window is read from the file
+        rates = np.stack([self.rates[self._row[code], start:self.count] for code in targets])
+        return np.array(times[start:]), rates
+
+
+def trend_statistics(times: np.ndarray, rates: np.ndarray, window: int, series: bool) -> List[Dict[str, Any]]:
+    """
+    Moving average, volatility and extremes for each row of ``rates``
+
+    All currencies are computed together with array operations; NaNs (a
+    currency not yet listed) are left out of every statistic.
+    """
+    present = ~np.isnan(rates)
+    observations = present.sum(axis=1)
+    filled = np.where(present, rates, 0.0)
+
+    # Moving average over the last ``window`` observations, from running sums
+    sums = np.concatenate([np.zeros((rates.shape[0], 1)), np.cumsum(filled, axis=1)], axis=1)
+    counts = np.concatenate([np.zeros((rates.shape[0], 1)), np.cumsum(present, axis=1)], axis=1)
+    span = min(window, rates.shape[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        moving = (sums[:, span:] - sums[:, :-span]) / (counts[:, span:] - counts[:, :-span])
+
+        # Volatility: standard deviation of log returns between observations
+        returns = np.diff(np.log(np.where(present, rates, np.nan)), axis=1)
+    returns_present = (~np.isnan(returns)).sum(axis=1)
+    volatility = np.full(rates.shape[0], np.nan)
+    enough = returns_present >= 2
+    if enough.any():
+        volatility[enough] = np.nanstd(returns[enough], axis=1, ddof=1)
+    spacing = float(np.median(np.diff(times))) if times.size > 1 else 0.0
+    annualize = np.sqrt(SECONDS_PER_YEAR / spacing) if spacing > 0 else np.nan
+
+    lowest = np.where(present, rates, np.inf).argmin(axis=1)
+    highest = np.where(present, rates, -np.inf).argmax(axis=1)
+    means = filled.sum(axis=1) / np.maximum(observations, 1)
+
+    results = []
+    step = max(1, -(-moving.shape[1] // MAX_SERIES_POINTS))
+    for i in range(rates.shape[0]):
+        if not observations[i]:
+            results.append({"observations": 0})
+            continue
+        latest = rates[i][present[i]][-1]
+        entry = {
+            "observations": int(observations[i]),
+            "latest": float(latest),
+            "mean": float(means[i]),
+            "min": {"rate": float(rates[i, lowest[i]]), "at": _iso(times[lowest[i]])},
+            "max": {"rate": float(rates[i, highest[i]]), "at": _iso(times[highest[i]])},
+            "moving_average": {
+                "window": span,
+                "latest": float(moving[i, -1]) if moving.shape[1] and not np.isnan(moving[i, -1]) else None,
+            },
+            "volatility": {
+                "per_observation": None if np.isnan(volatility[i]) else float(volatility[i]),
+                "annualized": None if np.isnan(volatility[i] * annualize) else float(volatility[i] * annualize),
+            },
+        }
+        if series:
+            points = range(moving.shape[1] - 1, -1, -step)
+            entry["moving_average"]["series"] = [
+                {"at": _iso(times[p + span - 1]), "rate": float(moving[i, p])}
+                for p in reversed(points) if not np.isnan(moving[i, p])
+            ]
+        results.append(entry)
+    return results
+
+
+class RateHistory:
+    """Rate series for every base currency, on disk or in memory"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.directory = Path(path) if path else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self._series: Dict[str, RateSeries] = {}
+        # Appends may reshape the arrays; queries run in worker threads
+        self._lock = threading.Lock()
+
+    def _get(self, base: str, create: bool = False) -> Optional[RateSeries]:
+        series = self._series.get(base)
+        if series is None and (create or (self.directory and (self.directory / f"{base}.json").exists())):
+            series = self._series[base] = RateSeries(base, self.directory)
+        return series
+
+    def append(self, table: RateTable, observed_at: Optional[float] = None) -> bool:
+        """Store a freshly fetched table; False if it was already stored"""
+        with self._lock:
+            return self._get(table.base, create=True).append(table, observed_at or time.time())
+
+    def query(
+        self,
+        base: str,
+        targets: Sequence[str],
+        days: float,
+        window: int,
+        series: bool = True
+    ) -> Dict[str, Any]:
+        """Trend statistics for ``targets`` over the last ``days``; raises HistoryError"""
+        started = time.perf_counter()
+        with self._lock:
+            stored = self._get(base)
+            if stored is None or not stored.count:
+                raise HistoryError(f"No rate history for base currency {base} yet")
+            times, rates = stored.window(targets, time.time() - days * 86400)
+            total = stored.count
+        if not times.size:
+            raise HistoryError(f"No {base} rates observed in the last {days:g} days")
+        statistics = trend_statistics(times, rates, window, series)
+        return {
+            "base": base,
+            "from": _iso(times[0]),
+            "to": _iso(times[-1]),
+            "observations_in_window": int(times.size),
+            "observations_stored": total,
+            "rates": dict(zip(targets, statistics)),
+            "query_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+
+_shared: Optional[RateHistory] = None
+
+
+def shared_history() -> RateHistory:
+    """The process-wide history, created on first use from settings"""
+    global _shared
+    if _shared is None:
+        _shared = RateHistory(settings.rate_history_path)
+    return _shared
@@ -0,0 +1,318 @@
+"""
+Upstream Priority Scheduling
+============================
+
+Upstream calls are a shared, limited resource: connections, provider rate
+limits and key quota. Without scheduling, a batch job or a cache refresh
+firing hundreds of calls competes on equal terms with a person waiting on
+``/weather``, and interactive latency climbs.
+
+Every upstream call therefore takes a **slot** for its HTTP exchange (after
+waiting for its provider's adaptive limit, api/limits.py, so one saturated
+provider can't tie up slots the others need). Calls are tagged with
+one of three priority classes:
+
+- ``interactive`` - a caller is waiting on the response (the default)
+- ``batch``       - bulk jobs such as nightly reports
+- ``background``  - cache refreshes and pre-warming
+
+When all slots are busy, callers queue per class, and freed slots are
+handed out by **smooth weighted round-robin** (with the default weights,
+interactive gets 8 of every 12 slots while all classes are waiting). Two
+more rules keep this fair and fast:
+
+- A few slots are **reserved** for interactive calls, so batch work can
+  never occupy every connection.
+- **Aging**: a call that has waited longer than ``max_wait`` is served
+  next regardless of class, so low priorities can't starve.
+
+Within a class, waiting calls are not served first-come first-served but by
+**weighted fair queueing** between consumers (api/consumers.py). Each
+queued call gets a virtual finish time: its consumer's previous finish time
+(or the class's virtual clock, if later) plus ``1 / weight``. Calls are
+served in finish-time order. A consumer that queues 200 calls at once is
+served no faster than its share, and a consumer with a single call waits
+behind at most one call from each other consumer, not behind the whole
+burst.
+
+The priority of the current request lives in a context variable, so code
+deep inside a client doesn't need it passed in; wrap a job in
+``with priority("batch"):`` to tag everything it does. Lookups forwarded to
+another cluster member carry it in the ``X-Priority`` header, so they keep
+their class on the owner too.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from api.config import settings
+from api.consumers import current_consumer
+from api.timing import record
+
+PRIORITIES = ("interactive", "batch", "background")
+
+# Request header callers (and forwarding cluster members) use to set their priority class
+PRIORITY_HEADER = "X-Priority"
+
+# Fair-queueing flow for upstream calls made outside any request (bulk jobs, refreshes)
+INTERNAL_FLOW = "internal"
+
+# Finish times kept per class before the ones already passed are dropped
+_FINISH_TIMES_KEPT = 1024
+
+T = TypeVar("T")
+
+_priority: ContextVar[str] = ContextVar("upstream_priority", default="interactive")
+
+
+def current_priority() -> str:
+    return _priority.get()
+
+
+@contextmanager
+def priority(name: str) -> Iterator[None]:
+    """Tag every upstream call made inside the block with a priority class"""
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{name}', expected one of {list(PRIORITIES)}")
+    token = _priority.set(name)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _Waiter:
+    """One queued call"""
+
+    __slots__ = ("enqueued", "flow", "finish", "future", "done")
+
+    def __init__(self, enqueued: float, flow: str, finish: float, future: "asyncio.Future[None]"):
+        self.enqueued = enqueued
+        self.flow = flow
+        self.finish = finish
+        self.future = future
+        self.done = False
+
+
+class _FairQueue:
+    """Waiting calls of one class, served in weighted-fair order between flows"""
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._arrivals: Deque[_Waiter] = deque()  # for aging: oldest first
+        self._finish: Dict[str, float] = {}      # last finish time per flow
+        self._order = itertools.count()
+        self.virtual_time = 0.0
+        self.waiting = 0
+
+    def __len__(self) -> int:
+        return self.waiting
+
+    def push(self, flow: str, weight: int, future: "asyncio.Future[None]") -> _Waiter:
+        finish = max(self.virtual_time, self._finish.get(flow, 0.0)) + 1.0 / weight
+        self._finish[flow] = finish
+        waiter = _Waiter(time.monotonic(), flow, finish, future)
+        heapq.heappush(self._heap, (finish, next(self._order), waiter))
+        self._arrivals.append(waiter)
+        self.waiting += 1
+        return waiter
+
+    def oldest(self) -> Optional[_Waiter]:
+        while self._arrivals and self._arrivals[0].done:
+            self._arrivals.popleft()
+        return self._arrivals[0] if self._arrivals else None
+
+    def pop(self, oldest: bool = False) -> _Waiter:
+        """Next waiter by finish time (or by arrival, for aging)"""
+        if oldest:
+            waiter = self.oldest()
+        else:
+            while self._heap[0][2].done:
+                heapq.heappop(self._heap)
+            waiter = heapq.heappop(self._heap)[2]
+            self.virtual_time = max(self.virtual_time, waiter.finish)
+        self.remove(waiter)
+        return waiter
+
+    def remove(self, waiter: _Waiter) -> None:
+        """Take a waiter out (lazily: skipped when it reaches the front)"""
+        if waiter.done:
+            return
+        waiter.done = True
+        self.waiting -= 1
+        if not self.waiting:
+            # Nobody is behind: no flow has any fairness debt left
+            self._heap.clear()
+            self._arrivals.clear()
+            self._finish.clear()
+        elif len(self._finish) > _FINISH_TIMES_KEPT:
+            self._finish = {flow: finish for flow, finish in self._finish.items() if finish > self.virtual_time}
+
+    def flows(self) -> int:
+        """Distinct flows with a call waiting"""
+        return len({waiter.flow for _, _, waiter in self._heap if not waiter.done})
+
+
+class PriorityScheduler:
+    """Weighted, starvation-free dispatch of a fixed number of upstream slots"""
+
+    def __init__(
+        self,
+        slots: int,
+        weights: Dict[str, int],
+        reserved_interactive: int = 0,
+        max_wait: float = 5.0
+    ):
+        self.slots = slots
+        self.weights = weights
+        self.reserved_interactive = min(reserved_interactive, slots - 1)
+        self.max_wait = max_wait
+        self._in_use = {name: 0 for name in PRIORITIES}
+        self._queues = {name: _FairQueue() for name in PRIORITIES}
+        self._credit = {name: 0 for name in PRIORITIES}
+        self.stats = {name: {"dispatched": 0, "queued": 0, "wait_seconds": 0.0, "max_wait_ms": 0.0}
+                      for name in PRIORITIES}
+
+    @property
+    def in_use(self) -> int:
+        return sum(self._in_use.values())
+
+    def _can_start(self, name: str) -> bool:
+        """Is a slot free for this class (non-interactive can't touch the reserve)?"""
+        if self.in_use >= self.slots:
+            return False
+        if name == "interactive":
+            return True
+        others = self.in_use - self._in_use["interactive"]
+        return others < self.slots - self.reserved_interactive
+
+    def _next(self) -> Optional[Tuple[str, bool]]:
+        """Class that gets the next free slot, and whether its oldest caller is overdue"""
+        waiting = [name for name in PRIORITIES if self._queues[name] and self._can_start(name)]
+        if not waiting:
+            return None
+
+        # Aging: anyone waiting past max_wait goes first, oldest first
+        now = time.monotonic()
+        overdue = [name for name in waiting if now - self._queues[name].oldest().enqueued >= self.max_wait]
+        if overdue:
+            return min(overdue, key=lambda name: self._queues[name].oldest().enqueued), True
+
+        # Smooth weighted round-robin between the classes that are waiting
+        total = 0
+        for name in waiting:
+            self._credit[name] += self.weights[name]
+            total += self.weights[name]
+        chosen = max(waiting, key=self._credit.__getitem__)
+        self._credit[chosen] -= total
+        return chosen, False
+
+    def _dispatch(self) -> None:
+        while True:
+            chosen = self._next()
+            if chosen is None:
+                return
+            name, overdue = chosen
+            waiter = self._queues[name].pop(oldest=overdue)
+            if waiter.future.done():
+                continue
+            self._in_use[name] += 1
+            waiter.future.set_result(None)
+
+    async def acquire(self, name: str, flow: str = INTERNAL_FLOW, weight: int = 1) -> float:
+        """Wait for a slot for a call from ``flow``; returns the seconds spent queued"""
+        if not any(self._queues.values()) and self._can_start(name):
+            self._in_use[name] += 1
+            self.stats[name]["dispatched"] += 1
+            return 0.0
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = self._queues[name].push(flow, weight, future)
+        self.stats[name]["queued"] += 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self.release(name)
+            else:
+                self._queues[name].remove(waiter)
+            raise
+
+        waited = time.monotonic() - waiter.enqueued
+        stats = self.stats[name]
+        stats["dispatched"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited * 1000)
+        return waited
+
+    def release(self, name: str) -> None:
+        self._in_use[name] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, name: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold an upstream slot for the block, at the current request's priority and consumer"""
+        name = name or current_priority()
+        consumer = current_consumer()
+        if consumer is None:
+            waited = await self.acquire(name)
+        else:
+            waited = await self.acquire(name, consumer.name, consumer.weight)
+            consumer.record_upstream(waited)
+        if waited:
+            record("upstream-slot", waited, f"{name} queue")
+        try:
+            yield
+        finally:
+            self.release(name)
+
+    async def run(self, start: Callable[[], Awaitable[T]]) -> T:
+        """
+        Hold a slot only while the awaitable ``start()`` returns is running
+
+        Upstream calls wait for their provider's adaptive limit first and
+        take a slot here, per attempt, around just the HTTP exchange. A call
+        queued behind one saturated provider then never holds a slot that
+        another provider's calls could use.
+        """
+        async with self.slot():
+            return await start()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "slots": self.slots,
+            "reserved_interactive": self.reserved_interactive,
+            "weights": dict(self.weights),
+            "in_use": dict(self._in_use),
+            "waiting": {name: len(queue) for name, queue in self._queues.items()},
+            "waiting_consumers": {name: queue.flows() for name, queue in self._queues.items()},
+            "classes": {
+                name: {
+                    "dispatched": stats["dispatched"],
+                    "queued": stats["queued"],
+                    "mean_wait_ms": round(stats["wait_seconds"] * 1000 / max(stats["queued"], 1), 2),
+                    "max_wait_ms": round(stats["max_wait_ms"], 2),
+                }
+                for name, stats in self.stats.items()
+            },
+        }
+
+
+upstream_scheduler = PriorityScheduler(
+    slots=settings.upstream_slots,
+    weights={
+        "interactive": settings.priority_weight_interactive,
+        "batch": settings.priority_weight_batch,
+        "background": settings.priority_weight_background,
+    },
+    reserved_interactive=settings.upstream_reserved_interactive,
+    max_wait=settings.priority_max_wait
+)
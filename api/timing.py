@@ -0,0 +1,115 @@
+"""
+Per-Request Timing Breakdown
+============================
+
+Collects how long each phase of a request took so it can be returned in a
+``Server-Timing`` response header (browsers show it in the DevTools network
+tab) and, on request, in a ``timings`` block of the response body.
+
+A ``RequestTimings`` object is created by middleware for each request and
+kept in a context variable. Code anywhere below the endpoint - including the
+API clients running in parallel under ``asyncio.gather`` - records phases
+into it without having to pass it around.
+
+Phase names used by the clients (``<source>`` is weather, news or exchange):
+- ``<source>-queue``   time between scheduling the call and it starting
+                       (for dependent sources: waiting for their inputs)
+- ``<source>-cache``   answered from the in-memory cache
+- ``<source>-connect`` connection acquisition (pool, DNS, TCP, TLS)
+- ``<source>-wait``    waiting for and reading the upstream response
+- ``<source>-shape``   turning the upstream JSON into our result
+- ``serialize``        encoding the response body
+- ``total``            whole request as seen by the server
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+class RequestTimings:
+    """Ordered list of (phase, seconds, description) for one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.handler_done: Optional[float] = None
+        self.entries: List[Tuple[str, float, Optional[str]]] = []
+
+    def record(self, name: str, seconds: float, description: Optional[str] = None) -> None:
+        self.entries.append((name, seconds, description))
+
+    def header(self) -> str:
+        """Format as a Server-Timing header value"""
+        parts = []
+        for name, seconds, description in self.entries:
+            part = f"{name};dur={seconds * 1000:.2f}"
+            if description:
+                part += f';desc="{description}"'
+            parts.append(part)
+        return ", ".join(parts)
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [
+            {"phase": name, "ms": round(seconds * 1000, 2), "detail": description}
+            for name, seconds, description in self.entries
+        ]
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request() -> RequestTimings:
+    """Begin collecting timings for the current request"""
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def record(name: str, seconds: float, description: Optional[str] = None) -> None:
+    """Record a phase if a request is being timed (no-op otherwise)"""
+    timings = _current.get()
+    if timings is not None:
+        timings.record(name, seconds, description)
+
+
+@contextmanager
+def phase(name: str, description: Optional[str] = None) -> Iterator[None]:
+    """Time the enclosed block as one phase"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started, description)
+
+
+class UpstreamTrace:
+    """
+    httpx trace hook that splits an upstream call into connect and wait
+
+    Pass it as ``extensions={"trace": trace}``; httpx reports when the request
+    headers start going out, which is the point where we hold a usable
+    connection. Transports without trace events (e.g. test mocks) are timed
+    as a single wait phase.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.request_sent: Optional[float] = None
+
+    async def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        if self.request_sent is None and event_name.endswith("send_request_headers.started"):
+            self.request_sent = time.perf_counter()
+
+    def finish(self, source: str) -> None:
+        now = time.perf_counter()
+        if self.request_sent is None:
+            record(f"{source}-wait", now - self.started, "network")
+            return
+        record(f"{source}-connect", self.request_sent - self.started, "connection acquisition")
+        record(f"{source}-wait", now - self.request_sent, "network")
+
@@ -0,0 +1,187 @@
+"""
+Shared Upstream Transport
+=========================
+
+One pooled HTTP client for every upstream API call, instead of opening a
+fresh connection per request.
+
+Opening an HTTPS connection costs a DNS lookup, a TCP handshake and a TLS
+handshake - often more time than the API call itself. This module removes
+as much of that as possible:
+
+- **Connection pooling**: connections are kept alive and reused
+- **HTTP/2**: negotiated automatically (ALPN) with providers that support
+  it, so concurrent calls to one host share a single connection. Needs the
+  ``h2`` package (``pip install httpx[http2]``); falls back to HTTP/1.1
+- **DNS caching**: resolved addresses are reused for ``DNS_CACHE_TTL``
+  seconds
+- **Pre-warming**: at startup, connections to every provider are opened
+  before the server starts taking traffic, so the first real requests
+  after a deploy don't pay the cold-connection cost
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpcore
+import httpx
+
+from api.config import settings
+
+try:
+    import h2  # noqa: F401  (presence enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class DNSCache:
+    """Caches getaddrinfo results per host for a fixed TTL"""
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """Addresses for ``host``, from cache when fresh"""
+        try:
+            ipaddress.ip_address(host)
+            return [host]
+        except ValueError:
+            pass
+
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._entries[key] = (time.monotonic() + self.ttl, addresses)
+        return addresses
+
+    def forget(self, host: str, port: int) -> None:
+        self._entries.pop((host, port), None)
+
+
+class CachingDNSBackend(httpcore.AsyncNetworkBackend):
+    """
+    httpcore network backend that connects via cached DNS results
+
+    TLS still uses the original hostname for SNI and certificate checks,
+    because httpcore passes it separately when starting TLS.
+    """
+
+    def __init__(self, backend: httpcore.AsyncNetworkBackend, dns: DNSCache):
+        self._backend = backend
+        self.dns = dns
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await self.dns.resolve(host, port)
+        except OSError as e:
+            # Surface lookup failures the way httpcore does, as ConnectError
+            raise httpcore.ConnectError(str(e)) from e
+        last_error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                last_error = e
+        # Every cached address failed (or there were none); look the host up again next time
+        self.dns.forget(host, port)
+        if last_error is None:
+            last_error = httpcore.ConnectError(f"No addresses found for {host}")
+        raise last_error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._backend.sleep(seconds)
+
+
+dns_cache = DNSCache(settings.dns_cache_ttl)
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.upstream_max_connections,
+        max_keepalive_connections=settings.upstream_max_keepalive,
+        keepalive_expiry=settings.upstream_keepalive_expiry
+    )
+    http2 = settings.upstream_http2 and HTTP2_AVAILABLE
+    transport = httpx.AsyncHTTPTransport(http2=http2, limits=limits)
+    # httpx doesn't expose the network backend, so wrap the pool's own
+    pool = getattr(transport, "_pool", None)
+    if pool is not None and hasattr(pool, "_network_backend"):
+        pool._network_backend = CachingDNSBackend(pool._network_backend, dns_cache)
+    return httpx.AsyncClient(http2=http2, limits=limits, transport=transport)
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    The shared upstream client for the running event loop
+
+    Pooled connections belong to the loop that opened them, so a new client
+    is created if we are called from a different loop (e.g. a CLI run).
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = _build_client()
+        _client_loop = loop
+    return _client
+
+
+def install_client(client: httpx.AsyncClient) -> None:
+    """
+    Use ``client`` for upstream calls from the running event loop
+
+    For benchmarks and offline runs: pass a client with an in-memory
+    transport (``httpx.MockTransport``) to answer upstream calls locally.
+    """
+    global _client, _client_loop
+    _client = client
+    _client_loop = asyncio.get_running_loop()
+
+
+async def close_client() -> None:
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+async def prewarm(base_urls: Iterable[str], timeout: Optional[float] = None) -> Dict[str, str]:
+    """
+    Resolve and connect to each upstream host before taking traffic
+
+    A cheap HEAD request per origin opens the connection (TCP + TLS, and
+    HTTP/2 negotiation) and leaves it in the pool. Any response status
+    counts as warm; failures are reported but never block startup beyond
+    ``timeout``.
+    """
+    timeout = settings.prewarm_timeout if timeout is None else timeout
+    client = get_client()
+    origins = list(dict.fromkeys(
+        f"{parts.scheme}://{parts.netloc}/" for parts in map(urlsplit, base_urls)
+    ))
+
+    async def warm(origin: str) -> str:
+        try:
+            response = await client.head(origin, timeout=timeout)
+            return f"warm ({response.http_version})"
+        except httpx.HTTPError as e:
+            return f"failed: {type(e).__name__}"
+
+    results = await asyncio.gather(*(warm(origin) for origin in origins))
+    return dict(zip(origins, results))
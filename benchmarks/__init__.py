@@ -0,0 +1,5 @@
+"""
+Benchmarks for the Personal Research Assistant API
+
+Run from the project root, e.g. python -m benchmarks.cache_memory
+"""
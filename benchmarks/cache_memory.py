@@ -0,0 +1,122 @@
+"""
+Cache Memory Benchmark
+======================
+
+Measures how many bytes each cached result costs, comparing the plain
+dictionaries the clients used to build ("before") with the typed models in
+api/models.py ("after").
+
+Each entry is parsed from a fresh JSON body, just like a real upstream
+response, so strings are not accidentally shared between entries.
+
+Usage:
+    python -m benchmarks.cache_memory [--entries 2000]
+"""
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from api.models import Article, NewsResult, RateTable, WeatherResult
+from benchmarks.payloads import as_bytes, exchange_payload, news_payload, weather_payload
+
+
+# ---------------------------------------------------------------------------
+# "Before": the dict shapes the clients used to keep
+# ---------------------------------------------------------------------------
+
+def legacy_weather(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "city": data.get("name"),
+        "country": data.get("sys", {}).get("country"),
+        "temperature": data.get("main", {}).get("temp"),
+        "feels_like": data.get("main", {}).get("feels_like"),
+        "humidity": data.get("main", {}).get("humidity"),
+        "description": data.get("weather", [{}])[0].get("description"),
+        "wind_speed": data.get("wind", {}).get("speed"),
+        "timestamp": "2026-10-19T12:00:00.000000",
+    }
+
+
+def legacy_news(data: Dict[str, Any]) -> Dict[str, Any]:
+    articles = []
+    for article in data.get("articles", []):
+        articles.append({
+            "title": article.get("title"),
+            "source": article.get("source", {}).get("name"),
+            "author": article.get("author"),
+            "description": article.get("description"),
+            "url": article.get("url"),
+            "published_at": article.get("publishedAt"),
+        })
+    return {"total_results": data.get("totalResults"), "articles": articles, "query": "Tokyo travel"}
+
+
+def legacy_rates(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "base": "USD",
+        "last_update": data.get("time_last_update_utc"),
+        "all_rates": data.get("conversion_rates", {}),
+    }
+
+
+# ---------------------------------------------------------------------------
+# "After": the typed models
+# ---------------------------------------------------------------------------
+
+def typed_weather(data: Dict[str, Any]) -> WeatherResult:
+    return WeatherResult.from_payload(data, "2026-10-19T12:00:00.000000")
+
+
+def typed_news(data: Dict[str, Any]) -> NewsResult:
+    return NewsResult(
+        total_results=data.get("totalResults"),
+        articles=tuple(Article.from_payload(article) for article in data.get("articles", [])),
+        query="Tokyo travel",
+        duplicates_removed=0,
+    )
+
+
+def typed_rates(data: Dict[str, Any]) -> RateTable:
+    return RateTable.from_rates("USD", data["conversion_rates"], data.get("time_last_update_utc"))
+
+
+def bytes_per_entry(body: bytes, build: Callable[[Dict[str, Any]], Any], entries: int) -> float:
+    """Average traced allocation for one cached result"""
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    kept: List[Any] = []
+    for _ in range(entries):
+        kept.append(build(json.loads(body)))
+
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del kept
+    return used / entries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--entries", type=int, default=2000, help="cached entries per scenario")
+    args = parser.parse_args()
+
+    scenarios = [
+        ("weather", as_bytes(weather_payload()), legacy_weather, typed_weather),
+        ("news (10 articles)", as_bytes(news_payload()), legacy_news, typed_news),
+        ("exchange all_rates", as_bytes(exchange_payload()), legacy_rates, typed_rates),
+    ]
+
+    print(f"{'result type':<22}{'before B/entry':>16}{'after B/entry':>16}{'saving':>10}")
+    for name, body, before, after in scenarios:
+        old = bytes_per_entry(body, before, args.entries)
+        new = bytes_per_entry(body, after, args.entries)
+        print(f"{name:<22}{old:>16,.0f}{new:>16,.0f}{1 - new / old:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
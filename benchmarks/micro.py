@@ -0,0 +1,221 @@
+"""
+CPU Microbenchmarks
+===================
+
+Measures the CPU time and memory each of our own code paths costs per call,
+with upstream APIs answered instantly from memory, so network latency can't
+hide a regression in the code we control:
+
+- ``weather``        WeatherAPI.get_weather: request building + response shaping
+- ``news``           NewsAPI.search_news: shaping, index update, de-duplication
+- ``exchange``       ExchangeRateAPI.get_exchange_rate: rate table + conversion
+- ``forecast``       ForecastAPI.get_forecast: columnar parsing + daily stats
+- ``research``       DemoAPIOrchestrator.research_travel_destination end to end
+- ``serialize``      FastAPI's encoding of a /research response body
+
+Caches are cleared before every call so each one takes the full path. For
+each scenario we report the best mean CPU time over several rounds (the
+least noisy estimate) and the peak traced memory of one call.
+
+Results can be saved as a baseline and later runs compared against it;
+any scenario slower than the threshold exits with status 1. Baselines are
+machine-specific, so keep them on the machine (or CI runner) that made them.
+
+Usage:
+    python -m benchmarks.micro --save            # record benchmarks/baseline.json
+    python -m benchmarks.micro                   # compare against it
+    python -m benchmarks.micro --threshold 0.1 --only weather news
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from api import clients
+from api.clients import DemoAPIOrchestrator, ExchangeRateAPI, ForecastAPI, NewsAPI, WeatherAPI
+from api.keys import KeyPool
+from api.transport import install_client
+from benchmarks.payloads import (
+    as_bytes, exchange_payload, forecast_payload, news_payload, weather_payload
+)
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+SCENARIOS = ("weather", "news", "exchange", "forecast", "research", "serialize")
+
+# Encoded once, so the stub transport costs only a bytes copy per call
+_BODIES = {
+    "forecast": as_bytes(forecast_payload()),
+    "weather": as_bytes(weather_payload()),
+    "news": as_bytes(news_payload()),
+    "exchange": as_bytes(exchange_payload()),
+}
+
+
+def _stub_upstream(request: httpx.Request) -> httpx.Response:
+    """In-memory stand-in for every provider, with zero latency"""
+    url = str(request.url)
+    if "/forecast" in url:
+        body = _BODIES["forecast"]
+    elif "openweathermap" in url:
+        body = _BODIES["weather"]
+    elif "newsapi" in url:
+        body = _BODIES["news"]
+    else:
+        body = _BODIES["exchange"]
+    return httpx.Response(200, content=body, headers={"content-type": "application/json"})
+
+
+def _offline(client: Any) -> Any:
+    """Give a client an unmetered key so quotas never cut a run short"""
+    client.keys = KeyPool("benchmark", ["benchmark-key"])
+    return client
+
+
+def _clear(*api_clients: Any) -> None:
+    for client in api_clients:
+        client.cache.clear()
+        client.negative_cache.clear()
+
+
+def build_scenarios() -> Dict[str, Callable[[], Awaitable[Any]]]:
+    weather = _offline(WeatherAPI())
+    forecast = _offline(ForecastAPI())
+    news = _offline(NewsAPI())
+    exchange = _offline(ExchangeRateAPI())
+
+    orchestrator = DemoAPIOrchestrator()
+    orchestrator.weather_api = _offline(orchestrator.weather_api)
+    orchestrator.news_api = _offline(orchestrator.news_api)
+    orchestrator.exchange_api = _offline(orchestrator.exchange_api)
+    research_clients = (orchestrator.weather_api, orchestrator.news_api, orchestrator.exchange_api)
+
+    async def weather_call():
+        _clear(weather)
+        return await weather.get_weather("Tokyo")
+
+    async def news_call():
+        _clear(news)
+        return await news.search_news("Tokyo travel", page_size=5, mode="remote")
+
+    async def exchange_call():
+        _clear(exchange)
+        return await exchange.get_exchange_rate("USD", "EUR")
+
+    async def forecast_call():
+        _clear(forecast)
+        return await forecast.get_forecast("Tokyo", 5)
+
+    async def research_call():
+        _clear(*research_clients)
+        return await orchestrator.research_travel_destination("Tokyo", "EUR")
+
+    research_body: Dict[str, Any] = {}
+
+    async def serialize_call():
+        if not research_body:
+            research_body.update({
+                "success": True,
+                "data": await research_call(),
+                "apis_used": ["OpenWeatherMap", "NewsAPI", "ExchangeRate-API"],
+                "processing_type": "parallel_async"
+            })
+        # What FastAPI does with an endpoint's return value
+        return JSONResponse(jsonable_encoder(research_body)).body
+
+    return {
+        "weather": weather_call,
+        "news": news_call,
+        "exchange": exchange_call,
+        "forecast": forecast_call,
+        "research": research_call,
+        "serialize": serialize_call,
+    }
+
+
+async def measure(call: Callable[[], Awaitable[Any]], iterations: int, rounds: int) -> Dict[str, float]:
+    """Best mean CPU time per call (µs) and peak traced memory of one call (KiB)"""
+    for _ in range(max(iterations // 10, 1)):
+        await call()
+
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.process_time()
+        for _ in range(iterations):
+            await call()
+        best = min(best, (time.process_time() - started) / iterations)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await call()
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+
+    return {"cpu_us": round(best * 1e6, 1), "peak_kib": round(peak / 1024, 1)}
+
+
+async def run(names: List[str], iterations: int, rounds: int) -> Dict[str, Dict[str, float]]:
+    install_client(httpx.AsyncClient(transport=httpx.MockTransport(_stub_upstream)))
+    scenarios = build_scenarios()
+    return {name: await measure(scenarios[name], iterations, rounds) for name in names}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> bool:
+    """Print results next to the baseline; True if nothing regressed"""
+    ok = True
+    print(f"{'scenario':<12}{'CPU µs/call':>14}{'baseline':>12}{'change':>9}{'peak KiB':>11}{'baseline':>10}")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<12}{result['cpu_us']:>14,.1f}{'-':>12}{'-':>9}{result['peak_kib']:>11,.1f}{'-':>10}")
+            continue
+        change = result["cpu_us"] / before["cpu_us"] - 1
+        memory_change = result["peak_kib"] / max(before["peak_kib"], 0.1) - 1
+        regressed = change > threshold or memory_change > threshold
+        ok = ok and not regressed
+        print(
+            f"{name:<12}{result['cpu_us']:>14,.1f}{before['cpu_us']:>12,.1f}{change:>+9.0%}"
+            f"{result['peak_kib']:>11,.1f}{before['peak_kib']:>10,.1f}  {'REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--iterations", type=int, default=200, help="calls per round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per scenario (best is kept)")
+    parser.add_argument("--only", nargs="+", metavar="SCENARIO", help="run only these scenarios")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline file")
+    parser.add_argument("--save", action="store_true", help="save results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    # The clients' console logging is not what we're measuring
+    clients.console.quiet = True
+
+    names = args.only or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(names, args.iterations, args.rounds))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    ok = compare(results, baseline, args.threshold)
+    if args.save:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"\nBaseline saved to {args.baseline}")
+    elif not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
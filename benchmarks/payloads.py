@@ -0,0 +1,144 @@
+"""
+Canned Upstream Payloads
+========================
+
+Realistic response bodies for OpenWeatherMap, NewsAPI and ExchangeRate-API,
+plus a streamed chat completion for the OpenAI-compatible summary stage.
+The benchmarks and tests use these so they can run offline, without API
+keys, and measure only the code we control.
+"""
+
+import json
+
+# ~160 currencies, like the real ExchangeRate-API "latest" response
+CURRENCIES = [
+    "USD", "AED", "AFN", "ALL", "AMD", "ANG", "AOA", "ARS", "AUD", "AWG",
+    "AZN", "BAM", "BBD", "BDT", "BGN", "BHD", "BIF", "BMD", "BND", "BOB",
+    "BRL", "BSD", "BTN", "BWP", "BYN", "BZD", "CAD", "CDF", "CHF", "CLP",
+    "CNY", "COP", "CRC", "CUP", "CVE", "CZK", "DJF", "DKK", "DOP", "DZD",
+    "EGP", "ERN", "ETB", "EUR", "FJD", "FKP", "FOK", "GBP", "GEL", "GGP",
+    "GHS", "GIP", "GMD", "GNF", "GTQ", "GYD", "HKD", "HNL", "HRK", "HTG",
+    "HUF", "IDR", "ILS", "IMP", "INR", "IQD", "IRR", "ISK", "JEP", "JMD",
+    "JOD", "JPY", "KES", "KGS", "KHR", "KID", "KMF", "KRW", "KWD", "KYD",
+    "KZT", "LAK", "LBP", "LKR", "LRD", "LSL", "LYD", "MAD", "MDL", "MGA",
+    "MKD", "MMK", "MNT", "MOP", "MRU", "MUR", "MVR", "MWK", "MXN", "MYR",
+    "MZN", "NAD", "NGN", "NIO", "NOK", "NPR", "NZD", "OMR", "PAB", "PEN",
+    "PGK", "PHP", "PKR", "PLN", "PYG", "QAR", "RON", "RSD", "RUB", "RWF",
+    "SAR", "SBD", "SCR", "SDG", "SEK", "SGD", "SHP", "SLE", "SLL", "SOS",
+    "SRD", "SSP", "STN", "SYP", "SZL", "THB", "TJS", "TMT", "TND", "TOP",
+    "TRY", "TTD", "TVD", "TWD", "TZS", "UAH", "UGX", "UYU", "UZS", "VES",
+    "VND", "VUV", "WST", "XAF", "XCD", "XDR", "XOF", "XPF", "YER", "ZAR",
+    "ZMW", "ZWL",
+]
+
+
+def weather_payload(city: str = "Tokyo") -> dict:
+    return {
+        "coord": {"lon": 139.6917, "lat": 35.6895},
+        "weather": [{"id": 803, "main": "Clouds", "description": "broken clouds", "icon": "04d"}],
+        "base": "stations",
+        "main": {
+            "temp": 18.42, "feels_like": 17.96, "temp_min": 16.9, "temp_max": 19.71,
+            "pressure": 1014, "humidity": 68,
+        },
+        "visibility": 10000,
+        "wind": {"speed": 4.12, "deg": 170},
+        "clouds": {"all": 75},
+        "dt": 1760852400,
+        "sys": {"type": 2, "id": 268395, "country": "JP", "sunrise": 1760820000, "sunset": 1760860800},
+        "timezone": 32400,
+        "id": 1850147,
+        "name": city,
+        "cod": 200,
+    }
+
+
+NEWS_TOPICS = [
+    ("rail pass prices rise for foreign visitors", "Operators confirmed the new fares take effect next spring"),
+    ("new museum district opens along the waterfront", "Three galleries and a public park welcomed their first guests"),
+    ("hotel occupancy hits a five-year high", "Industry figures show weekend rooms selling out weeks ahead"),
+    ("airport adds late-night flights to Europe", "Two carriers announced extra departures for the winter season"),
+    ("street food market wins heritage status", "Vendors say the recognition will protect family recipes"),
+    ("cherry blossom forecast moved earlier", "Meteorologists expect the first blooms a week ahead of average"),
+    ("tourist tax proposal divides local council", "Supporters want the revenue spent on crowded historic sites"),
+    ("night trains return after a decade", "Sleeper services will link the capital with mountain resorts"),
+    ("cruise terminal expansion approved", "The larger terminal can handle two ships docking at once"),
+    ("cycling lanes extended across the old town", "Officials hope fewer taxis will ease congestion for visitors"),
+]
+
+
+def news_payload(query: str = "Tokyo travel", count: int = 10) -> dict:
+    articles = []
+    for i in range(count):
+        headline, summary = NEWS_TOPICS[i % len(NEWS_TOPICS)]
+        articles.append({
+            "source": {"id": None, "name": f"Outlet {i}"},
+            "author": f"Reporter {i}",
+            "title": f"{query.split()[0]} {headline}",
+            "description": f"{summary}, according to reports published this week ({i}).",
+            "url": f"https://news.example.com/{query.replace(' ', '-').lower()}/{i}",
+            "urlToImage": f"https://img.example.com/{i}.jpg",
+            "publishedAt": f"2026-10-{(i % 28) + 1:02d}T08:00:00Z",
+            "content": "Lorem ipsum dolor sit amet " * 8,
+        })
+    return {"status": "ok", "totalResults": 1200, "articles": articles}
+
+
+def exchange_payload(base: str = "USD") -> dict:
+    rates = {code: round(1.0 + position * 0.731, 4) for position, code in enumerate(CURRENCIES)}
+    rates[base] = 1
+    return {
+        "result": "success",
+        "time_last_update_unix": 1760832001,
+        "time_last_update_utc": "Sun, 19 Oct 2026 00:00:01 +0000",
+        "base_code": base,
+        "conversion_rates": rates,
+    }
+
+
+def as_bytes(payload: dict) -> bytes:
+    """Serialize a payload the way it arrives over the wire"""
+    return json.dumps(payload).encode()
+
+
+def forecast_payload(city: str = "Tokyo", start: int = 1760832000) -> dict:
+    """40 three-hourly readings, as returned by OpenWeatherMap /forecast"""
+    readings = []
+    for step in range(40):
+        hour = (step * 3) % 24
+        readings.append({
+            "dt": start + step * 10800,
+            "main": {
+                "temp": 14.0 + 6.0 * (1 - abs(hour - 14) / 14) + (step // 8) * 0.8,
+                "temp_min": 13.0 + (step // 8) * 0.8,
+                "temp_max": 21.0 + (step // 8) * 0.8,
+                "humidity": 60 + (step % 8) * 3,
+            },
+            "weather": [{"id": 500 if step // 8 == 2 else 800, "description": "light rain" if step // 8 == 2 else "clear sky"}],
+            "wind": {"speed": 2.0 + (step % 5)},
+            "pop": 0.8 if step // 8 == 2 else 0.05,
+            "rain": {"3h": 1.2} if step // 8 == 2 else {},
+            "dt_txt": "",
+        })
+    return {
+        "cod": "200",
+        "cnt": len(readings),
+        "list": readings,
+        "city": {"name": city, "country": "JP", "timezone": 32400},
+    }
+
+
+def chat_stream_payload(text: str = "Pack a light jacket.", done: bool = True, model: str = "stand-in") -> bytes:
+    """An OpenAI-compatible /chat/completions stream: one server-sent event per word"""
+    events = []
+    for i, word in enumerate(text.split(" ")):
+        chunk = {
+            "id": "chatcmpl-stand-in",
+            "object": "chat.completion.chunk",
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+        }
+        events.append(f"data: {json.dumps(chunk)}\n\n")
+    if done:
+        events.append("data: [DONE]\n\n")
+    return "".join(events).encode()
@@ -0,0 +1,278 @@
+"""
+Soak Test
+=========
+
+Drives the whole app in-process at a steady request rate for a long time and
+watches its memory, to catch slow leaks that never show up in a short run.
+
+- Requests go through the real FastAPI app (middleware, endpoints, clients,
+  caches) via an ASGI transport; upstream APIs are answered by an in-memory
+  stand-in, so a run needs no network or API keys.
+- The run happens inside the app's lifespan, so the background services
+  (prefetcher, loop monitor, continuous stack sampler, connection
+  pre-warming) run too - long-lived tasks are where slow leaks hide.
+- The traffic mix covers ``/research`` and the error paths in the clients:
+  unknown cities (404), provider failures (500), rate limiting (429),
+  connection errors, timeouts and unsupported currencies.
+- Cities are drawn from a pool larger than the caches, so caches fill up and
+  start evicting - bounded structures should then stop growing.
+- Every snapshot interval, a ``tracemalloc`` snapshot and an RSS sample are
+  taken. After the warm-up, the report lists the allocation sites that grew,
+  and flags the ones that grew in every interval. Tracing is expensive, so
+  the achieved request rate is reported too; keep ``--frames`` small.
+
+The run fails (exit status 1) if traced memory grew by more than
+``--max-growth-mb`` between the end of warm-up and the end of the run, or
+RSS by more than ``--max-rss-growth-mb`` when that is given. It also fails
+if the achieved request rate falls below ``--min-rate-ratio`` of
+``--rate``: a run that couldn't generate its load says little about
+memory under that load.
+
+Usage:
+    python -m benchmarks.soak --duration 14400 --rate 50
+    python -m benchmarks.soak --duration 300 --warmup 60 --snapshot-every 30   # quick check
+"""
+
+import os
+
+# Settings are read at import time: configure keys and quiet logging first
+os.environ.setdefault("OPENWEATHER_API_KEY", "soak-key")
+os.environ.setdefault("NEWS_API_KEY", "soak-key")
+os.environ.setdefault("EXCHANGE_RATE_API_KEY", "soak-key")
+os.environ.setdefault("REQUEST_LOGGING", "false")
+os.environ.setdefault("PROFILING_ENABLED", "true")  # so the continuous sampler runs too
+
+import argparse
+import asyncio
+import random
+import resource
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import List, Optional, Tuple
+
+import httpx
+
+from api.app import app
+from api.keys import all_pools
+from api.transport import install_client
+from benchmarks.payloads import exchange_payload, forecast_payload, news_payload, weather_payload
+
+def _rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc isn't available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _stand_in(request: httpx.Request) -> httpx.Response:
+    """Local upstream: canned payloads, plus failures keyed off the city name"""
+    if request.method == "HEAD":
+        return httpx.Response(200)  # connection pre-warming at startup
+    url = str(request.url)
+    city = request.url.params.get("q", "")
+    if city.startswith("Offline"):
+        raise httpx.ConnectError("connection refused", request=request)
+    if city.startswith("Slow"):
+        raise httpx.ReadTimeout("timed out", request=request)
+    if city.startswith("Nowhere"):
+        return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+    if city.startswith("Broken"):
+        return httpx.Response(500, json={"cod": "500", "message": "internal error"})
+    if city.startswith("Busy"):
+        return httpx.Response(429, json={"cod": 429, "message": "rate limited"}, headers={"retry-after": "0"})
+    if "/forecast" in url:
+        return httpx.Response(200, json=forecast_payload(city))
+    if "openweathermap" in url:
+        return httpx.Response(200, json=weather_payload(city))
+    if "newsapi" in url:
+        return httpx.Response(200, json=news_payload(city))
+    if url.endswith("/XXX"):
+        return httpx.Response(404, json={"result": "error", "error-type": "unsupported-code"})
+    return httpx.Response(200, json=exchange_payload(url.rsplit("/", 1)[-1]))
+
+
+def _traffic(cities: int) -> Tuple[str, str, Optional[dict]]:
+    """One request from the mix: (method, path, JSON body)"""
+    city = f"City{random.randrange(cities)}"
+    roll = random.random()
+    if roll < 0.40:
+        return "POST", "/research", {"city": city, "currency": random.choice(["EUR", "JPY", "GBP"])}
+    if roll < 0.55:
+        return "GET", f"/weather/{city}", None
+    if roll < 0.62:
+        return "GET", f"/forecast/{city}?days=3", None
+    if roll < 0.70:
+        return "GET", f"/ask?q=weather and news for {city}", None
+    # Error paths
+    failure = random.choice(["Nowhere", "Broken", "Busy", "Offline", "Slow"])
+    if roll < 0.85:
+        return "GET", f"/weather/{failure}{random.randrange(cities)}", None
+    if roll < 0.95:
+        return "POST", "/research", {"city": f"{failure}{random.randrange(cities)}", "currency": "EUR"}
+    return "GET", "/exchange?from_currency=XXX&to_currency=EUR", None
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    """Snapshot of the app's allocations, without tracemalloc's own"""
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+class Sample:
+    __slots__ = ("elapsed", "requests", "traced_mb", "rss_mb", "snapshot")
+
+    def __init__(self, elapsed: float, requests: int, snapshot: tracemalloc.Snapshot):
+        self.elapsed = elapsed
+        self.requests = requests
+        self.traced_mb = tracemalloc.get_traced_memory()[0] / 2 ** 20
+        self.rss_mb = _rss_mb()
+        self.snapshot = snapshot
+
+
+async def soak(args: argparse.Namespace) -> List[Sample]:
+    install_client(httpx.AsyncClient(transport=httpx.MockTransport(_stand_in)))
+    for pool in all_pools():
+        pool.quota = None  # the stand-in has no quota
+
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://soak")
+    statuses: Counter = Counter()
+    in_flight: set = set()
+    samples: List[Sample] = []
+
+    async def one() -> None:
+        method, path, body = _traffic(args.cities)
+        try:
+            # Spread over several consumers so per-consumer rate limits don't kick in
+            headers = {"X-Client-ID": f"soak-{random.randrange(args.consumers)}"}
+            response = await client.request(method, path, json=body, headers=headers)
+            statuses[response.status_code] += 1
+        except Exception as e:  # a crash in the app is a finding, not a reason to stop
+            statuses[type(e).__name__] += 1
+
+    tracemalloc.start(args.frames)
+    # Start the app's background services, as a server would
+    async with app.router.lifespan_context(app):
+        started = time.monotonic()
+        next_sample = started + args.warmup
+        interval = 1.0 / args.rate
+        next_request = started
+        print(f"{'elapsed s':>10}{'requests':>10}{'traced MB':>11}{'RSS MB':>9}  statuses")
+        while True:
+            now = time.monotonic()
+            if now - started >= args.duration:
+                break
+            if now >= next_sample:
+                samples.append(Sample(now - started, sum(statuses.values()), _snapshot()))
+                last = samples[-1]
+                print(
+                    f"{last.elapsed:>10.0f}{last.requests:>10}{last.traced_mb:>11.1f}{last.rss_mb:>9.1f}  "
+                    f"{dict(sorted(statuses.items(), key=str))}"
+                )
+                next_sample += args.snapshot_every
+            if len(in_flight) < args.max_in_flight:
+                task = asyncio.ensure_future(one())
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            next_request += interval
+            await asyncio.sleep(max(next_request - time.monotonic(), 0))
+
+        await asyncio.gather(*in_flight)
+        samples.append(Sample(time.monotonic() - started, sum(statuses.values()), _snapshot()))
+    tracemalloc.stop()
+    await client.aclose()
+    return samples
+
+
+def report(
+    samples: List[Sample],
+    max_growth_mb: float,
+    max_rss_growth_mb: Optional[float],
+    top: int,
+    target_rate: float,
+    min_rate_ratio: float
+) -> bool:
+    """Print growth since warm-up; True if within the thresholds and the load was generated"""
+    if len(samples) < 2:
+        print("Run too short: need at least two snapshots after warm-up")
+        return False
+
+    first, last = samples[0], samples[-1]
+    rate = (last.requests - first.requests) / max(last.elapsed - first.elapsed, 1e-9)
+    print(f"\nAchieved rate after warm-up: {rate:.1f} requests/s (target {target_rate:g}, {rate / target_rate:.0%})")
+    growth = last.traced_mb - first.traced_mb
+    hours = max((last.elapsed - first.elapsed) / 3600, 1e-9)
+    print(f"Traced memory: {first.traced_mb:.1f} -> {last.traced_mb:.1f} MB ({growth:+.2f} MB, {growth / hours:+.2f} MB/h)")
+    print(f"RSS:           {first.rss_mb:.1f} -> {last.rss_mb:.1f} MB ({last.rss_mb - first.rss_mb:+.2f} MB)")
+
+    # Sites that grew in every interval are the leak suspects
+    steadily_growing = None
+    for before, after in zip(samples, samples[1:]):
+        grew = {
+            stat.traceback for stat in after.snapshot.compare_to(before.snapshot, "traceback")
+            if stat.size_diff > 0
+        }
+        steadily_growing = grew if steadily_growing is None else steadily_growing & grew
+
+    print(f"\nTop {top} allocation sites by growth since warm-up:")
+    for stat in last.snapshot.compare_to(first.snapshot, "traceback")[:top]:
+        if stat.size_diff <= 0:
+            break
+        marker = "  [grew every interval]" if stat.traceback in (steadily_growing or ()) else ""
+        print(f"  {stat.size_diff / 1024:>+10.1f} KiB {stat.count_diff:>+8} blocks{marker}")
+        # Innermost frame first
+        for frame in reversed(stat.traceback):
+            print(f"      {frame.filename}:{frame.lineno}")
+
+    ok = growth <= max_growth_mb
+    print(f"\n{'PASS' if ok else 'FAIL'}: traced growth {growth:+.2f} MB (limit {max_growth_mb} MB)")
+    rate_ok = rate >= min_rate_ratio * target_rate
+    print(
+        f"{'PASS' if rate_ok else 'FAIL'}: achieved {rate:.1f} of {target_rate:g} requests/s "
+        f"(at least {min_rate_ratio:.0%} required"
+        f"{'' if rate_ok else '; lower --rate, raise --max-in-flight or use fewer --frames'})"
+    )
+    ok = ok and rate_ok
+    if max_rss_growth_mb is not None:
+        rss_growth = last.rss_mb - first.rss_mb
+        rss_ok = rss_growth <= max_rss_growth_mb
+        print(f"{'PASS' if rss_ok else 'FAIL'}: RSS growth {rss_growth:+.2f} MB (limit {max_rss_growth_mb} MB)")
+        ok = ok and rss_ok
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--duration", type=float, default=3600, help="seconds to run")
+    parser.add_argument("--rate", type=float, default=50, help="requests started per second")
+    parser.add_argument("--warmup", type=float, default=300, help="seconds before the first snapshot")
+    parser.add_argument("--snapshot-every", type=float, default=300, help="seconds between snapshots")
+    parser.add_argument("--cities", type=int, default=3000, help="distinct cities in the traffic mix")
+    parser.add_argument("--consumers", type=int, default=50, help="distinct client IDs the traffic comes from")
+    parser.add_argument("--max-in-flight", type=int, default=200, help="cap on concurrent requests")
+    parser.add_argument(
+        "--min-rate-ratio", type=float, default=0.8,
+        help="fail if the achieved rate is below this fraction of --rate"
+    )
+    parser.add_argument("--max-growth-mb", type=float, default=5.0, help="allowed traced growth after warm-up")
+    parser.add_argument(
+        "--max-rss-growth-mb", type=float, default=None,
+        help="also fail on RSS growth (off by default: allocator fragmentation makes it noisy)"
+    )
+    parser.add_argument(
+        "--frames", type=int, default=3,
+        help="stack depth recorded per allocation; deeper stacks slow the app down a lot"
+    )
+    parser.add_argument("--top", type=int, default=10, help="allocation sites to list")
+    args = parser.parse_args()
+
+    samples = asyncio.run(soak(args))
+    if not report(samples, args.max_growth_mb, args.max_rss_growth_mb, args.top, args.rate, args.min_rate_ratio):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
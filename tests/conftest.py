@@ -0,0 +1,70 @@
+"""
+Shared test setup
+
+Settings are read when api.config is first imported, so the environment
+is configured here before any test module imports the app.
+"""
+
+import os
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "test-key")
+os.environ.setdefault("NEWS_API_KEY", "test-key")
+os.environ.setdefault("EXCHANGE_RATE_API_KEY", "test-key")
+os.environ.setdefault("REQUEST_LOGGING", "false")
+os.environ.setdefault("LOOP_MONITOR_ENABLED", "false")
+os.environ.setdefault("PREWARM_ON_STARTUP", "false")
+os.environ.setdefault("PREFETCH_ENABLED", "false")
+os.environ.setdefault("ADMIN_TOKEN", "test-admin")
+
+import httpx
+import pytest
+
+from api import transport
+from benchmarks.payloads import chat_stream_payload, exchange_payload, forecast_payload, news_payload, weather_payload
+
+ADMIN_HEADERS = {"X-Admin-Token": "test-admin"}
+
+# OpenAI-compatible stand-in for the summary stage; point TripSummaryAPI's base_url here
+LLM_BASE_URL = "http://llm.test/v1"
+SUMMARY_TEXT = "Mild and sunny: pack light layers. Rates are steady."
+
+
+def _canned(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if url.startswith(LLM_BASE_URL):
+        return httpx.Response(
+            200, content=chat_stream_payload(SUMMARY_TEXT), headers={"Content-Type": "text/event-stream"}
+        )
+    city = request.url.params.get("q", "")
+    if city.startswith("Nowhere"):
+        return httpx.Response(404, json={"cod": "404", "message": "city not found"})
+    if "/forecast" in url:
+        return httpx.Response(200, json=forecast_payload(city))
+    if "openweathermap" in url:
+        return httpx.Response(200, json=weather_payload(city))
+    if "newsapi" in url:
+        return httpx.Response(200, json=news_payload(city))
+    return httpx.Response(200, json=exchange_payload(url.rsplit("/", 1)[-1]))
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Answer upstream calls with canned payloads; yields the requests made"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return _canned(request)
+
+    monkeypatch.setattr(transport, "_client", None)
+    monkeypatch.setattr(transport, "_build_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield requests
+
+
+@pytest.fixture
+def client(upstream):
+    """The app, without its lifespan (no background tasks), over mocked upstreams"""
+    from fastapi.testclient import TestClient
+
+    from api.app import app
+    return TestClient(app)
@@ -0,0 +1,107 @@
+import pytest
+
+from api.ask import AskError, PlanCache, normalize, parse
+
+
+def _plan(question):
+    return parse(normalize(question))
+
+
+@pytest.mark.parametrize("question, intents, subject", [
+    ("weather and news for Lisbon", ("weather", "news"), "Lisbon"),
+    ("What's the temperature in New York?", ("weather",), "New York"),
+    ("5 day forecast for Tokyo", ("forecast",), "Tokyo"),
+    ("plan a trip to Rome", ("weather", "news", "exchange"), "Rome"),
+    ("Berlin", ("weather", "news", "exchange"), "Berlin"),
+])
+def test_intents_and_subject(question, intents, subject):
+    plan = _plan(question)
+    assert plan.intents == intents
+    assert plan.subject == subject
+
+
+@pytest.mark.parametrize("question, subject", [
+    ("weather in São Paulo", "São Paulo"),
+    ("news about Zürich", "Zürich"),
+    ("Kraków forecast", "Kraków"),
+    ("weather in Reykjavík", "Reykjavík"),
+    ("weather 北京", "北京"),
+    ("weather in Москва", "Москва"),
+])
+def test_non_ascii_place_names_survive(question, subject):
+    assert _plan(question).subject == subject
+
+
+@pytest.mark.parametrize("question, intents, subject", [
+    ("Cold Spring weather", ("weather",), "Cold Spring"),
+    ("Hot Springs news", ("news",), "Hot Springs"),
+    ("how cold is Oslo", ("weather",), "Oslo"),
+    ("is it hot in Cairo right now", ("weather",), "Cairo"),
+])
+def test_hot_and_cold_are_weather_unless_they_start_a_name(question, intents, subject):
+    plan = _plan(question)
+    assert plan.intents == intents
+    assert plan.subject == subject
+
+
+def test_currencies_and_direction():
+    plan = _plan("convert GBP to JPY")
+    assert (plan.intents, plan.base, plan.target) == (("exchange",), "GBP", "JPY")
+    plan = _plan("news for Lisbon in euros")
+    assert plan.target == "EUR" and "exchange" in plan.intents
+    # Capitalised codes only: "all" is a word, "ALL" is the Albanian lek
+    assert normalize("all the news for Tirana") == "all news tirana"
+    assert _plan("weather in Tirana in ALL").target == "ALL"
+
+
+@pytest.mark.parametrize("question, base, target", [
+    ("convert 100 USD to EUR", "USD", "EUR"),
+    ("how much is 50 euros in dollars", "EUR", "USD"),
+    ("what is 20 pounds in yen", "GBP", "JPY"),
+])
+def test_amounts_next_to_a_currency_are_not_days(question, base, target):
+    plan = _plan(question)
+    assert (plan.intents, plan.base, plan.target) == (("exchange",), base, target)
+
+
+@pytest.mark.parametrize("question, intents, subject, days", [
+    ("news about the 2026 world cup", ("news",), "2026 World Cup", 5),
+    ("5 day forecast for Tokyo", ("forecast",), "Tokyo", 5),
+    ("weather in Oslo for 3 days", ("weather", "forecast"), "Oslo", 3),
+    ("forecast 2 Lima", ("forecast",), "Lima", 2),
+])
+def test_numbers_are_days_only_next_to_a_forecast_word(question, intents, subject, days):
+    plan = _plan(question)
+    assert (plan.intents, plan.subject, plan.days) == (intents, subject, days)
+
+
+def test_forecast_days_are_clamped():
+    assert _plan("forecast for Oslo 30 days").days == 6
+
+
+def test_questions_without_a_place_are_rejected():
+    with pytest.raises(AskError):
+        _plan("what's the weather?")
+    with pytest.raises(AskError):
+        PlanCache().plan_for("please")
+
+
+def test_similar_phrasings_share_a_cached_plan():
+    cache = PlanCache()
+    first = cache.plan_for("What's the weather in Lisbon?")
+    second = cache.plan_for("weather for lisbon please")
+    assert first[0] == second[0]
+    assert not first[2] and second[2]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ask_endpoint_answers_amount_questions(client):
+    response = client.get("/ask", params={"q": "convert 100 USD to EUR"})
+    assert response.status_code == 200
+    assert response.json()["plan"]["intents"] == ["exchange"]
+
+
+def test_ask_endpoint_handles_non_latin_cities(client):
+    response = client.get("/ask", params={"q": "weather 北京"})
+    assert response.status_code == 200
+    assert response.json()["plan"]["subject"] == "北京"
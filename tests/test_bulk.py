@@ -0,0 +1,85 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from api import bulk
+from api.bulk import CheckpointError, completed_rows, read_rows, research_all
+from api.scheduler import current_priority
+
+
+def test_read_rows_from_csv(tmp_path):
+    path = tmp_path / "in.csv"
+    path.write_text("city,currency\nLisbon,eur\n,USD\nTokyo,\n")
+    assert list(read_rows(path)) == [(0, "Lisbon", "EUR"), (2, "Tokyo", "USD")]
+
+
+def test_read_rows_skips_a_byte_order_mark(tmp_path):
+    path = tmp_path / "excel.csv"
+    path.write_text("city,currency\nLisbon,eur\n", encoding="utf-8-sig")
+    assert list(read_rows(path)) == [(0, "Lisbon", "EUR")]
+
+    path = tmp_path / "in.json"
+    path.write_text('[{"city": "Tokyo"}]', encoding="utf-8-sig")
+    assert list(read_rows(path)) == [(0, "Tokyo", "USD")]
+
+
+def test_read_rows_from_jsonl(tmp_path):
+    path = tmp_path / "in.jsonl"
+    path.write_text('{"city": "Lisbon", "currency": "EUR"}\n\n{"city": "Tokyo"}\n')
+    assert list(read_rows(path)) == [(0, "Lisbon", "EUR"), (1, "Tokyo", "USD")]
+
+
+def test_read_rows_from_json_array(tmp_path):
+    path = tmp_path / "in.json"
+    path.write_text(json.dumps([{"city": "Lisbon", "currency": "EUR"}, {"city": "Tokyo"}], indent=2))
+    assert list(read_rows(path)) == [(0, "Lisbon", "EUR"), (1, "Tokyo", "USD")]
+
+    path.write_text('{"city": "Lisbon"}')
+    with pytest.raises(ValueError):
+        list(read_rows(path))
+
+
+def _record(row, ok=True):
+    return json.dumps({"row": row, "ok": ok}) + "\n"
+
+
+def test_completed_rows_trims_only_a_partial_final_line(tmp_path):
+    path = tmp_path / "out.jsonl"
+    path.write_text(_record(0) + _record(1, ok=False) + '{"row": 2, "o')
+    assert completed_rows(path) == {0, 1}
+    assert path.read_text() == _record(0) + _record(1, ok=False)
+    assert completed_rows(path, retry_errors=True) == {0}
+
+
+def test_completed_rows_refuses_a_damaged_line_mid_file(tmp_path):
+    path = tmp_path / "out.jsonl"
+    content = _record(0) + "garbage\n" + _record(2)
+    path.write_text(content)
+    with pytest.raises(CheckpointError):
+        completed_rows(path)
+    assert path.read_text() == content
+
+
+def test_completed_rows_without_output_file(tmp_path):
+    assert completed_rows(tmp_path / "missing.jsonl") == set()
+
+
+class _FakeOrchestrator:
+    async def research_travel_destination(self, city, currency):
+        if city == "Nowhere":
+            return {"weather": {"error": "City not found"}}
+        return {"weather": {"city": city, "priority": current_priority()}}
+
+
+def test_research_all_skips_done_rows_and_runs_as_batch(monkeypatch):
+    monkeypatch.setattr(bulk, "DemoAPIOrchestrator", _FakeOrchestrator)
+    rows = iter([(0, "Lisbon", "EUR"), (1, "Nowhere", "USD"), (2, "Tokyo", "JPY")])
+    output = io.StringIO()
+    stats = asyncio.run(research_all(rows, output, skip={2}, concurrency=2))
+    assert stats == {"done": 2, "failed": 1, "skipped": 1}
+
+    records = {record["row"]: record for record in map(json.loads, output.getvalue().splitlines())}
+    assert records[0]["ok"] and records[0]["result"]["weather"]["priority"] == "batch"
+    assert not records[1]["ok"]
@@ -0,0 +1,129 @@
+import asyncio
+from collections import Counter
+
+import httpx
+import pytest
+
+import api.app
+from api import transport
+from api.cluster import TOKEN_HEADER, Cluster, HashRing
+from api.scheduler import PRIORITY_HEADER, current_priority, priority
+
+MEMBERS = [f"http://10.0.0.{i}:8000" for i in range(1, 5)]
+KEYS = [f"weather:city{i}" for i in range(4000)]
+
+
+def test_ring_spreads_keys_across_members():
+    ring = HashRing(MEMBERS, vnodes=128)
+    counts = Counter(ring.owner(key) for key in KEYS)
+    assert set(counts) == set(MEMBERS)
+    assert min(counts.values()) > len(KEYS) / len(MEMBERS) * 0.6
+
+
+def test_ring_moves_only_the_joining_members_share():
+    ring = HashRing(MEMBERS, vnodes=128)
+    before = {key: ring.owner(key) for key in KEYS}
+    ring.add("http://10.0.0.9:8000")
+    moved = [key for key in KEYS if ring.owner(key) != before[key]]
+    assert all(ring.owner(key) == "http://10.0.0.9:8000" for key in moved)
+    assert len(moved) < len(KEYS) * 0.35
+
+    ring.remove("http://10.0.0.9:8000")
+    assert {key: ring.owner(key) for key in KEYS} == before
+
+
+def test_owners_lists_each_member_once_in_ring_order():
+    ring = HashRing(MEMBERS, vnodes=16)
+    owners = list(ring.owners("weather:lisbon"))
+    assert sorted(owners) == sorted(MEMBERS)
+    assert owners[0] == ring.owner("weather:lisbon")
+    assert HashRing().owner("anything") is None
+
+
+def test_clustering_needs_self_members_and_token():
+    assert not Cluster(None, MEMBERS, token="t").enabled
+    assert not Cluster(MEMBERS[0], [], token="t").enabled
+    assert not Cluster(MEMBERS[0], MEMBERS).enabled
+    assert Cluster(MEMBERS[0], MEMBERS, token="t").enabled
+    assert Cluster(MEMBERS[0], MEMBERS).owns("any key")
+
+
+def _forwarding(monkeypatch, handler):
+    monkeypatch.setattr(transport, "_client", None)
+    monkeypatch.setattr(transport, "_build_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    cluster = Cluster(MEMBERS[0], MEMBERS, token="secret", down_cooldown=30)
+    key = next(key for key in KEYS if cluster.owner(key) != MEMBERS[0])
+    return cluster, key
+
+
+def test_route_forwards_to_owner_with_token(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"city": "Lisbon"})
+
+    cluster, key = _forwarding(monkeypatch, handler)
+    result = asyncio.run(cluster.route("weather", key, {"city": "Lisbon"}))
+    assert result == {"city": "Lisbon"}
+    assert seen[0].headers[TOKEN_HEADER] == "secret"
+    assert str(seen[0].url).startswith(cluster.owner(key))
+
+
+def test_unreachable_owner_is_skipped_for_a_cooldown(monkeypatch):
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    cluster, key = _forwarding(monkeypatch, handler)
+    owner = cluster.owner(key)
+    assert asyncio.run(cluster.route("weather", key, {"city": "Lisbon"})) is None
+    assert cluster.owner(key) != owner
+    assert cluster.stats["forward_failed"] == 1
+
+
+@pytest.fixture
+def clustered(monkeypatch):
+    cluster = Cluster(MEMBERS[0], MEMBERS, token="secret")
+    monkeypatch.setattr(api.app, "cluster", cluster)
+    return cluster
+
+
+def test_lookup_route_is_hidden_when_clustering_is_off(client):
+    response = client.post("/cluster/lookup", json={"source": "weather", "params": {"city": "Lisbon"}})
+    assert response.status_code == 404
+
+
+def test_lookup_route_requires_the_cluster_token(client, clustered):
+    body = {"source": "weather", "params": {"city": "Lisbon"}}
+    assert client.post("/cluster/lookup", json=body).status_code == 403
+    assert client.post("/cluster/lookup", json=body, headers={TOKEN_HEADER: "guess"}).status_code == 403
+    response = client.post("/cluster/lookup", json=body, headers={TOKEN_HEADER: "secret"})
+    assert response.status_code == 200
+    assert response.json()["city"] == "Lisbon"
+
+
+def test_route_forwards_the_callers_priority(monkeypatch):
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={})
+
+    cluster, key = _forwarding(monkeypatch, handler)
+
+    async def refresh():
+        with priority("background"):
+            await cluster.route("weather", key, {"city": "Lisbon"})
+
+    asyncio.run(refresh())
+    assert seen[0].headers[PRIORITY_HEADER] == "background"
+
+
+def test_lookup_runs_at_the_forwarded_priority(client, clustered, monkeypatch):
+    async def serve(params):
+        return {"priority": current_priority()}
+
+    monkeypatch.setitem(api.app.CLUSTER_SOURCES, "weather", serve)
+    headers = {TOKEN_HEADER: "secret", PRIORITY_HEADER: "batch"}
+    response = client.post("/cluster/lookup", json={"source": "weather", "params": {}}, headers=headers)
+    assert response.json() == {"priority": "batch"}
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+import api.app
+from api.cluster import TOKEN_HEADER, Cluster
+from api.consumers import ConsumerRegistry, ConsumerRejected, parse_consumer_keys
+
+ORIGIN = {"Origin": "https://app.example"}
+
+
+def test_parse_consumer_keys():
+    assert parse_consumer_keys("k1:mobile:4, k2:partner") == {"k1": ("mobile", 4), "k2": ("partner", 1)}
+    assert parse_consumer_keys(None) == {}
+    with pytest.raises(ValueError):
+        parse_consumer_keys("k1")
+    with pytest.raises(ValueError):
+        parse_consumer_keys("k1:mobile:0")
+
+
+def test_identify_by_key_client_id_then_address():
+    registry = ConsumerRegistry({"k1": ("mobile", 2)}, rate=1, burst=2)
+    assert registry.identify("k1", "ignored", "10.0.0.1").name == "mobile"
+    assert registry.identify(None, "cli", "10.0.0.1").name == "client:cli"
+    assert registry.identify(None, None, "10.0.0.1").name == "ip:10.0.0.1"
+    with pytest.raises(ConsumerRejected):
+        registry.identify("unknown", None, None)
+
+    strict = ConsumerRegistry({}, rate=1, burst=2, require_key=True)
+    with pytest.raises(ConsumerRejected):
+        strict.identify(None, "cli", "10.0.0.1")
+
+
+def test_token_bucket_scales_with_weight(monkeypatch):
+    registry = ConsumerRegistry({"k1": ("heavy", 2)}, rate=1, burst=2)
+    light = registry.identify(None, "light", None)
+    heavy = registry.identify("k1", None, None)
+    assert [registry.admit(light) for _ in range(3)][:2] == [None, None]
+    assert [registry.admit(heavy) is None for _ in range(5)] == [True] * 4 + [False]
+
+    retry_after = registry.admit(light)
+    assert 0 < retry_after <= 1
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 1.1)
+    assert registry.admit(light) is None
+    assert light.rejected == 2
+
+
+def test_only_the_most_recent_consumers_are_kept():
+    registry = ConsumerRegistry({}, rate=1, burst=1, tracked=2)
+    for address in ("a", "b", "c"):
+        registry.identify(None, None, address)
+    usage = registry.usage()
+    assert usage["tracked"] == 2 and usage["forgotten"] == 1
+    assert {entry["consumer"] for entry in usage["consumers"]} == {"ip:b", "ip:c"}
+
+
+@pytest.fixture
+def strict(monkeypatch):
+    registry = ConsumerRegistry({"good-key": ("partner", 1)}, rate=0.001, burst=1, require_key=True)
+    monkeypatch.setattr(api.app, "consumers", registry)
+    return registry
+
+
+def test_preflight_is_answered_before_the_limiter(client, strict):
+    headers = {**ORIGIN, "Access-Control-Request-Method": "GET", "Access-Control-Request-Headers": "X-API-Key"}
+    response = client.options("/weather/Lisbon", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"]
+    assert not strict.usage()["consumers"]
+
+
+def test_rejections_carry_cors_headers(client, strict):
+    response = client.get("/weather/Lisbon", headers=ORIGIN)
+    assert response.status_code == 401
+    assert response.headers["access-control-allow-origin"]
+
+    keyed = {**ORIGIN, "X-API-Key": "good-key"}
+    assert client.get("/weather/Lisbon", headers=keyed).status_code == 200
+    response = client.get("/weather/Lisbon", headers=keyed)
+    assert response.status_code == 429
+    assert response.headers["retry-after"]
+    assert response.headers["access-control-allow-origin"]
+    assert "retry-after" in response.headers["access-control-expose-headers"].lower()
+
+
+def test_cluster_lookups_are_only_exempt_for_peers(client, strict, monkeypatch):
+    monkeypatch.setattr(api.app, "cluster", Cluster("http://a", ["http://b"], token="secret"))
+    body = {"source": "weather", "params": {"city": "Lisbon"}}
+    assert client.post("/cluster/lookup", json=body).status_code == 401
+    response = client.post("/cluster/lookup", json=body, headers={TOKEN_HEADER: "secret"})
+    assert response.status_code == 200
@@ -0,0 +1,48 @@
+import numpy as np
+
+from api.dedup import dedupe_and_rank, minhash_signatures, tokenize
+from api.models import Article
+
+
+def _article(title, description="", published_at="2026-01-01T00:00:00Z", source="Wire"):
+    return Article(title, source, None, description, None, published_at)
+
+
+def test_tokenize_keeps_non_ascii_words():
+    assert tokenize("São Paulo floods, Zürich 2026") == ["são", "paulo", "floods", "zürich", "2026"]
+    assert tokenize("北京 天气") == ["北京", "天气"]
+
+
+def test_signatures_are_deterministic_and_similar_for_similar_text():
+    text = "heavy rain floods the city centre as rivers burst their banks".split()
+    edited = text[:-1] + ["banks", "overnight"]
+    other = "central bank raises interest rates for the third time this year".split()
+    signatures = minhash_signatures([text, edited, other])
+    assert np.array_equal(signatures, minhash_signatures([text, edited, other]))
+    assert (signatures[0] == signatures[1]).mean() > (signatures[0] == signatures[2]).mean()
+
+
+def test_syndicated_copies_collapse_into_one_story():
+    story = "Heavy rain floods Lisbon city centre as the Tagus bursts its banks overnight"
+    articles = [
+        _article(story, "Streets closed and trains cancelled across the region.", source="A"),
+        _article(story, "Streets closed and trains cancelled across the region.", source="B"),
+        _article("Lisbon hosts tech summit", "Thousands of visitors expected this week."),
+    ]
+    kept, removed = dedupe_and_rank(articles, "Lisbon", limit=10)
+    assert removed == 1
+    assert len(kept) == 2
+    assert kept[0].source == "A"  # first copy of a story is kept, and syndication ranks it up
+
+
+def test_relevance_ranks_query_matches_first():
+    articles = [
+        _article("Markets close higher", "Stocks rally on earnings."),
+        _article("Tokyo weather turns cold", "Tokyo braces for snow."),
+    ]
+    kept, _ = dedupe_and_rank(articles, "Tokyo AND weather", limit=1)
+    assert kept[0].title.startswith("Tokyo")
+
+
+def test_empty_input():
+    assert dedupe_and_rank([], "anything", limit=5) == ([], 0)
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from api.engine import PlanError, ResearchPlan
+
+
+def _value(value, delay=0.0):
+    async def fetch(inputs):
+        await asyncio.sleep(delay)
+        return value
+    return fetch
+
+
+def _failing(inputs):
+    async def fail():
+        raise RuntimeError("boom")
+    return fail()
+
+
+def test_registration_rejects_unknown_dependencies_and_policies():
+    plan = ResearchPlan()
+    plan.add("a", _value(1))
+    with pytest.raises(PlanError):
+        plan.add("b", _value(2), depends_on=["missing"])
+    with pytest.raises(PlanError):
+        plan.add("a", _value(1))
+    with pytest.raises(PlanError):
+        plan.add("c", _value(3), on_error="ignore")
+
+
+def test_closure_follows_dependencies_in_registration_order():
+    plan = ResearchPlan()
+    plan.add("weather", _value(1))
+    plan.add("news", _value(2))
+    plan.add("exchange", _value(3))
+    plan.add("summary", _value(4), depends_on=["weather", "news"])
+    assert plan.closure(["summary"]) == ["weather", "news", "summary"]
+    assert plan.closure() == ["weather", "news", "exchange", "summary"]
+    with pytest.raises(PlanError):
+        plan.closure(["nope"])
+
+
+def test_dependents_receive_results_and_independent_sources_overlap():
+    plan = ResearchPlan()
+    plan.add("a", _value("A", delay=0.05))
+    plan.add("b", _value("B", delay=0.05))
+
+    async def combine(inputs):
+        return inputs["a"] + inputs["b"] + inputs["suffix"]
+
+    plan.add("ab", combine, depends_on=["a", "b"])
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        results = await plan.run({"suffix": "!"})
+        return results, asyncio.get_running_loop().time() - started
+
+    results, elapsed = asyncio.run(run())
+    assert results == {"a": "A", "b": "B", "ab": "AB!"}
+    assert elapsed < 0.09
+
+
+def test_record_policy_keeps_dependents_running():
+    plan = ResearchPlan()
+    plan.add("a", _failing)
+    plan.add("b", lambda inputs: _value(inputs["a"])(inputs), depends_on=["a"])
+    results = asyncio.run(plan.run({}))
+    assert results["a"] == {"error": "a failed: boom"}
+    assert results["b"] == {"error": "a failed: boom"}
+
+
+def test_skip_policy_skips_dependents_transitively():
+    plan = ResearchPlan()
+    plan.add("a", _value({"error": "down"}), on_error="skip")
+    plan.add("b", _value("B"), depends_on=["a"])
+    plan.add("c", _value("C"), depends_on=["b"])
+    results = asyncio.run(plan.run({}))
+    assert results["b"]["skipped"] and results["c"]["skipped"]
+
+
+def test_timeout_is_recorded_as_error():
+    plan = ResearchPlan()
+    plan.add("slow", _value("late", delay=1), timeout=0.01)
+    results = asyncio.run(plan.run({}))
+    assert "timed out" in results["slow"]["error"]
+
+
+def test_fail_policy_aborts_plan():
+    plan = ResearchPlan()
+    plan.add("a", _failing, on_error="fail")
+    plan.add("b", _value("B", delay=1))
+    with pytest.raises(PlanError):
+        asyncio.run(plan.run({}))
+
+
+def test_targets_limit_what_runs():
+    ran = []
+
+    def tracked(name):
+        async def fetch(inputs):
+            ran.append(name)
+            return name
+        return fetch
+
+    plan = ResearchPlan()
+    plan.add("a", tracked("a"))
+    plan.add("b", tracked("b"))
+    plan.add("c", tracked("c"), depends_on=["a"])
+    assert asyncio.run(plan.run({}, targets=["c"])) == {"a": "a", "c": "c"}
+    assert sorted(ran) == ["a", "c"]
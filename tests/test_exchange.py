@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.mark.parametrize("code", ["{x}", "{0}", "US}D", "US", "EURO", "12A"])
+def test_malformed_currency_codes_are_rejected_before_any_call(client, upstream, code):
+    for params in ({"from_currency": code}, {"to_currency": code}):
+        response = client.get("/exchange", params=params)
+        assert response.status_code == 400
+        assert "Invalid currency code" in response.json()["error"]
+    assert client.get("/exchange/changes", params={"base": code, "since_version": 1}).status_code == 400
+    assert client.get("/exchange/history", params={"base": "USD", "targets": code}).status_code == 400
+    assert upstream == []
+
+
+def test_research_with_a_malformed_currency_still_answers(client, upstream):
+    response = client.post("/research", json={"city": "Faro", "currency": "{0}"})
+    assert response.status_code == 200
+    assert response.json()["data"]["currency_info"]["status_code"] == 400
+
+
+def test_key_goes_into_the_exchange_path(client, upstream):
+    assert client.get("/exchange", params={"from_currency": "nok", "to_currency": "sek"}).status_code == 200
+    assert [str(request.url) for request in upstream] == [
+        "https://v6.exchangerate-api.com/v6/test-key/latest/NOK"
+    ]
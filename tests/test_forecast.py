@@ -0,0 +1,93 @@
+import asyncio
+import random
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import pytest
+
+from api.clients import ForecastAPI
+from api.forecast import ForecastSeries
+from benchmarks.payloads import forecast_payload
+
+
+def _expected(payload):
+    """Daily stats the slow way: group readings by local calendar date"""
+    offset = payload["city"]["timezone"]
+    days = defaultdict(list)
+    for entry in payload["list"]:
+        date = datetime.fromtimestamp(entry["dt"] + offset, tz=timezone.utc).date().isoformat()
+        days[date].append(entry["main"])
+    return {
+        date: (
+            len(mains),
+            min(main["temp_min"] for main in mains),
+            max(main["temp_max"] for main in mains),
+            sum(main["temp"] for main in mains) / len(mains),
+        )
+        for date, mains in days.items()
+    }
+
+
+@pytest.mark.parametrize("offset", [32400, 0, -18000])
+def test_daily_aggregates_follow_local_day_boundaries(offset):
+    payload = forecast_payload("Tokyo")
+    payload["city"]["timezone"] = offset
+    days = ForecastSeries.from_payload(payload, "now").daily()["days"]
+
+    expected = _expected(payload)
+    assert [day["date"] for day in days] == list(expected)
+    for day in days:
+        samples, temp_min, temp_max, temp_mean = expected[day["date"]]
+        assert day["samples"] == samples
+        assert day["temp_min"] == pytest.approx(temp_min, abs=0.05)
+        assert day["temp_max"] == pytest.approx(temp_max, abs=0.05)
+        assert day["temp_mean"] == pytest.approx(temp_mean, abs=0.05)
+
+
+def test_tokyo_offset_splits_the_first_local_day():
+    # Readings start at 00:00 UTC, which is 09:00 in Tokyo: 5 readings on the first local day
+    days = ForecastSeries.from_payload(forecast_payload("Tokyo"), "now").daily()["days"]
+    assert [day["samples"] for day in days] == [5, 8, 8, 8, 8, 3]
+
+
+def test_rows_out_of_order_give_the_same_days():
+    payload = forecast_payload("Tokyo")
+    shuffled = {**payload, "list": random.Random(7).sample(payload["list"], len(payload["list"]))}
+    assert ForecastSeries.from_payload(shuffled, "now").daily() == ForecastSeries.from_payload(payload, "now").daily()
+
+
+def test_days_clips_the_summary_and_ranking():
+    series = ForecastSeries.from_payload(forecast_payload("Tokyo"), "now")
+    clipped = series.daily(2)
+    assert len(clipped["days"]) == 2
+    assert sorted(clipped["best_days"]) == [day["date"] for day in clipped["days"]]
+    # Same stats as the first two days of the full summary; only the ranking is among fewer days
+    without_rank = lambda days: [{k: v for k, v in day.items() if k != "rank"} for day in days]
+    assert without_rank(clipped["days"]) == without_rank(series.daily()["days"][:2])
+    assert len(series.daily(10)["days"]) == 6
+    assert ForecastSeries.from_payload({"list": []}, "now").daily() == {"days": [], "best_days": []}
+
+
+def test_rainy_day_ranks_last():
+    daily = ForecastSeries.from_payload(forecast_payload("Tokyo"), "now").daily()
+    rainy = max(daily["days"], key=lambda day: day["precipitation_mm"])
+    assert rainy["precipitation_mm"] > 0
+    assert daily["best_days"][-1] == rainy["date"]
+
+
+def test_concurrent_requests_share_one_call_and_then_hit_the_cache(upstream):
+    forecast = ForecastAPI()
+
+    async def run():
+        return await asyncio.gather(*(forecast.get_forecast("Sapporo", days) for days in (1, 3, 5)))
+
+    results = asyncio.run(run())
+    assert len(upstream) == 1
+    assert [len(result["days"]) for result in results] == [1, 3, 5]
+    assert asyncio.run(forecast.get_forecast("sapporo "))["city"] == "Sapporo"
+    assert len(upstream) == 1
+
+
+def test_forecast_endpoint_validates_days(client):
+    assert client.get("/forecast/Nagoya", params={"days": 2}).json()["data"]["days"][1]["samples"] == 8
+    assert client.get("/forecast/Nagoya", params={"days": 7}).status_code == 422
@@ -0,0 +1,53 @@
+import pytest
+from pydantic import ValidationError
+
+from api.config import Settings
+from api.geo import bounds, cell, center, encode
+
+
+def test_encode_matches_reference_hashes():
+    # Reference values from the original geohash.org implementation
+    assert encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert encode(42.6, -5.6, 5) == "ezs42"
+    assert encode(-33.8688, 151.2093, 6) == "r3gx2f"
+
+
+def test_bounds_contain_the_point_and_shrink_with_precision():
+    (lat_min, lat_max), (lon_min, lon_max) = bounds(encode(38.7223, -9.1393, 6))
+    assert lat_min <= 38.7223 <= lat_max and lon_min <= -9.1393 <= lon_max
+    coarse = bounds(encode(38.7223, -9.1393, 4))
+    assert coarse[0][1] - coarse[0][0] > lat_max - lat_min
+
+
+def test_nearby_points_share_a_cell_and_its_centre():
+    a = cell(38.72230, -9.13930, 6)
+    b = cell(38.72260, -9.13900, 6)
+    assert a.geohash == b.geohash
+    assert center(a.geohash) == (round(a.lat, 6), round(a.lon, 6))
+    size = a.to_dict()["size_m"]
+    assert 500 < size["north_south"] < 700
+    assert 900 < size["east_west"] < 1000
+
+
+def test_invalid_input_is_rejected():
+    with pytest.raises(ValueError):
+        encode(0, 0, 0)
+    with pytest.raises(ValueError):
+        encode(0, 0, 13)
+    with pytest.raises(ValueError):
+        bounds("abc!")
+
+
+def test_precision_setting_is_validated_at_startup(monkeypatch):
+    monkeypatch.setenv("WEATHER_GEOHASH_PRECISION", "13")
+    with pytest.raises(ValidationError):
+        Settings(_env_file=None)
+
+
+def test_weather_by_coords_shares_one_lookup_per_cell(client, upstream):
+    first = client.get("/weather/by-coords", params={"lat": 47.37690, "lon": 8.54170})
+    second = client.get("/weather/by-coords", params={"lat": 47.37695, "lon": 8.54175})
+    assert first.status_code == second.status_code == 200
+    assert first.json()["cell"] == second.json()["cell"]
+    weather_calls = [r for r in upstream if "/weather" in r.url.path and r.method == "GET"]
+    assert len(weather_calls) == 1
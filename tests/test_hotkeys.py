@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import math
+import random
+
+import pytest
+
+from api.hotkeys import CountMinSketch, HotKeys, Prefetcher, Refresher, TopK
+
+
+def test_sketch_never_undercounts_and_decay_halves():
+    sketch = CountMinSketch(width=64, depth=4)
+    rng = random.Random(3)
+    truth = {}
+    for _ in range(5000):
+        key = f"city-{int(rng.paretovariate(1.2)) % 300}"
+        truth[key] = truth.get(key, 0) + 1
+        sketch.add(key)
+    assert all(sketch.estimate(key) >= count for key, count in truth.items())
+    hottest = max(truth, key=truth.get)
+    before = sketch.estimate(hottest)
+    sketch.decay()
+    assert sketch.estimate(hottest) == before // 2
+
+
+def test_topk_keeps_the_highest_counts():
+    top = TopK(3)
+    for key, count in [("a", 5), ("b", 1), ("c", 3), ("d", 4), ("b", 2), ("e", 9)]:
+        top.offer(key, count)
+    assert top.top() == [("e", 9), ("a", 5), ("d", 4)]
+    top.decay()
+    assert top.top(2) == [("e", 4), ("a", 2)]
+
+
+def test_hot_keys_track_prefetch_hits():
+    hot = HotKeys(width=256, k=10)
+    for _ in range(4):
+        hot.observe("weather", "Lisbon")
+    hot.observe("weather", "Oslo")
+    assert hot.top("weather") == [("Lisbon", 4), ("Oslo", 1)]
+    assert hot.top("news") == []
+
+    hot.prefetched("weather", "Lisbon")
+    hot.prefetched("weather", "Oslo")
+    hot.observe("weather", "Lisbon")
+    status = hot.status()
+    assert status["prefetch"] == {"prefetched": 2, "used": 1, "hit_rate": 0.5}
+    assert status["top"]["weather"][0] == {"key": "Lisbon", "estimated_requests": 5}
+
+
+def _prefetcher(keys, interval, budget_per_minute, expires_in=lambda key: None, refresh=None, min_count=2):
+    hot = HotKeys(width=256, k=50)
+    for key, count in keys.items():
+        for _ in range(count):
+            hot.observe("weather", key)
+
+    async def ok(key):
+        return {"city": key}
+
+    refresher = Refresher(expires_in=expires_in, refresh=refresh or ok, owned=lambda key: True)
+    return Prefetcher(hot, {"weather": refresher}, interval=interval,
+                      budget_per_minute=budget_per_minute, min_count=min_count)
+
+
+def test_candidates_are_hottest_first_and_skip_cold_or_fresh_keys():
+    fresh = {"Paris"}
+    prefetcher = _prefetcher({"Lisbon": 9, "Paris": 8, "Oslo": 5, "Rome": 1}, interval=30, budget_per_minute=20,
+                             expires_in=lambda key: math.inf if key in fresh else 5.0)
+    assert prefetcher.candidates() == [("weather", "Lisbon"), ("weather", "Oslo")]
+
+
+def test_fractional_budget_carries_over_between_cycles():
+    # 20 calls a minute every 2 seconds is 2/3 of a call per cycle
+    prefetcher = _prefetcher({f"city-{i}": 5 for i in range(10)}, interval=2, budget_per_minute=20)
+    spent = [len(prefetcher.candidates()) for _ in range(30)]
+    assert sum(spent) == 20
+    assert max(spent) == 1
+    assert prefetcher.stats["over_budget"] == 30 * 10 - 20
+
+
+def test_unused_budget_does_not_pile_up():
+    prefetcher = _prefetcher({"Lisbon": 5, "Oslo": 5, "Rome": 5}, interval=30, budget_per_minute=4,
+                             expires_in=lambda key: math.inf)
+    for _ in range(10):
+        assert prefetcher.candidates() == []
+    prefetcher.refreshers["weather"] = prefetcher.refreshers["weather"]._replace(expires_in=lambda key: None)
+    assert len(prefetcher.candidates()) == 2
+
+
+def test_zero_budget_logs_a_warning(caplog):
+    prefetcher = _prefetcher({"Lisbon": 5}, interval=30, budget_per_minute=0)
+    assert prefetcher.candidates() == []
+
+    async def start_and_stop():
+        prefetcher.start()
+        await prefetcher.stop()
+
+    with caplog.at_level(logging.WARNING, logger="api.hotkeys"):
+        asyncio.run(start_and_stop())
+    assert "budget is 0" in caplog.text
+
+
+def test_run_once_counts_refreshes_and_errors():
+    async def refresh(key):
+        if key == "Oslo":
+            return {"error": "upstream down"}
+        if key == "Rome":
+            raise RuntimeError("boom")
+        return {"city": key}
+
+    prefetcher = _prefetcher({"Lisbon": 9, "Oslo": 8, "Rome": 7}, interval=60, budget_per_minute=10, refresh=refresh)
+    assert asyncio.run(prefetcher.run_once()) == 1
+    assert prefetcher.stats == {"cycles": 1, "refreshed": 1, "errors": 2, "over_budget": 0}
+    assert prefetcher.hot_keys.prefetch_stats["prefetched"] == 1
+    assert asyncio.run(prefetcher.run_once()) == 1
+    assert prefetcher.status()["budget_per_cycle"] == 10.0
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from api.config import Settings
+from api.keys import KeyPool, NoKeyAvailable, mask, parse_keys, send_with_key
+
+
+def test_parse_keys_strips_and_deduplicates():
+    assert parse_keys(" a, b ,,a ") == ["a", "b"]
+    assert parse_keys(None) == []
+    assert mask("abcdef123") == "…f123"
+
+
+def test_quota_settings_default_to_unlimited(monkeypatch):
+    monkeypatch.setenv("OPENWEATHER_KEY_QUOTA", "")
+    monkeypatch.setenv("NEWS_KEY_QUOTA", "250")
+    settings = Settings(_env_file=None)
+    assert settings.openweather_key_quota is None
+    assert settings.exchange_key_quota is None
+    assert settings.news_key_quota == 250
+
+
+def test_acquire_prefers_most_remaining_quota():
+    pool = KeyPool("test", ["a", "b"], quota=3, window=60)
+    assert pool.acquire() == "a"
+    assert pool.acquire() == "b"
+    pool.report("a", 200, {"x-ratelimit-remaining": "0"})
+    assert pool.acquire() == "b"
+    assert pool.acquire() == "b"
+    assert pool.acquire() is None
+    assert pool.available_in() > 0
+
+
+def test_acquire_skips_excluded_keys():
+    pool = KeyPool("test", ["a", "b"])
+    assert pool.acquire(exclude={"a"}) == "b"
+    assert pool.acquire(exclude={"a", "b"}) is None
+
+
+def test_rejected_and_rate_limited_keys_are_set_aside(monkeypatch):
+    pool = KeyPool("test", ["a", "b", "c"])
+    pool.report("a", 401, {})
+    pool.report("b", 429, {"retry-after": "5"})
+    assert pool.acquire() == "c"
+    assert pool.acquire(exclude={"c"}) is None
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert pool.acquire(exclude={"c"}) == "b"
+
+
+def _responses(*statuses, headers=None):
+    sent = []
+
+    async def send(key):
+        sent.append(key)
+        return httpx.Response(statuses[min(len(sent), len(statuses)) - 1], headers=headers or {})
+
+    return sent, send
+
+
+def test_send_with_key_rotates_past_a_rate_limited_key():
+    pool = KeyPool("test", ["a", "b"])
+    sent, send = _responses(429, 200)
+    response = asyncio.run(send_with_key(pool, send))
+    assert response.status_code == 200
+    assert sent == ["a", "b"]
+
+
+def test_send_with_key_tries_each_key_once_on_retry_after_zero():
+    # "Retry-After: 0" puts the key straight back; it used to be picked again forever
+    pool = KeyPool("test", ["a", "b"])
+    sent, send = _responses(429, headers={"retry-after": "0"})
+
+    async def run():
+        return await asyncio.wait_for(send_with_key(pool, send), timeout=1)
+
+    response = asyncio.run(run())
+    assert response.status_code == 429
+    assert sorted(sent) == ["a", "b"]
+
+
+def test_send_with_key_raises_when_no_key_is_usable():
+    pool = KeyPool("test", ["a"])
+    pool.report("a", 403, {})
+    _, send = _responses(200)
+    with pytest.raises(NoKeyAvailable):
+        asyncio.run(send_with_key(pool, send))
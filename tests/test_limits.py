@@ -0,0 +1,121 @@
+import asyncio
+
+import httpx
+import pytest
+
+from api.limits import AdaptiveLimiter
+from api.scheduler import PriorityScheduler
+
+WEIGHTS = {"interactive": 8, "batch": 3, "background": 1}
+
+
+def _limiter(**options):
+    return AdaptiveLimiter("test", **{"initial": 4, "minimum": 1, "maximum": 16, **options})
+
+
+def test_limit_grows_only_while_it_is_being_used():
+    limiter = _limiter()
+    limiter.on_sample(0.02, False, in_flight=1)
+    assert limiter.current == 4
+    for _ in range(8):
+        limiter.on_sample(0.02, False, in_flight=limiter.current)
+    assert limiter.current > 4
+
+
+def test_overload_cuts_the_limit_once_per_round_trip():
+    limiter = _limiter(initial=10, backoff=0.5)
+    limiter.on_sample(0.02, False, in_flight=1)
+    limiter.on_sample(0.02, True, in_flight=1)
+    limiter.on_sample(0.02, True, in_flight=1)
+    assert limiter.current == 5
+    assert limiter.stats["decreases"] == 1
+
+
+def test_latency_above_tolerance_cuts_the_limit():
+    limiter = _limiter(initial=10, tolerance=2.0)
+    limiter.on_sample(0.01, False, in_flight=1)
+    for _ in range(10):
+        limiter.on_sample(0.2, False, in_flight=1)
+    assert limiter.current < 10
+    assert limiter.history[-1][2] == "latency"
+
+
+def test_callers_over_the_limit_wait_in_line():
+    async def run():
+        limiter = _limiter(initial=1)
+        await limiter.acquire()
+        second = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not second.done()
+        limiter.release()
+        await second
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+
+
+def test_connection_errors_count_as_overload():
+    async def run():
+        limiter = _limiter()
+        with pytest.raises(httpx.ConnectError):
+            async with limiter.track() as call:
+                await call.send(_fail())
+        return limiter
+
+    async def _fail():
+        raise httpx.ConnectError("refused")
+
+    limiter = asyncio.run(run())
+    assert limiter.stats["overloads"] == 1
+    assert limiter.in_flight == 0
+
+
+def test_queueing_for_upstream_slots_is_not_mistaken_for_provider_latency():
+    # A provider that always answers in 20 ms, behind only 2 scheduler slots
+    async def run():
+        scheduler = PriorityScheduler(2, WEIGHTS)
+        limiter = _limiter(initial=10, maximum=64)
+
+        async def exchange():
+            await asyncio.sleep(0.02)
+            return httpx.Response(200)
+
+        async def one():
+            async with limiter.track() as call:
+                response = await scheduler.run(lambda: call.send(exchange()))
+                call.status_code = response.status_code
+
+        await asyncio.gather(*(one() for _ in range(40)))
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.stats["decreases"] == 0
+    assert limiter.baseline < 0.035
+    assert limiter.smoothed < 0.035
+
+
+def test_a_saturated_provider_does_not_hold_slots_other_providers_need():
+    # Weather is limited to one call at a time and has 8 queued; news should not wait behind them
+    async def run():
+        scheduler = PriorityScheduler(4, WEIGHTS)
+        weather = AdaptiveLimiter("weather", initial=1, minimum=1, maximum=1)
+        news = AdaptiveLimiter("news", initial=4, minimum=1, maximum=4)
+
+        async def exchange():
+            await asyncio.sleep(0.05)
+            return httpx.Response(200)
+
+        async def call(limiter):
+            async with limiter.track() as outcome:
+                response = await scheduler.run(lambda: outcome.send(exchange()))
+                outcome.status_code = response.status_code
+
+        weather_calls = [asyncio.ensure_future(call(weather)) for _ in range(8)]
+        await asyncio.sleep(0.01)
+        started = asyncio.get_running_loop().time()
+        await call(news)
+        waited = asyncio.get_running_loop().time() - started
+        await asyncio.gather(*weather_calls)
+        return waited
+
+    assert asyncio.run(run()) < 0.15  # one exchange, not the weather queue (8 x 50 ms)
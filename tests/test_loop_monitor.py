@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from api.loop_monitor import LoopMonitor
+
+
+def _block_the_loop(seconds):
+    time.sleep(seconds)  # deliberately synchronous
+
+
+def test_blocking_callback_shows_up_as_lag_and_an_offender():
+    async def run():
+        monitor = LoopMonitor(interval=0.02, slow_threshold=0.05)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        _block_the_loop(0.3)
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(run())
+    metrics = monitor.metrics()
+    assert not metrics["running"]
+    assert metrics["heartbeats"] >= 5
+    assert metrics["lag_ms"]["max"] >= 200
+    assert metrics["max_lag_ms_since_start"] >= 200
+    assert metrics["slow_callbacks"] == 1
+
+    offender = monitor.recent_offenders(1)[0]
+    assert offender["blocked_ms"] >= 50
+    assert any("_block_the_loop" in frame for frame in offender["stack"])
+
+
+def test_idle_loop_has_no_offenders():
+    async def run():
+        monitor = LoopMonitor(interval=0.02, slow_threshold=0.2)
+        monitor.start()
+        await asyncio.sleep(0.15)
+        await monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(run())
+    assert monitor.stats["slow_callbacks"] == 0
+    assert monitor.recent_offenders() == []
+    assert monitor.metrics()["lag_ms"]["p50"] < 50
+
+
+def test_metrics_before_any_heartbeat_are_zero():
+    metrics = LoopMonitor().metrics()
+    assert metrics["lag_ms"] == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+    assert metrics["window_seconds"] == 0.0
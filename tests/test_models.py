@@ -0,0 +1,70 @@
+import time
+
+from api.cache import TTLCache
+from api.models import RateTable, WeatherResult
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_cache_expires_entries(monkeypatch):
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("a", 1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_weather_result_round_trips_payload_shape():
+    payload = {
+        "name": "Paris",
+        "sys": {"country": "FR"},
+        "main": {"temp": 18.5, "feels_like": 17.0, "humidity": 60},
+        "weather": [{"description": "light rain"}],
+        "wind": {"speed": 3.2},
+    }
+    result = WeatherResult.from_payload(payload, "2026-01-01T00:00:00")
+    assert result.to_dict() == {
+        "city": "Paris",
+        "country": "FR",
+        "temperature": 18.5,
+        "feels_like": 17.0,
+        "humidity": 60,
+        "description": "light rain",
+        "wind_speed": 3.2,
+        "timestamp": "2026-01-01T00:00:00",
+    }
+
+
+def test_weather_result_tolerates_missing_sections():
+    result = WeatherResult.from_payload({"name": "Nowhere"}, "t")
+    assert result.temperature is None
+    assert result.description is None
+
+
+def test_rate_tables_share_currency_codes():
+    first = RateTable.from_rates("USD", {"EUR": 0.9, "JPY": 150.0}, None)
+    second = RateTable.from_rates("USD", {"EUR": 0.91, "JPY": 150.0}, None)
+    assert first.codes is second.codes
+    assert second.rate("EUR") == 0.91
+    assert second.rate("XXX") is None
+    assert second.to_dict() == {"EUR": 0.91, "JPY": 150.0}
+
+
+def test_rate_table_changes_since():
+    old = RateTable.from_rates("USD", {"EUR": 0.9, "JPY": 150.0}, None)
+    same_layout = RateTable.from_rates("USD", {"EUR": 0.9, "JPY": 151.0}, None)
+    assert same_layout.changes_since(old) == ({"JPY": 151.0}, [])
+    assert not same_layout.same_rates(old)
+
+    new_layout = RateTable.from_rates("USD", {"EUR": 0.9, "GBP": 0.8}, None)
+    assert new_layout.changes_since(old) == ({"GBP": 0.8}, ["JPY"])
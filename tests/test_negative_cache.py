@@ -0,0 +1,85 @@
+import asyncio
+import math
+import types
+
+import httpx
+import pytest
+
+import api.cache
+from api import transport
+from api.clients import ExchangeRateAPI, NewsAPI, WeatherAPI
+from api.config import settings
+from api.news_index import NewsIndex
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable clock for cache expiry"""
+    now = [1000.0]
+    monkeypatch.setattr(api.cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _serve(monkeypatch, handler):
+    """Route upstream calls to ``handler``; returns the requests made"""
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    monkeypatch.setattr(transport, "_client", None)
+    monkeypatch.setattr(transport, "_build_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(record)))
+    return requests
+
+
+@pytest.mark.parametrize("status", [400, 404])
+def test_caller_errors_are_cached_until_the_negative_ttl_expires(monkeypatch, clock, status):
+    requests = _serve(monkeypatch, lambda request: httpx.Response(status, json={"cod": str(status)}))
+    weather = WeatherAPI()
+
+    first = asyncio.run(weather.get_weather("Atlantis"))
+    assert first["status_code"] == status
+    assert asyncio.run(weather.get_weather("atlantis ")) == first
+    assert len(requests) == 1
+    assert weather.expires_in("atlantis") == math.inf
+
+    clock[0] += settings.negative_cache_ttl + 1
+    assert weather.expires_in("atlantis") is None
+    asyncio.run(weather.get_weather("Atlantis"))
+    assert len(requests) == 2
+
+
+@pytest.mark.parametrize("handler", [
+    lambda request: httpx.Response(500, json={"message": "internal error"}),
+    lambda request: httpx.Response(503, json={"message": "unavailable"}),
+    lambda request: (_ for _ in ()).throw(httpx.ConnectError("refused", request=request)),
+], ids=["500", "503", "connection error"])
+def test_server_and_connection_errors_are_not_cached(monkeypatch, clock, handler):
+    requests = _serve(monkeypatch, handler)
+    weather = WeatherAPI()
+    assert asyncio.run(weather.get_weather("Lyon"))["status_code"] >= 500
+    assert weather.expires_in("lyon") is None
+    asyncio.run(weather.get_weather("Lyon"))
+    assert len(requests) == 2
+
+
+def test_unsupported_currency_is_cached_as_404(monkeypatch, clock):
+    requests = _serve(
+        monkeypatch, lambda request: httpx.Response(404, json={"result": "error", "error-type": "unsupported-code"})
+    )
+    exchange = ExchangeRateAPI()
+    assert asyncio.run(exchange.get_exchange_rate("XYZ", "EUR"))["status_code"] == 404
+    assert asyncio.run(exchange.get_exchange_rate("xyz", "USD"))["status_code"] == 404
+    assert len(requests) == 1
+    assert exchange.expires_in("XYZ") == math.inf
+
+
+def test_news_errors_are_cached_per_query(monkeypatch, clock):
+    requests = _serve(monkeypatch, lambda request: httpx.Response(400, json={"status": "error", "code": "parameterInvalid"}))
+    news = NewsAPI(index=NewsIndex())
+    assert asyncio.run(news.search_news("bad query", mode="remote"))["status_code"] == 400
+    assert asyncio.run(news.search_news("bad query", mode="remote"))["status_code"] == 400
+    assert len(requests) == 1
+    asyncio.run(news.search_news("other query", mode="remote"))
+    assert len(requests) == 2
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from api.clients import NewsAPI
+from api.models import Article
+from api.news_index import NewsIndex, fts_query
+
+TOKYO = [
+    ("Tokyo tourism hits a record", "Visitors flock to the capital's temples."),
+    ("Cherry blossom season draws crowds to Tokyo", "Parks fill up for hanami and tourism booms."),
+    ("Tokyo tourism board launches night tours", "New routes through Shinjuku and Shibuya."),
+]
+PARIS = [
+    ("Paris travel guide for the autumn", "Museums, cafes and quiet walks along the Seine."),
+    ("Budget travel in Paris on the metro", "How to get around the city cheaply."),
+    ("Paris tourism rebounds after the summer", "Hotels report record autumn bookings."),
+]
+
+
+def _articles(stories, site):
+    return [
+        Article(title, "Wire", None, description, f"https://{site}.example/{i}", "2026-10-01T00:00:00Z")
+        for i, (title, description) in enumerate(stories)
+    ]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("Paris travel OR tourism", '"Paris" AND ("travel" OR "tourism")'),
+    ("a OR b OR c d", '("a" OR "b" OR "c") AND "d"'),
+    ("Lisbon NOT football", '"Lisbon" NOT "football"'),
+    ("OR Paris AND", '"Paris"'),
+    ('hello, "world"!', '"hello" AND "world"'),
+    ("AND OR NOT", None),
+])
+def test_fts_query_groups_or_runs(query, expected):
+    assert fts_query(query) == expected
+
+
+def test_index_only_returns_articles_matching_every_group():
+    index = NewsIndex()
+    asyncio.run(index.ingest(_articles(TOKYO, "tokyo"), "en"))
+    assert asyncio.run(index.search("Paris travel OR tourism", "en", 10, 3600)) == []
+    assert len(asyncio.run(index.search("Tokyo travel OR tourism", "en", 10, 3600))) == 3
+    assert asyncio.run(index.search("Tokyo tourism", "de", 10, 3600)) == []
+
+
+def test_auto_mode_asks_upstream_unless_the_index_has_a_full_page(upstream):
+    news = NewsAPI(index=NewsIndex())
+    asyncio.run(news.index.ingest(_articles(TOKYO, "tokyo"), "en"))
+
+    result = asyncio.run(news.search_news("Paris travel OR tourism", page_size=3, mode="auto"))
+    assert result["served_from"] != "local"
+    assert len(upstream) == 1
+
+    asyncio.run(news.index.ingest(_articles(PARIS, "paris"), "en"))
+    result = asyncio.run(news.search_news("Paris travel OR tourism", page_size=3, mode="auto"))
+    assert result["served_from"] == "local"
+    assert all("Paris" in article["title"] for article in result["articles"])
+    assert len(upstream) == 1
@@ -0,0 +1,38 @@
+from api.profiling import StackSampler, fold_stack
+from conftest import ADMIN_HEADERS
+
+
+def test_fold_stack_lists_callers_first():
+    import sys
+
+    def inner():
+        return fold_stack(sys._getframe())
+
+    folded = inner().split(";")
+    assert folded[-1].startswith("inner (test_profiling.py")
+    assert any(name.startswith("test_fold_stack_lists_callers_first") for name in folded[:-1])
+
+
+def test_sampler_windows_are_bounded():
+    sampler = StackSampler(sample_hz=10, window_seconds=10, windows=2)
+    for second in range(0, 50, 10):
+        sampler.record("a;b", now=1000.0 + second)
+    assert len(sampler._windows) == 2
+    assert sampler.folded() == "a;b 2\n"
+
+
+def test_profile_token_header_returns_profile(client):
+    response = client.get("/", headers={"X-Profile-Token": ADMIN_HEADERS["X-Admin-Token"]})
+    assert response.status_code == 200
+    assert "profile" in response.json()
+
+
+def test_profile_token_is_not_read_from_query_string(client):
+    response = client.get("/", params={"profile": ADMIN_HEADERS["X-Admin-Token"]})
+    assert response.status_code == 200
+    assert "profile" not in response.json()
+
+
+def test_wrong_profile_token_is_ignored(client):
+    response = client.get("/", headers={"X-Profile-Token": "guess"})
+    assert "profile" not in response.json()
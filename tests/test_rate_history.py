@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+import api.app
+from api.models import RateTable
+from api.rate_history import HistoryError, RateHistory, RateSeries, trend_statistics
+
+HOUR = 3600.0
+
+
+def _table(rates, base="USD"):
+    return RateTable.from_rates(base, rates, None)
+
+
+def test_series_grows_and_adds_currencies_with_nan_before_they_appear():
+    series = RateSeries("USD")
+    for i in range(300):
+        rates = {"EUR": 0.9 + i * 0.001}
+        if i >= 100:
+            rates["JPY"] = 150.0
+        assert series.append(_table(rates), 1000.0 + i)
+    assert series.count == 300
+    assert series.capacity >= 300
+    times, rates = series.window(["EUR", "JPY"], since=0)
+    assert times.shape == (300,)
+    assert np.isnan(rates[1, :100]).all() and (rates[1, 100:] == 150.0).all()
+    assert rates[0, -1] == pytest.approx(0.9 + 299 * 0.001)
+
+
+def test_series_ignores_observations_that_are_not_newer():
+    series = RateSeries("USD")
+    assert series.append(_table({"EUR": 0.9}), 2000.0)
+    assert not series.append(_table({"EUR": 0.8}), 2000.0)
+    assert not series.append(_table({"EUR": 0.8}), 1000.0)
+    assert series.count == 1
+
+
+def test_store_on_disk_survives_reopening(tmp_path):
+    history = RateHistory(str(tmp_path))
+    now = time.time()
+    history.append(_table({"EUR": 0.9, "GBP": 0.8}), now - 2 * HOUR)
+    history.append(_table({"EUR": 0.91, "GBP": 0.79, "JPY": 150.0}), now - HOUR)
+
+    reopened = RateHistory(str(tmp_path))
+    result = reopened.query("USD", ["EUR", "JPY"], days=1, window=2, series=False)
+    assert result["observations_stored"] == 2
+    assert result["rates"]["EUR"]["latest"] == 0.91
+    assert result["rates"]["JPY"]["observations"] == 1
+
+
+def test_trend_statistics_match_direct_computation():
+    rng = np.random.default_rng(1)
+    times = 1_700_000_000 + np.arange(50) * HOUR
+    rates = np.vstack([1 + 0.01 * rng.standard_normal(50).cumsum(), np.full(50, 2.0)])
+    rates[0, 10] = np.nan
+
+    first, flat = trend_statistics(times, rates, window=5, series=True)
+    present = rates[0][~np.isnan(rates[0])]
+    assert first["observations"] == 49
+    assert first["mean"] == pytest.approx(present.mean())
+    assert first["min"]["rate"] == present.min() and first["max"]["rate"] == present.max()
+    assert first["moving_average"]["latest"] == pytest.approx(rates[0, -5:].mean())
+
+    returns = np.diff(np.log(rates[0]))
+    expected = np.nanstd(returns, ddof=1)
+    assert first["volatility"]["per_observation"] == pytest.approx(expected)
+    assert first["volatility"]["annualized"] == pytest.approx(expected * np.sqrt(365.25 * 24))
+    assert len(first["moving_average"]["series"]) > 0
+
+    assert flat["volatility"]["per_observation"] == 0.0
+
+
+def test_queries_without_data_raise_history_error():
+    history = RateHistory()
+    with pytest.raises(HistoryError):
+        history.query("USD", ["EUR"], days=1, window=2)
+    history.append(_table({"EUR": 0.9}), time.time() - 10 * 86400)
+    with pytest.raises(HistoryError):
+        history.query("USD", ["EUR"], days=1, window=2)
+    with pytest.raises(HistoryError):
+        history.query("USD", ["XYZ"], days=30, window=2)
+
+
+def test_exchange_appends_off_the_event_loop_under_the_upper_case_base(client, upstream, monkeypatch):
+    history = api.app.exchange_api.rate_history
+    appended = []
+    original = history.append
+
+    def append(table, observed_at=None):
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()  # only worker threads have no running loop
+        appended.append(table.base)
+        return original(table, observed_at)
+
+    monkeypatch.setattr(history, "append", append)
+    response = client.get("/exchange", params={"from_currency": "chf", "to_currency": "eur"})
+    assert response.status_code == 200
+    assert response.json()["data"]["base"] == "CHF"
+    assert appended == ["CHF"]
+    assert client.get("/exchange/history", params={"base": "chf", "targets": "eur", "days": 3660}).status_code == 200
+
+
+def test_exchange_still_answers_when_the_history_cannot_be_written(client, upstream, monkeypatch, caplog):
+    def append(table, observed_at=None):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(api.app.exchange_api.rate_history, "append", append)
+    response = client.get("/exchange", params={"from_currency": "DKK", "to_currency": "EUR"})
+    assert response.status_code == 200
+    assert response.json()["data"]["base"] == "DKK"
+    assert "DKK rate table" in caplog.text
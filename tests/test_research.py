@@ -0,0 +1,37 @@
+import pytest
+
+from api.app import orchestrator
+from api.clients import DemoAPIOrchestrator
+
+
+@pytest.mark.parametrize("include, summary, expected", [
+    (None, False, ["weather", "news", "currency"]),
+    (["currency"], False, ["currency"]),
+    (["weather"], True, ["weather", "news", "currency"]),
+    ([], True, ["weather", "news", "currency"]),
+])
+def test_sources_called_follows_dependencies(include, summary, expected):
+    assert orchestrator.sources_called(include, summary) == expected
+
+
+def test_sources_for_fields_maps_sections_and_aliases():
+    fields = ["weather.temperature", "news.articles.title", "currency_info.rate", "destination"]
+    assert DemoAPIOrchestrator.sources_for_fields(fields) == ["weather", "news", "currency"]
+    assert DemoAPIOrchestrator.sources_for_fields(["exchange"]) == ["currency"]
+
+
+def test_research_lists_the_sources_a_summary_pulled_in(client, upstream):
+    response = client.post("/research?summary=true", json={"city": "Coimbra", "include": ["weather"]})
+    assert response.status_code == 200
+    assert response.json()["apis_used"] == [
+        "OpenWeatherMap", "NewsAPI", "ExchangeRate-API", "OpenAI-compatible LLM"
+    ]
+    # The USD table may already be cached by another test; the city's weather and news can't be
+    assert {request.url.host for request in upstream} >= {"api.openweathermap.org", "newsapi.org"}
+
+
+def test_research_lists_only_the_included_sources(client, upstream):
+    response = client.post("/research", json={"city": "Braga", "fields": ["weather.temperature"]})
+    assert response.status_code == 200
+    assert response.json()["apis_used"] == ["OpenWeatherMap"]
+    assert {request.url.host for request in upstream} == {"api.openweathermap.org"}
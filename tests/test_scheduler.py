@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from api.scheduler import PriorityScheduler, current_priority, priority
+
+WEIGHTS = {"interactive": 8, "batch": 3, "background": 1}
+
+
+def _scheduler(slots=1, reserved=0, max_wait=60.0):
+    return PriorityScheduler(slots, WEIGHTS, reserved_interactive=reserved, max_wait=max_wait)
+
+
+async def _order(scheduler, calls):
+    """Queue ``calls`` ((class, flow, label)) behind a held slot; return the order they get served"""
+    served = []
+    await scheduler.acquire("interactive")
+
+    async def call(name, flow, label):
+        await scheduler.acquire(name, flow)
+        served.append(label)
+        scheduler.release(name)
+
+    tasks = [asyncio.ensure_future(call(*entry)) for entry in calls]
+    await asyncio.sleep(0)
+    scheduler.release("interactive")
+    await asyncio.gather(*tasks)
+    return served
+
+
+def test_priority_context():
+    assert current_priority() == "interactive"
+    with priority("batch"):
+        assert current_priority() == "batch"
+    with pytest.raises(ValueError):
+        with priority("urgent"):
+            pass
+
+
+def test_free_slot_is_taken_without_queueing():
+    scheduler = _scheduler(slots=2)
+    assert asyncio.run(scheduler.acquire("batch")) == 0.0
+    assert scheduler.in_use == 1
+
+
+def test_reserved_slots_are_kept_for_interactive_calls():
+    async def run():
+        scheduler = _scheduler(slots=2, reserved=1)
+        await scheduler.acquire("batch")
+        second_batch = asyncio.ensure_future(scheduler.acquire("batch"))
+        await asyncio.sleep(0)
+        assert not second_batch.done()
+        # The reserved slot goes to an interactive call even with batch queued
+        await asyncio.wait_for(scheduler.acquire("interactive"), timeout=0.1)
+        assert not second_batch.done()
+        scheduler.release("batch")
+        await second_batch
+
+    asyncio.run(run())
+
+
+def test_classes_share_slots_by_weight():
+    calls = [("batch", "internal", "b")] * 6 + [("interactive", "internal", "i")] * 12
+    served = asyncio.run(_order(_scheduler(), calls))
+    # 8 interactive for every 3 batch while both are waiting
+    assert served[:11].count("i") == 8
+    assert served[:11].count("b") == 3
+
+
+def test_overdue_calls_are_served_first():
+    async def run():
+        scheduler = _scheduler(max_wait=0.01)
+        await scheduler.acquire("interactive")
+        served = []
+
+        async def call(name):
+            await scheduler.acquire(name)
+            served.append(name)
+            scheduler.release(name)
+
+        background = asyncio.ensure_future(call("background"))
+        await asyncio.sleep(0.02)
+        interactive = [asyncio.ensure_future(call("interactive")) for _ in range(3)]
+        await asyncio.sleep(0)
+        scheduler.release("interactive")
+        await asyncio.gather(background, *interactive)
+        return served
+
+    assert asyncio.run(run())[0] == "background"
+
+
+def test_flows_are_served_fairly_within_a_class():
+    burst = [("interactive", "C", f"C{i}") for i in range(4)]
+    single = [("interactive", "A", "A0"), ("interactive", "B", "B0")]
+    served = asyncio.run(_order(_scheduler(), burst + single))
+    # A and B wait behind one of C's calls, not behind the whole burst
+    assert served[:3] == ["C0", "A0", "B0"]
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        scheduler = _scheduler()
+        await scheduler.acquire("interactive")
+        waiter = asyncio.ensure_future(scheduler.acquire("batch"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        scheduler.release("interactive")
+        assert scheduler.in_use == 0
+        assert scheduler.status()["waiting"]["batch"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,30 @@
+import tracemalloc
+
+import httpx
+
+from benchmarks.soak import Sample, _stand_in, report
+
+
+def _samples(requests_per_interval, interval=10.0, count=3):
+    tracemalloc.start(1)
+    try:
+        snapshot = tracemalloc.take_snapshot()
+        return [Sample(i * interval, i * requests_per_interval, snapshot) for i in range(count)]
+    finally:
+        tracemalloc.stop()
+
+
+def test_report_passes_when_the_target_rate_is_reached():
+    assert report(_samples(400), 5.0, None, 5, target_rate=40, min_rate_ratio=0.8)
+
+
+def test_report_fails_when_the_load_was_not_generated(capsys):
+    assert not report(_samples(150), 5.0, None, 5, target_rate=40, min_rate_ratio=0.8)
+    assert "FAIL: achieved 15.0 of 40 requests/s" in capsys.readouterr().out
+
+
+def test_stand_in_answers_prewarm_and_error_paths():
+    head = httpx.Request("HEAD", "https://api.openweathermap.org/")
+    assert _stand_in(head).status_code == 200
+    missing = httpx.Request("GET", "https://api.openweathermap.org/data/2.5/weather?q=Nowhere1")
+    assert _stand_in(missing).status_code == 404
@@ -0,0 +1,120 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import api.app
+from api import transport
+from api.clients import SummaryError, TripSummaryAPI
+from benchmarks.payloads import chat_stream_payload
+from conftest import LLM_BASE_URL, SUMMARY_TEXT
+
+RESEARCH = {
+    "destination": "Lisbon",
+    "weather": {"temperature": 21.0, "description": "clear sky"},
+    "latest_news": {"articles": [{"title": "Lisbon hosts a festival", "source": "Wire"}]},
+    "currency_info": {"base": "USD", "target": "EUR", "rate": 0.92},
+    "research_timestamp": "2026-10-19T12:00:00",
+}
+
+
+def _serve(monkeypatch, handler):
+    """Route upstream calls to ``handler``; returns the requests made"""
+    requests = []
+
+    def record(request):
+        requests.append(request)
+        return handler(request)
+
+    monkeypatch.setattr(transport, "_client", None)
+    monkeypatch.setattr(transport, "_build_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(record)))
+    return requests
+
+
+def _stream(body):
+    return lambda request: httpx.Response(200, content=body, headers={"Content-Type": "text/event-stream"})
+
+
+async def _collect(api, research=RESEARCH):
+    return [token async for token in api.stream_summary(research)]
+
+
+def test_streamed_chunks_are_yielded_and_cached_by_content(upstream):
+    api = TripSummaryAPI(base_url=LLM_BASE_URL)
+    tokens = asyncio.run(_collect(api))
+    assert len(tokens) > 1 and "".join(tokens) == SUMMARY_TEXT
+    body = json.loads(upstream[0].content)
+    assert body["stream"] is True and body["model"] == api.model
+
+    # Same facts, different timestamp: served from the cache in one piece
+    again = asyncio.run(_collect(api, {**RESEARCH, "research_timestamp": "2026-10-20T08:00:00"}))
+    assert again == [SUMMARY_TEXT]
+    assert len(upstream) == 1
+    assert asyncio.run(api.summarize(RESEARCH)) == {"text": SUMMARY_TEXT, "model": api.model, "cached": True}
+
+    changed = {**RESEARCH, "currency_info": {**RESEARCH["currency_info"], "rate": 0.95}}
+    assert not api.is_cached(changed)
+
+
+def test_stream_without_done_is_an_error_and_not_cached(monkeypatch):
+    requests = _serve(monkeypatch, _stream(chat_stream_payload("Cut off mid", done=False)))
+    api = TripSummaryAPI(base_url=LLM_BASE_URL)
+    tokens = []
+
+    async def run():
+        async for token in api.stream_summary(RESEARCH):
+            tokens.append(token)
+
+    with pytest.raises(SummaryError) as failure:
+        asyncio.run(run())
+    assert "".join(tokens) == "Cut off mid"
+    assert failure.value.error["status_code"] == 502
+    assert not api.is_cached(RESEARCH)
+    assert asyncio.run(api.summarize(RESEARCH))["status_code"] == 502
+    assert len(requests) == 2
+
+
+def test_upstream_error_mid_stream_is_reported_and_not_cached(monkeypatch):
+    first_chunk = chat_stream_payload("Pack an umbrella", done=False).split(b"\n\n")[0] + b"\n\n"
+
+    async def body():
+        yield first_chunk
+        raise httpx.ReadError("connection reset")
+
+    _serve(monkeypatch, lambda request: httpx.Response(200, content=body()))
+    api = TripSummaryAPI(base_url=LLM_BASE_URL)
+    tokens = []
+
+    async def run():
+        async for token in api.stream_summary(RESEARCH):
+            tokens.append(token)
+
+    with pytest.raises(SummaryError) as failure:
+        asyncio.run(run())
+    assert tokens == ["Pack"]
+    assert failure.value.error["status_code"] == 502
+    assert not api.is_cached(RESEARCH)
+
+
+def test_upstream_error_status_becomes_a_summary_error(monkeypatch):
+    _serve(monkeypatch, lambda request: httpx.Response(429, json={"error": {"message": "slow down"}}))
+    result = asyncio.run(TripSummaryAPI(base_url=LLM_BASE_URL).summarize(RESEARCH))
+    assert result["status_code"] == 503
+
+
+def test_unconfigured_summary_is_unavailable():
+    api = TripSummaryAPI(api_key="", base_url=TripSummaryAPI.DEFAULT_BASE_URL)
+    assert asyncio.run(api.summarize(RESEARCH))["status_code"] == 503
+
+
+def test_research_stream_sends_research_tokens_and_done(client, monkeypatch):
+    monkeypatch.setattr(api.app.orchestrator, "summary_api", TripSummaryAPI(base_url=LLM_BASE_URL))
+    response = client.post("/research/stream", json={"city": "Evora"})
+    assert response.status_code == 200
+    events = [block.split("\n", 1) for block in response.text.strip().split("\n\n")]
+    names = [event[len("event: "):] for event, _ in events]
+    assert names[0] == "research" and names[-1] == "done"
+    tokens = [json.loads(data[len("data: "):]) for (event, data), name in zip(events, names) if name == "token"]
+    assert "".join(tokens) == SUMMARY_TEXT
+    assert json.loads(events[-1][1][len("data: "):]) == {"cached": False}
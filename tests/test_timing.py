@@ -0,0 +1,65 @@
+import asyncio
+import contextvars
+import re
+
+from api.timing import RequestTimings, UpstreamTrace, current_timings, phase, record, start_request
+
+ENTRY = re.compile(r'[\w-]+;dur=\d+\.\d{2}(;desc="[^"]*")?')
+
+
+def test_header_lists_phases_in_order_with_milliseconds():
+    timings = RequestTimings()
+    timings.record("weather-cache", 0.0015, "cache hit")
+    timings.record("total", 0.012)
+    assert timings.header() == 'weather-cache;dur=1.50;desc="cache hit", total;dur=12.00'
+    assert timings.to_list()[0] == {"phase": "weather-cache", "ms": 1.5, "detail": "cache hit"}
+
+
+def test_phases_are_recorded_only_inside_a_timed_request():
+    def outside():
+        record("ignored", 1.0)
+        return current_timings()
+
+    def inside():
+        timings = start_request()
+        with phase("work", "doing things"):
+            pass
+        record("extra", 0.5)
+        return timings
+
+    assert contextvars.copy_context().run(outside) is None
+    timings = contextvars.copy_context().run(inside)
+    assert [(name, description) for name, _, description in timings.entries] == [
+        ("work", "doing things"), ("extra", None)
+    ]
+
+
+def test_upstream_trace_splits_connect_and_wait_when_events_arrive():
+    def run(events):
+        timings = start_request()
+        trace = UpstreamTrace()
+        for event in events:
+            asyncio.run(trace(event, {}))
+        trace.finish("news")
+        return [name for name, _, _ in timings.entries]
+
+    assert contextvars.copy_context().run(run, []) == ["news-wait"]
+    events = ["connection.connect_tcp.started", "http11.send_request_headers.started"]
+    assert contextvars.copy_context().run(run, events) == ["news-connect", "news-wait"]
+
+
+def test_responses_carry_server_timing_with_serialize_and_total(client):
+    response = client.get("/weather/Tallinn", params={"timings": "true"})
+    assert response.status_code == 200
+    entries = response.headers["Server-Timing"].split(", ")
+    assert all(ENTRY.fullmatch(entry) for entry in entries)
+    names = [entry.split(";")[0] for entry in entries]
+    assert "weather-wait" in names
+    assert names[-2:] == ["serialize", "total"]
+    assert [entry["phase"] for entry in response.json()["timings"]] == names[:-2]
+
+
+def test_errors_still_get_a_total(client):
+    response = client.get("/exchange", params={"from_currency": "??"})
+    assert response.status_code == 400
+    assert response.headers["Server-Timing"].split(", ")[-1].startswith("total;dur=")
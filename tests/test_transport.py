@@ -0,0 +1,119 @@
+import asyncio
+import socket
+import types
+
+import httpcore
+import httpx
+import pytest
+
+from api import transport
+from api.transport import CachingDNSBackend, DNSCache
+
+
+def _resolver(answers, lookups):
+    """A getaddrinfo stand-in returning ``answers[host]``"""
+    async def getaddrinfo(host, port, type=0):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, port)) for address in answers[host]]
+    return getaddrinfo
+
+
+def test_dns_cache_reuses_answers_until_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(transport, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    lookups = []
+
+    async def run():
+        asyncio.get_running_loop().getaddrinfo = _resolver({"api.example": ["10.0.0.1", "10.0.0.1", "10.0.0.2"]}, lookups)
+        dns = DNSCache(ttl=60)
+        first = await dns.resolve("api.example", 443)
+        assert await dns.resolve("api.example", 443) == first
+        assert await dns.resolve("127.0.0.1", 443) == ["127.0.0.1"]
+        now[0] += 61
+        await dns.resolve("api.example", 443)
+        dns.forget("api.example", 443)
+        await dns.resolve("api.example", 443)
+        return first
+
+    assert asyncio.run(run()) == ["10.0.0.1", "10.0.0.2"]
+    assert lookups == ["api.example"] * 3
+
+
+class _Backend:
+    """Network backend that refuses the addresses in ``refused``"""
+
+    def __init__(self, refused=()):
+        self.refused = set(refused)
+        self.attempts = []
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        self.attempts.append(host)
+        if host in self.refused:
+            raise httpcore.ConnectError(f"{host} refused")
+        return f"stream to {host}"
+
+
+class _FixedDNS(DNSCache):
+    def __init__(self, addresses):
+        super().__init__()
+        self.addresses = addresses
+        self.forgotten = []
+
+    async def resolve(self, host, port):
+        if isinstance(self.addresses, Exception):
+            raise self.addresses
+        return self.addresses
+
+    def forget(self, host, port):
+        self.forgotten.append(host)
+
+
+def test_backend_tries_each_cached_address_in_turn():
+    backend = _Backend(refused={"10.0.0.1"})
+    caching = CachingDNSBackend(backend, _FixedDNS(["10.0.0.1", "10.0.0.2"]))
+    assert asyncio.run(caching.connect_tcp("api.example", 443)) == "stream to 10.0.0.2"
+    assert backend.attempts == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_backend_forgets_the_host_when_every_address_fails():
+    dns = _FixedDNS(["10.0.0.1", "10.0.0.2"])
+    caching = CachingDNSBackend(_Backend(refused={"10.0.0.1", "10.0.0.2"}), dns)
+    with pytest.raises(httpcore.ConnectError, match="10.0.0.2 refused"):
+        asyncio.run(caching.connect_tcp("api.example", 443))
+    assert dns.forgotten == ["api.example"]
+
+
+@pytest.mark.parametrize("answer, message", [
+    ([], "No addresses found for api.example"),
+    (socket.gaierror("Name or service not known"), "not known"),
+])
+def test_backend_raises_connect_error_when_nothing_resolves(answer, message):
+    caching = CachingDNSBackend(_Backend(), _FixedDNS(answer))
+    with pytest.raises(httpcore.ConnectError, match=message):
+        asyncio.run(caching.connect_tcp("api.example", 443))
+
+
+def test_built_client_connects_through_the_dns_cache():
+    client = transport._build_client()
+    pool = client._transport._pool
+    assert isinstance(pool._network_backend, CachingDNSBackend)
+    assert pool._network_backend.dns is transport.dns_cache
+    asyncio.run(client.aclose())
+
+
+def test_prewarm_opens_one_connection_per_origin(monkeypatch):
+    heads = []
+
+    def handler(request):
+        heads.append((request.method, str(request.url)))
+        if request.url.host == "down.example":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(405)
+
+    monkeypatch.setattr(transport, "_client", None)
+    monkeypatch.setattr(transport, "_build_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    results = asyncio.run(transport.prewarm(
+        ["https://up.example/v1", "https://up.example/v2/other", "https://down.example/api"], timeout=1.0
+    ))
+    assert results == {"https://up.example/": "warm (HTTP/1.1)", "https://down.example/": "failed: ConnectError"}
+    assert heads == [("HEAD", "https://up.example/"), ("HEAD", "https://down.example/")]